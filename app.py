@@ -1,36 +1,63 @@
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from flask import Flask, render_template, request, redirect, url_for, flash, Response, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, Response, jsonify, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import sqlite3
 import os
-import csv
+import random
+from itertools import islice
 import json
-import feedparser
-from bs4 import BeautifulSoup
-import dateparser, requests, time
+
+from ingestion import IngestionEngine, KnownUrlFilter, download_page, fetch_stats
+from enrichment import EnrichmentPipeline
+from http_client import http_stats
+import health
+import websub
+from page_cache import get_page_cache
+from config_advanced import Config, RSS_SOURCES_ADVANCED
+from urlnorm import url_hash
+from extractor import html_to_text
+from extract_pool import extract
+from dates import date_stats, entry_date, parse_date
+from topics import TOPIC_KEYWORDS, classify
+import clustering
+from watermark import high_water_mark, needs_rescan, select_entries, watermark_stats
+from feed_stream import iter_entries, parse_feed, parse_stats, seen_entries
+from feed_content import content_hash, entry_changed, entry_content, entry_updated, feed_content_stats, raw_content
+from sources import DEFAULT_SETTINGS, SourceRegistry, build_opml, make_key, parse_opml
+from leases import fair_share
 
 # ---------- Config ----------
-DB_PATH = Path("news.db").absolute()
+DB_PATH = Path(os.environ.get("NEWS_DB_PATH") or "news.db").absolute()
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "dev"  # cambia en prod
 db = SQLAlchemy(app)
 
+def _default_url_hash(context):
+    """Valor por defecto de url_hash: también aplica a inserts masivos (Core)"""
+    return url_hash(context.get_current_parameters()["url"])
+
 # ---------- Modelos ----------
 class Link(db.Model):
     __tablename__ = "links"
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(1000), nullable=False, unique=True)
+    url = db.Column(db.String(1000), nullable=False)
+    # Hash de la URL canónica: clave única de deduplicación
+    url_hash = db.Column(db.String(32), unique=True, index=True, default=_default_url_hash)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # Opcional: tabla artículos "enriquecida"
 class Article(db.Model):
     __tablename__ = "articles"
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(1000), nullable=False, unique=True)
+    url = db.Column(db.String(1000), nullable=False)
+    # Hash de la URL canónica: clave única de deduplicación
+    url_hash = db.Column(db.String(32), unique=True, index=True, default=_default_url_hash)
     title = db.Column(db.String(1000))
     date_iso = db.Column(db.String(32))
     summary = db.Column(db.Text)
@@ -43,8 +70,224 @@ class Article(db.Model):
     # NUEVO: favorito
     is_favorite = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Enriquecimiento en segundo plano: NULL = falta descargar la página
+    enriched_at = db.Column(db.DateTime)
+    enrich_attempts = db.Column(db.Integer, default=0)
+    enrich_claimed_until = db.Column(db.DateTime)  # reclamado por un proceso hasta esta hora
+    # Historia (casi duplicados de varias fuentes): id del primer artículo del grupo
+    cluster_id = db.Column(db.Integer, index=True)
+    minhash = db.Column(db.LargeBinary)  # firma MinHash de título + resumen (clustering.py)
+    # Versión de la entrada del feed: si cambia, el artículo se actualiza (feed_content.py)
+    content_hash = db.Column(db.String(32))
+    entry_updated = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Índice parcial: solo los pendientes de enriquecer
+        db.Index("ix_articles_pending_enrichment", "enrich_attempts", "id",
+                 sqlite_where=db.text("enriched_at IS NULL")),
+    )
+
+# Temas de cada artículo (clasificados al ingerir): la clave primaria
+# (topic, article_id) es el índice con el que se filtra por tema
+class ArticleTopic(db.Model):
+    __tablename__ = "article_topics"
+    topic = db.Column(db.String(50), primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey("articles.id"), primary_key=True, index=True)
+    hits = db.Column(db.Integer, default=1)
+
+# Índice LSH de historias: una fila por banda de la firma MinHash de cada
+# artículo; los artículos con una clave igual son candidatos a la misma historia
+class StoryBand(db.Model):
+    __tablename__ = "story_bands"
+    band_key = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    article_id = db.Column(db.Integer, db.ForeignKey("articles.id"), primary_key=True, index=True)
+
+# Estado HTTP de cada feed (validadores para GET condicional)
+class FeedState(db.Model):
+    __tablename__ = "feed_state"
+    source = db.Column(db.String(100), primary_key=True)
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    checked_at = db.Column(db.DateTime)
+    not_modified_count = db.Column(db.Integer, default=0)
+    # Sondeo adaptativo (scheduler): ritmo de publicación y próxima lectura
+    publish_rate = db.Column(db.Float)  # artículos por hora
+    poll_interval = db.Column(db.Integer)  # segundos
+    next_poll_at = db.Column(db.DateTime, index=True)
+    # Marca de agua: entrada más reciente ya vista (ver watermark.py)
+    last_entry_id = db.Column(db.String(500))
+    last_entry_at = db.Column(db.DateTime)
+    polls_since_rescan = db.Column(db.Integer, default=0)
+    # Hub WebSub anunciado por el feed (None = solo sondeo)
+    hub_url = db.Column(db.String(1000))
+    topic_url = db.Column(db.String(1000))
+
+# Suscripción WebSub de cada fuente (ver websub.py). Estados: pending,
+# active, unsubscribing, unsubscribed, denied, failed
+class WebSubSubscription(db.Model):
+    __tablename__ = "websub_subscriptions"
+    source = db.Column(db.String(100), primary_key=True)
+    hub = db.Column(db.String(1000), nullable=False)
+    topic = db.Column(db.String(1000), nullable=False)
+    secret = db.Column(db.String(128))
+    state = db.Column(db.String(20), default="pending")
+    requested_at = db.Column(db.DateTime)
+    verified_at = db.Column(db.DateTime)
+    lease_seconds = db.Column(db.Integer)
+    expires_at = db.Column(db.DateTime)
+    last_push_at = db.Column(db.DateTime)
+    pushes = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.String(500))
+
+# Registro de fuentes RSS (ver sources.py). La versión de source_registry
+# sube con cada cambio para que los demás procesos recarguen su copia
+class Source(db.Model):
+    __tablename__ = "sources"
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    url = db.Column(db.String(1000), unique=True, nullable=False)
+    language = db.Column(db.String(10), default="es")
+    website = db.Column(db.String(1000))
+    region = db.Column(db.String(100))
+    category = db.Column(db.String(100))
+    enabled = db.Column(db.Boolean, default=True, index=True)
+    priority = db.Column(db.Integer, default=10)  # 1 = la más prioritaria
+    max_articles = db.Column(db.Integer, default=10)
+    update_interval = db.Column(db.Integer, default=300)  # intervalo inicial de sondeo (segundos)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SourceRegistryVersion(db.Model):
+    __tablename__ = "source_registry"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# Salud de cada fuente (latencia, tasa de error y circuit breaker, ver health.py)
+class SourceHealth(db.Model):
+    __tablename__ = "source_health"
+    source = db.Column(db.String(100), primary_key=True)
+    latency = db.Column(db.Float)  # segundos (media móvil de las lecturas correctas)
+    error_rate = db.Column(db.Float)  # 0..1 (media móvil)
+    consecutive_failures = db.Column(db.Integer, default=0)
+    checks = db.Column(db.Integer, default=0)
+    last_success = db.Column(db.DateTime)
+    last_failure = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+    open_until = db.Column(db.DateTime)  # circuito abierto (fuente en pausa) hasta esta fecha
+
+# Schedulers vivos y concesiones de cada partición de fuentes (ver leases.py)
+class SchedulerWorker(db.Model):
+    __tablename__ = "scheduler_workers"
+    id = db.Column(db.String(200), primary_key=True)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime, index=True)
+
+class ShardLease(db.Model):
+    __tablename__ = "scheduler_leases"
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    owner = db.Column(db.String(200), index=True)  # None = libre
+    acquired_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+
+def _topic_rows(article_id, temas):
+    return [{"topic": t, "article_id": article_id, "hits": n} for t, n in temas.items()]
+
+def backfill_topics(batch_size=5000):
+    """Clasifica todos los artículos existentes (una pasada lineal) y llena article_topics"""
+    db.session.query(ArticleTopic).delete()
+    rows = []
+    total = 0
+    for article_id, title, summary in db.session.query(Article.id, Article.title, Article.summary).yield_per(batch_size):
+        rows.extend(_topic_rows(article_id, classify(title, summary)))
+        total += 1
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(db.insert(ArticleTopic), rows[start:start + batch_size])
+    db.session.commit()
+    return total
+
+def _assign_clusters(articles):
+    """
+    Asigna la historia (cluster_id) de artículos recién insertados o
+    actualizados (sin bandas guardadas), dados como [(id, título, resumen,
+    created_at)]. Los candidatos son los
+    artículos de las últimas CLUSTER_WINDOW_HOURS con alguna banda LSH igual;
+    el artículo se une a la historia del más parecido si supera
+    CLUSTER_THRESHOLD y, si no, abre la suya (cluster_id = id).
+    No hace commit: va en la transacción del insert o del update.
+    """
+    window = timedelta(hours=Config.CLUSTER_WINDOW_HOURS)
+    batch = {}  # band_key -> [(id, cluster_id, firma)] del propio lote
+    updates = []
+    bands = []
+    for article_id, title, summary, created_at in articles:
+        sig = clustering.signature(title, summary)
+        keys = clustering.band_keys(sig)
+        candidates = {}
+        if keys:
+            rows = db.session.query(Article.id, Article.cluster_id, Article.minhash).join(
+                StoryBand, StoryBand.article_id == Article.id
+            ).filter(StoryBand.band_key.in_(keys), Article.created_at >= (created_at or datetime.utcnow()) - window)
+            for other_id, other_cluster, other_sig in rows:
+                candidates[other_id] = (other_cluster or other_id, other_sig)
+            for key in keys:
+                for other_id, other_cluster, other_sig in batch.get(key, ()):
+                    candidates[other_id] = (other_cluster, other_sig)
+        
+        cluster_id, best = article_id, 0.0
+        for other_cluster, other_sig in candidates.values():
+            sim = clustering.similarity(sig, other_sig)
+            if sim >= Config.CLUSTER_THRESHOLD and sim > best:
+                cluster_id, best = other_cluster, sim
+        
+        updates.append({"id": article_id, "cluster_id": cluster_id, "minhash": sig})
+        for key in keys:
+            bands.append({"band_key": key, "article_id": article_id})
+            batch.setdefault(key, []).append((article_id, cluster_id, sig))
+    if updates:
+        db.session.execute(db.update(Article), updates)
+    if bands:
+        db.session.execute(db.insert(StoryBand), bands)
+
+def backfill_clusters(batch_size=1000):
+    """Agrupa los artículos existentes en orden de llegada (el primero de cada historia da el id)"""
+    db.session.query(StoryBand).delete()
+    pending = db.session.query(Article.id, Article.title, Article.summary, Article.created_at).order_by(Article.id).all()
+    for start in range(0, len(pending), batch_size):
+        _assign_clusters(pending[start:start + batch_size])
+        db.session.flush()
+    db.session.commit()
+    return len(pending)
+
+def _repoint_followers(article_ids):
+    """
+    Los artículos de `article_ids` dejan su historia (se borran o se
+    re-agrupan): las historias que encabezaban pasan a su miembro más
+    antiguo que se queda, para que collapse y cluster_sizes no apunten a una
+    fila que ya no existe o a otra historia. No hace commit.
+    """
+    leaving = set(article_ids)
+    if not leaving:
+        return
+    rows = db.session.query(Article.cluster_id, db.func.min(Article.id)).filter(
+        Article.cluster_id.in_(leaving), Article.id.notin_(leaving)
+    ).group_by(Article.cluster_id).all()
+    for old_head, new_head in rows:
+        db.session.execute(db.update(Article).where(
+            Article.cluster_id == old_head, Article.id.notin_(leaving)
+        ).values(cluster_id=new_head).execution_options(synchronize_session=False))
+
+def delete_article_rows(article_ids):
+    """
+    Borra las filas auxiliares (temas e índice de historias) de unos artículos
+    y re-apunta las historias que encabezaban. No hace commit
+    """
+    _repoint_followers(article_ids)
+    ArticleTopic.query.filter(ArticleTopic.article_id.in_(article_ids)).delete(synchronize_session=False)
+    StoryBand.query.filter(StoryBand.article_id.in_(article_ids)).delete(synchronize_session=False)
 
 with app.app_context():
+    had_topics = db.inspect(db.engine).has_table("article_topics")
     db.create_all()
     # mini-migración para SQLite: agrega columnas si faltan
     try:
@@ -62,16 +305,111 @@ with app.app_context():
             db.session.execute(text("ALTER TABLE articles ADD COLUMN is_favorite BOOLEAN DEFAULT 0"))
             db.session.commit()
             print("✅ Columna is_favorite agregada a la tabla articles")
+        if "enriched_at" not in cols:
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN enriched_at DATETIME"))
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN enrich_attempts INTEGER DEFAULT 0"))
+            # Los artículos que ya tienen contenido no se vuelven a descargar
+            db.session.execute(text("UPDATE articles SET enriched_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE content_long IS NOT NULL"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_pending_enrichment ON articles (enrich_attempts, id) WHERE enriched_at IS NULL"))
+            db.session.commit()
+            print("✅ Columnas enriched_at y enrich_attempts agregadas a la tabla articles")
+        if "cluster_id" not in cols:
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN cluster_id INTEGER"))
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN minhash BLOB"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_cluster_id ON articles (cluster_id)"))
+            db.session.commit()
+            total = backfill_clusters()
+            print(f"✅ Columnas cluster_id y minhash agregadas a la tabla articles ({total} artículos agrupados)")
+        if "content_hash" not in cols:
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN content_hash VARCHAR(32)"))
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN entry_updated DATETIME"))
+            db.session.commit()
+            # Sin backfill: el hash se guarda la próxima vez que la entrada aparezca en su feed
+            print("✅ Columnas content_hash y entry_updated agregadas a la tabla articles")
+        if "enrich_claimed_until" not in cols:
+            db.session.execute(text("ALTER TABLE articles ADD COLUMN enrich_claimed_until DATETIME"))
+            db.session.commit()
+            print("✅ Columna enrich_claimed_until agregada a la tabla articles")
+        cols = [r[1] for r in db.session.execute(text("PRAGMA table_info(feed_state)")).fetchall()]
+        if "next_poll_at" not in cols:
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN publish_rate FLOAT"))
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN poll_interval INTEGER"))
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN next_poll_at DATETIME"))
+            db.session.commit()
+            print("✅ Columnas de sondeo adaptativo agregadas a la tabla feed_state")
+        if "last_entry_id" not in cols:
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN last_entry_id VARCHAR(500)"))
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN last_entry_at DATETIME"))
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN polls_since_rescan INTEGER DEFAULT 0"))
+            db.session.commit()
+            print("✅ Columnas de marca de agua agregadas a la tabla feed_state")
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_feed_state_next_poll_at ON feed_state (next_poll_at)"))
+        db.session.commit()
+        if "hub_url" not in cols:
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN hub_url VARCHAR(1000)"))
+            db.session.execute(text("ALTER TABLE feed_state ADD COLUMN topic_url VARCHAR(1000)"))
+            db.session.commit()
+            print("✅ Columnas de WebSub agregadas a la tabla feed_state")
+        for table in ("articles", "links"):
+            cols = [r[1] for r in db.session.execute(text(f"PRAGMA table_info({table})")).fetchall()]
+            if "url_hash" not in cols:
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN url_hash VARCHAR(32)"))
+                rows = db.session.execute(text(f"SELECT id, url FROM {table}")).fetchall()
+                if rows:
+                    db.session.execute(text(f"UPDATE {table} SET url_hash = :h WHERE id = :id"),
+                                       [{"h": url_hash(u), "id": i} for i, u in rows])
+                db.session.commit()
+                try:
+                    db.session.execute(text(f"CREATE UNIQUE INDEX ix_{table}_url_hash ON {table} (url_hash)"))
+                except Exception:
+                    # Ya hay URLs canónicamente duplicadas: índice no único
+                    db.session.rollback()
+                    db.session.execute(text(f"CREATE INDEX ix_{table}_url_hash ON {table} (url_hash)"))
+                    print(f"⚠️ {table} tiene URLs duplicadas; índice url_hash creado sin UNIQUE")
+                db.session.commit()
+                print(f"✅ Columna url_hash agregada a la tabla {table}")
+        if not had_topics:
+            total = backfill_topics()
+            print(f"✅ Tabla article_topics creada ({total} artículos clasificados)")
     except Exception as e:
         db.session.rollback()
         print(f"⚠️ Error en migración: {e}")
 
+def filter_by_topic(query, topic):
+    """Filtra una consulta de Article por tema usando el índice de article_topics"""
+    if topic and topic != "all":
+        query = query.join(ArticleTopic, ArticleTopic.article_id == Article.id).filter(ArticleTopic.topic == topic)
+    return query
+
+def collapse_duplicates(query, collapse=True):
+    """
+    Una fila por historia: de cada grupo de casi duplicados que cumple los
+    filtros de `query` queda el artículo más reciente.
+    """
+    if not collapse:
+        return query
+    story = db.func.coalesce(Article.cluster_id, Article.id)
+    latest = query.with_entities(db.func.max(Article.id)).order_by(None).group_by(story)
+    return query.filter(Article.id.in_(latest))
+
+def cluster_sizes(articles):
+    """Número de artículos de la historia de cada artículo: {cluster: total}"""
+    keys = {a.cluster_id or a.id for a in articles}
+    if not keys:
+        return {}
+    story = db.func.coalesce(Article.cluster_id, Article.id)
+    return dict(db.session.query(story, db.func.count(Article.id)).filter(
+        db.or_(Article.cluster_id.in_(keys), Article.id.in_(keys))
+    ).group_by(story))
+
 # ---------- Rutas ----------
 @app.get("/")
 def index():
+    topic = request.args.get('topic', '')
+    collapse = request.args.get('collapse') == '1'
     # Últimos guardados (para ver que funciona)
     recent_links = Link.query.order_by(Link.created_at.desc()).limit(10).all()
-    recent_articles = Article.query.order_by(Article.created_at.desc()).all()  # Mostrar todos los artículos
+    recent_articles = collapse_duplicates(filter_by_topic(Article.query, topic), collapse).order_by(Article.created_at.desc()).all()  # Mostrar todos los artículos
     
     # Estadísticas para el dashboard
     stats = {
@@ -84,7 +422,8 @@ def index():
         'top_sections': db.session.query(Article.section, db.func.count(Article.id)).filter(Article.section.isnot(None)).group_by(Article.section).order_by(db.func.count(Article.id).desc()).limit(5).all()
     }
     
-    return render_template("index.html", recent_links=recent_links, recent_articles=recent_articles, rss_sources=RSS_SOURCES, stats=stats)
+    return render_template("index.html", recent_links=recent_links, recent_articles=recent_articles, rss_sources=RSS_SOURCES, stats=stats, topic=topic,
+                           collapse=collapse, story_sizes=cluster_sizes(recent_articles) if collapse else {})
 
 @app.post("/add-link")
 def add_link():
@@ -96,8 +435,9 @@ def add_link():
     # MODO A: guardar solo el link
     if request.form.get("modo") == "simple":
         try:
-            if not Link.query.filter_by(url=url).first():
-                db.session.add(Link(url=url))
+            h = url_hash(url)
+            if not Link.query.filter_by(url_hash=h).first():
+                db.session.add(Link(url=url, url_hash=h))
                 db.session.commit()
             flash("¡Link guardado!", "ok")
         except Exception as e:
@@ -108,65 +448,39 @@ def add_link():
     # MODO B: enriquecer y guardar (BBC Mundo)
     # si quieres que *solo* BBC se acepte, puedes validar `if "bbc.com/mundo" not in url: ...`
     try:
-        from bs4 import BeautifulSoup
-        import requests, dateparser
-
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=20)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        # La página queda en la caché en disco: re-enriquecer no vuelve a descargarla
+        r = download_page(url, timeout=20, use_cache=True)
+        page = extract(r.content, r.headers.get("Content-Type"))
 
         # Título
-        title = soup.title.get_text(" ", strip=True) if soup.title else None
+        title = page["title"]
         # Fecha desde meta si existe
-        date_meta = (soup.find("meta", {"property": "article:published_time"}) or
-                     soup.find("meta", {"name": "date"}))
         date_iso = None
-        if date_meta and date_meta.get("content"):
-            dt = dateparser.parse(date_meta["content"])
+        if page["date"]:
+            dt = parse_date(page["date"])
             if dt: date_iso = dt.strftime("%Y-%m-%dT%H:%M:%S")
 
         # Resumen (fallback: primeros párrafos)
-        desc_meta = (soup.find("meta", {"name": "description"}) or
-                     soup.find("meta", {"property": "og:description"}))
-        summary = desc_meta.get("content").strip() if desc_meta and desc_meta.get("content") else None
-        if not summary:
-            ps = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-            ps = [t for t in ps if len(t) > 30]
-            if ps:
-                summary = " ".join(ps[:4])
+        summary = page["description"]
+        if not summary and page["paragraphs"]:
+            summary = " ".join(page["paragraphs"][:4])
 
         # Contenido extendido (primeros ~12 párrafos)
-        ps = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-        ps = [t for t in ps if len(t) > 30]
-        content_long = " ".join(ps[:12]) if ps else None
-
-        # Autor/sección si existen (búsqueda más exhaustiva)
-        author = None
-        author_meta = (soup.find("meta", {"name": "author"}) or
-                      soup.find("meta", {"property": "article:author"}) or
-                      soup.find("meta", {"name": "twitter:creator"}))
-        if author_meta and author_meta.get("content"):
-            author = author_meta["content"].strip()
-        
-        section = None
-        section_meta = (soup.find("meta", {"property": "article:section"}) or
-                       soup.find("meta", {"name": "section"}) or
-                       soup.find("meta", {"property": "og:section"}))
-        if section_meta and section_meta.get("content"):
-            section = section_meta["content"].strip()
-
-        if not Article.query.filter_by(url=url).first():
-            db.session.add(Article(
-                url=url,
-                title=title,
-                date_iso=date_iso,
-                summary=summary,
-                author=author,
-                section=section,
-                content_long=content_long,
-            ))
-        db.session.commit()
+        content_long = " ".join(page["paragraphs"][:12]) if page["paragraphs"] else None
+
+        # Autor/sección si existen
+        author = page["author"]
+        section = page["section"]
+
+        insert_articles([{
+            "url": url,
+            "title": title,
+            "date_iso": date_iso,
+            "summary": summary,
+            "author": author,
+            "section": section,
+            "content_long": content_long,
+        }])
         flash("¡Artículo guardado/enriquecido!", "ok")
     except Exception as e:
         db.session.rollback()
@@ -175,7 +489,9 @@ def add_link():
     return redirect(url_for("index"))
 
 # ---------- Fuentes RSS configuradas ----------
-RSS_SOURCES = {
+# Fuentes iniciales: solo siembran la tabla sources la primera vez. Después
+# se gestionan en la base de datos (/api/sources, importación OPML)
+DEFAULT_SOURCES = {
     # 🌍 INTERNACIONALES
     "bbc_mundo": {
         "name": "BBC Mundo",
@@ -303,73 +619,272 @@ RSS_SOURCES = {
     }
 }
 
-# ---------- Función auxiliar para actualizar noticias ----------
-def fetch_articles_from_source(source_key, limit=10, days_back=None, topic_filter=None):
+SOURCE_FIELDS = ("name", "url", "language", "website", "region", "category",
+                 "enabled", "priority", "max_articles", "update_interval")
+_INT_FIELDS = ("priority", "max_articles", "update_interval")
+
+def _in_app_context(fn):
+    if has_app_context():
+        return fn()
+    with app.app_context():
+        return fn()
+
+def _load_registry_version():
+    return _in_app_context(lambda: db.session.query(SourceRegistryVersion.version).filter_by(id=1).scalar() or 0)
+
+def _load_sources():
+    def load():
+        return {src.key: {field: getattr(src, field) for field in SOURCE_FIELDS}
+                for src in Source.query.order_by(Source.id)}
+    return _in_app_context(load)
+
+# Fuentes RSS por clave (se lee como un dict y se recarga sola al cambiar el registro)
+RSS_SOURCES = SourceRegistry(_load_registry_version, _load_sources)
+
+def _bump_registry_version():
+    """Sube la versión del registro en la transacción actual (no hace commit)"""
+    updated = db.session.query(SourceRegistryVersion).filter_by(id=1).update(
+        {"version": SourceRegistryVersion.version + 1}, synchronize_session=False)
+    if not updated:
+        db.session.add(SourceRegistryVersion(id=1, version=1))
+
+def _clean_source_fields(data):
+    """Campos válidos de una fuente, con los enteros y booleanos convertidos (p. ej. desde un formulario)"""
+    clean = {}
+    for field in SOURCE_FIELDS:
+        value = data.get(field)
+        if value is None or value == "":
+            continue
+        if field in _INT_FIELDS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} debe ser un número entero")
+        elif field == "enabled" and isinstance(value, str):
+            value = value.lower() in ("true", "on", "1")
+        clean[field] = value
+    return clean
+
+def save_source(data):
     """
-    Obtiene artículos de una fuente RSS específica
-    
-    Args:
-        source_key: Clave de la fuente en RSS_SOURCES
-        limit: Número máximo de artículos a procesar
-        days_back: Solo procesar artículos de los últimos N días (None = todos)
-        topic_filter: Filtrar por tema específico (None = todos)
+    Crea o actualiza una fuente del registro (por su clave "key"; sin clave,
+    o con una que no existe, se crea con una clave derivada del nombre).
+    Retorna la clave de la fuente.
     """
-    if source_key not in RSS_SOURCES:
-        raise ValueError(f"Fuente no válida: {source_key}")
+    fields = _clean_source_fields(data)
+    source = Source.query.filter_by(key=data.get("key")).first() if data.get("key") else None
+    if source is None:
+        if not fields.get("url"):
+            raise ValueError("La fuente necesita una url")
+        if Source.query.filter_by(url=fields["url"]).first():
+            raise ValueError(f"Ya hay una fuente con la URL {fields['url']}")
+        taken = {k for (k,) in db.session.query(Source.key)}
+        source = Source(key=make_key(data.get("key") or fields.get("name") or fields["url"], taken),
+                        language="es", **DEFAULT_SETTINGS)
+    for field, value in fields.items():
+        setattr(source, field, value)
+    source.name = source.name or source.url
+    source.updated_at = datetime.utcnow()
+    try:
+        db.session.add(source)
+        _bump_registry_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    RSS_SOURCES.invalidate()
+    return source.key
+
+def delete_source(key):
+    """Quita una fuente del registro con su estado de lectura (sus artículos se conservan)"""
+    source = Source.query.filter_by(key=key).first()
+    if source is None:
+        return False
+    try:
+        for model in (FeedState, SourceHealth, WebSubSubscription):
+            model.query.filter_by(source=key).delete(synchronize_session=False)
+        db.session.delete(source)
+        _bump_registry_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    RSS_SOURCES.invalidate()
+    return True
+
+def import_opml_sources(content):
+    """
+    Añade al registro las fuentes de un OPML en un solo INSERT; las URLs que
+    ya están registradas se saltan. Retorna {"added", "skipped", "keys"}.
+    """
+    feeds = parse_opml(content)
+    urls = {u for (u,) in db.session.query(Source.url)}
+    taken = {k for (k,) in db.session.query(Source.key)}
+    ahora = datetime.utcnow()
+    rows = []
+    for feed in feeds:
+        if feed["url"] in urls:
+            continue
+        urls.add(feed["url"])
+        key = make_key(feed["name"], taken)
+        taken.add(key)
+        fields = {k: v for k, v in feed.items() if v is not None}
+        rows.append({**DEFAULT_SETTINGS, **fields, "key": key, "created_at": ahora, "updated_at": ahora})
+    if rows:
+        try:
+            db.session.execute(db.insert(Source), rows)
+            _bump_registry_version()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        RSS_SOURCES.invalidate()
+    return {"added": len(rows), "skipped": len(feeds) - len(rows), "keys": [r["key"] for r in rows]}
+
+def seed_sources():
+    """Crea el registro con DEFAULT_SOURCES y los ajustes de RSS_SOURCES_ADVANCED si la tabla está vacía"""
+    if Source.query.first() is not None:
+        return 0
+    ahora = datetime.utcnow()
+    rows = []
+    for key in list(DEFAULT_SOURCES) + [k for k in RSS_SOURCES_ADVANCED if k not in DEFAULT_SOURCES]:
+        merged = {**DEFAULT_SOURCES.get(key, {}), **RSS_SOURCES_ADVANCED.get(key, {})}
+        rows.append({**DEFAULT_SETTINGS, **_clean_source_fields(merged), "key": key,
+                     "created_at": ahora, "updated_at": ahora})
+    db.session.execute(db.insert(Source), rows)
+    _bump_registry_version()
+    db.session.commit()
+    return len(rows)
+
+def seed_leases():
+    """
+    Crea las filas de scheduler_leases que falten (una por partición, libres)
+    y borra las que sobran si se redujo SCHEDULER_SHARDS
+    """
+    shards = Config.SCHEDULER_SHARDS
+    have = {shard for (shard,) in db.session.query(ShardLease.shard)}
+    missing = [{"shard": shard} for shard in range(shards) if shard not in have]
+    if missing:
+        db.session.execute(db.insert(ShardLease).prefix_with("OR IGNORE"), missing)
+    if any(shard >= shards for shard in have):
+        ShardLease.query.filter(ShardLease.shard >= shards).delete(synchronize_session=False)
+    db.session.commit()
+    return len(missing)
+
+with app.app_context():
+    try:
+        seeded = seed_sources()
+        if seeded:
+            print(f"✅ Registro de fuentes creado ({seeded} fuentes)")
+        seed_leases()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Error creando el registro de fuentes: {e}")
+
+# ---------- Funciones auxiliares para actualizar noticias ----------
+# Hashes de URL ya guardados, compartidos entre ejecuciones del proceso
+KNOWN_URLS = KnownUrlFilter()
+
+def _filter_known_urls(hashes):
+    """
+    Retorna el subconjunto de `hashes` (url_hash) que ya existe como artículo.
+    Consulta primero el filtro en memoria y resuelve el resto con una sola
+    consulta a la base de datos.
+    """
+    known = {h for h in hashes if h in KNOWN_URLS}
+    unknown = [h for h in hashes if h not in known]
+    if unknown:
+        existing = {h for (h,) in db.session.query(Article.url_hash).filter(Article.url_hash.in_(unknown))}
+        KNOWN_URLS.add_many(existing)
+        known |= existing
+    return known
+
+def _plan_entries(source_key, feed, limit=10, days_back=None, topic_filter=None, watermark=None):
+    """
+    Selecciona las entradas nuevas de un feed ya parseado y extrae los datos
+    disponibles desde el RSS. Retorna una lista de dicts candidatos; los que
+    traen el contenido completo en el feed salen ya enriquecidos (enriched_at)
+    y no se descarga su página.
+    
+    Las entradas ya guardadas cuyo contenido cambió (hash o `updated`)
+    vuelven como candidatos con "article_id" para actualizarse en su sitio;
+    las que no cambiaron se saltan sin descargar nada. Se comparan todas las
+    entradas conocidas ya leídas del feed, también las que quedan por debajo
+    de la marca de agua (con la misma consulta en lote y sin red); las que el
+    feed no llegó a leer (la descarga se corta en la marca) se comparan en
+    los recorridos completos.
     
-    source = RSS_SOURCES[source_key]
-    feed_url = source["url"]
-    language = source["language"]
+    Los artículos guardados antes de existir content_hash no tienen versión
+    con la que comparar: la primera vez que reaparecen se anota el hash de
+    la entrada tal como está entonces, sin actualizarlos, así que una
+    corrección publicada antes de esa lectura no se aplica.
     
-    feed = feedparser.parse(feed_url)
-    nuevos = 0
+    watermark: dict {"entry_id", "entry_at", "rescan"} de la última lectura;
+    si se indica, solo las entradas por encima de la marca pueden ser nuevas.
+    """
+    language = RSS_SOURCES[source_key]["language"]
+    candidatos = []
     
     # Calcular fecha límite si se especifica days_back
     fecha_limite = None
     if days_back:
-        from datetime import datetime, timedelta
         fecha_limite = datetime.utcnow() - timedelta(days=days_back)
 
-    # Palabras clave para cada tema
-    topic_keywords = {
-        'economia': ['economía', 'económico', 'finanzas', 'dinero', 'inversión', 'mercado', 'bolsa', 'inflación', 'pib', 'desempleo', 'salario', 'presupuesto'],
-        'politica': ['política', 'político', 'gobierno', 'presidente', 'ministro', 'congreso', 'senado', 'elecciones', 'votación', 'partido', 'democracia'],
-        'salud': ['salud', 'médico', 'hospital', 'enfermedad', 'vacuna', 'covid', 'pandemia', 'tratamiento', 'medicina', 'cirugía', 'doctor'],
-        'tecnologia': ['tecnología', 'tecnológico', 'digital', 'internet', 'software', 'hardware', 'aplicación', 'app', 'smartphone', 'computadora', 'inteligencia artificial'],
-        'deportes': ['deporte', 'deportivo', 'fútbol', 'futbol', 'baloncesto', 'tenis', 'olímpico', 'mundial', 'campeonato', 'liga', 'equipo'],
-        'cultura': ['cultura', 'cultural', 'arte', 'música', 'cine', 'película', 'libro', 'literatura', 'teatro', 'exposición', 'festival'],
-        'internacional': ['internacional', 'mundial', 'global', 'país', 'nación', 'extranjero', 'diplomacia', 'onu', 'naciones unidas'],
-        'nacional': ['nacional', 'local', 'región', 'ciudad', 'municipal', 'provincial', 'estatal'],
-        'ciencia': ['ciencia', 'científico', 'investigación', 'estudio', 'descubrimiento', 'laboratorio', 'universidad', 'académico'],
-        'medio_ambiente': ['medio ambiente', 'ambiental', 'clima', 'cambio climático', 'contaminación', 'sostenible', 'ecológico', 'naturaleza']
-    }
-
-    for entry in feed.entries[:limit]:
+    # En streaming: solo se parsean las entradas hasta `limit` o hasta la marca de agua
+    entries = islice(iter_entries(feed), limit)
+    if watermark:
+        entries = select_entries(entries, watermark["entry_id"], watermark["entry_at"], watermark["rescan"],
+                                 date_of=lambda e: entry_date(e, [language]))
+    else:
+        entries = list(entries)
+    # Las ya leídas que la marca descarta solo se miran si están guardadas, por si cambiaron
+    seleccionadas = {id(e) for e in entries}
+    debajo = [e for e in islice(seen_entries(feed), limit) if id(e) not in seleccionadas]
+    
+    # Evitar duplicados (por URL canónica): una sola consulta por feed, antes de parsear nada
+    hashes = {e.get("link"): url_hash(e.get("link")) for e in entries + debajo if e.get("link")}
+    conocidos = _filter_known_urls(set(hashes.values()))
+    # Versión guardada de las ya conocidas (otra consulta, solo si hay alguna)
+    guardados = _stored_versions(conocidos) if conocidos else {}
+    debajo = [e for e in debajo if e.get("link") and hashes[e.get("link")] in guardados]
+    vistos = set()
+    sin_hash = []  # artículos de antes de guardar el hash: se anota sin actualizarlos
+    
+    for entry in entries + debajo:
         url = entry.get("link")
-        if not url or Article.query.filter_by(url=url).first():
+        if not url or hashes[url] in vistos:
             continue  # evitar duplicados
+        vistos.add(hashes[url])
 
         titulo = entry.get("title")
+        resumen = html_to_text(entry.get("summary", ""))
+        version = content_hash(titulo, resumen, raw_content(entry))
+        actualizada = entry_updated(entry, [language])
+        guardado = guardados.get(hashes[url])
+        if hashes[url] in conocidos:
+            if guardado is None:
+                # Falso positivo del filtro en memoria (artículo borrado desde otro proceso): es nueva
+                KNOWN_URLS.discard_many([hashes[url]])
+            elif guardado["content_hash"] is None:
+                sin_hash.append({"id": guardado["id"], "content_hash": version, "entry_updated": actualizada})
+                continue
+            elif not entry_changed(guardado["content_hash"], guardado["entry_updated"], version, actualizada):
+                continue  # ya guardada y sin cambios
         
-        # Extraer fecha con múltiples formatos
-        fecha = entry.get("published") or entry.get("pubDate") or entry.get("updated")
+        # Extraer fecha: struct_time de feedparser, RFC 822 / ISO 8601 y, como último recurso, dateparser
         fecha_iso = None
-        fecha_dt = None
-        if fecha:
-            fecha_dt = dateparser.parse(fecha, languages=[language])
-            if fecha_dt:
-                fecha_iso = fecha_dt.strftime("%Y-%m-%dT%H:%M:%S")
+        fecha_dt = entry_date(entry, [language])
+        if fecha_dt:
+            fecha_iso = fecha_dt.strftime("%Y-%m-%dT%H:%M:%S")
         
         # Filtrar por fecha si se especifica days_back
         if fecha_limite and fecha_dt and fecha_dt < fecha_limite:
             continue  # Saltar artículos más antiguos que la fecha límite
         
-        # Filtrar por tema si se especifica
-        if topic_filter and topic_filter != "all":
-            texto_completo = f"{titulo or ''} {entry.get('summary', '')}".lower()
-            keywords = topic_keywords.get(topic_filter, [])
-            if not any(keyword.lower() in texto_completo for keyword in keywords):
-                continue  # Saltar artículos que no coincidan con el tema
+        # Filtrar por tema si se especifica (una sola pasada del clasificador)
+        temas = classify(titulo, resumen)
+        if topic_filter and topic_filter != "all" and topic_filter not in temas:
+            continue  # Saltar artículos que no coincidan con el tema
         
         # Extraer autor
         autor = None
@@ -384,77 +899,588 @@ def fetch_articles_from_source(source_key, limit=10, days_back=None, topic_filte
             seccion = entry.tags[0].term if entry.tags else None
         elif hasattr(entry, 'category') and entry.category:
             seccion = entry.category
+        
+        # Contenido completo en el feed (content:encoded / <content>): sin descargar la página
+        contenido = entry_content(entry, source_key)
+
+        candidato = {
+            "url": url,
+            "url_hash": hashes[url],
+            "title": titulo,
+            "date_iso": fecha_iso,
+            "summary": resumen,
+            "author": autor,
+            "section": seccion,
+            "content_long": contenido,
+            "enriched_at": datetime.utcnow() if contenido else None,
+            "topics": temas,
+            "content_hash": version,
+            "entry_updated": actualizada,
+        }
+        if guardado is not None:
+            # Entrada corregida: se actualiza el artículo, conservando lo que el feed no trae
+            candidato["article_id"] = guardado["id"]
+            for campo in ("date_iso", "author", "section"):
+                candidato[campo] = candidato[campo] or guardado[campo]
+        candidatos.append(candidato)
+    
+    if sin_hash:
+        _store_content_hashes(sin_hash)
+    return candidatos
 
-        resumen = BeautifulSoup(entry.get("summary", ""), "html.parser").get_text(" ", strip=True)
+def _store_content_hashes(rows):
+    """Anota el hash y `updated` actuales de artículos que aún no los tenían (sin volver a enriquecerlos)"""
+    try:
+        db.session.execute(db.update(Article), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
-        # Intentar extraer contenido extendido y datos adicionales
-        contenido_ext = None
-        try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            r = requests.get(url, headers=headers, timeout=15)
-            if r.ok:
-                soup = BeautifulSoup(r.text, "html.parser")
-                
-                # Extraer contenido extendido
-                ps = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-                ps = [p for p in ps if len(p) > 30]
-                if ps:
-                    contenido_ext = " ".join(ps[:10])
-                
-                # Mejorar datos si no están disponibles desde RSS
-                if not fecha_iso:
-                    # Buscar fecha en meta tags
-                    date_meta = (soup.find("meta", {"property": "article:published_time"}) or
-                                soup.find("meta", {"name": "date"}) or
-                                soup.find("meta", {"property": "og:updated_time"}))
-                    if date_meta and date_meta.get("content"):
-                        dt = dateparser.parse(date_meta["content"])
-                        if dt:
-                            fecha_iso = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                
-                if not autor:
-                    # Buscar autor en meta tags
-                    author_meta = (soup.find("meta", {"name": "author"}) or
-                                  soup.find("meta", {"property": "article:author"}) or
-                                  soup.find("meta", {"name": "twitter:creator"}))
-                    if author_meta and author_meta.get("content"):
-                        autor = author_meta["content"].strip()
-                
-                if not seccion:
-                    # Buscar sección en meta tags
-                    section_meta = (soup.find("meta", {"property": "article:section"}) or
-                                   soup.find("meta", {"name": "section"}) or
-                                   soup.find("meta", {"property": "og:section"}))
-                    if section_meta and section_meta.get("content"):
-                        seccion = section_meta["content"].strip()
-                
-            time.sleep(0.5)  # Pequeño delay para evitar sobrecargar el servidor
-        except Exception:
-            pass
+def _stored_versions(hashes):
+    """{url_hash: id, content_hash, entry_updated, date_iso, author, section} de los artículos guardados"""
+    rows = db.session.query(Article.url_hash, Article.id, Article.content_hash, Article.entry_updated,
+                            Article.date_iso, Article.author, Article.section).filter(
+        Article.url_hash.in_(list(hashes)))
+    return {r.url_hash: r._asdict() for r in rows}
 
-        # Procesar cada artículo individualmente para evitar bloqueos
-        try:
-            art = Article(
-                url=url,
-                title=titulo,
-                date_iso=fecha_iso,
-                summary=resumen,
-                author=autor,
-                section=seccion,
-                content_long=contenido_ext,
-                source=source_key,
-                created_at=datetime.utcnow(),
-            )
-            db.session.add(art)
-            db.session.commit()  # Commit individual para cada artículo
-            nuevos += 1
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error guardando artículo {url}: {e}")
+def _enrich_entry(candidato, r):
+    """
+    Completa un candidato con el contenido extendido y metadatos de su página.
+    Se llama desde hilos de trabajo: el parseo corre en el pool de procesos.
+    """
+    page = extract(r.content, r.headers.get("Content-Type"))
+    candidato["enriched_at"] = datetime.utcnow()
+    
+    # Extraer contenido extendido
+    if page["paragraphs"]:
+        candidato["content_long"] = " ".join(page["paragraphs"][:10])
+    
+    # Mejorar datos si no están disponibles desde RSS
+    if not candidato["date_iso"] and page["date"]:
+        dt = parse_date(page["date"])
+        if dt:
+            candidato["date_iso"] = dt.strftime("%Y-%m-%dT%H:%M:%S")
+    
+    if not candidato["author"] and page["author"]:
+        candidato["author"] = page["author"]
+    
+    if not candidato["section"] and page["section"]:
+        candidato["section"] = page["section"]
+
+def insert_articles(rows):
+    """
+    Inserta varios artículos en una sola transacción con
+    INSERT ... ON CONFLICT DO NOTHING: los conflictos de URL los resuelve la
+    base de datos, sin excepciones ni rollbacks por fila. Los temas de cada
+    artículo insertado (article_topics) y su historia de casi duplicados
+    (cluster_id, story_bands) se guardan en la misma transacción.
+    
+    Args:
+        rows: lista de dicts con las columnas de Article (todas con las mismas
+            claves); opcionalmente "topics" ya clasificados ({tema: apariciones})
+    
+    Retorna: lista de (id, url_hash) de las filas realmente insertadas
+    """
+    if not rows:
+        return []
+    temas = {}
+    textos = {}
+    articles = []
+    for row in rows:
+        row = dict(row)
+        row.setdefault("url_hash", url_hash(row["url"]))
+        # Sin contenido extendido queda pendiente para el enriquecimiento en segundo plano
+        row.setdefault("enriched_at", datetime.utcnow() if row.get("content_long") else None)
+        row_topics = row.pop("topics", None)
+        if row_topics is None:
+            row_topics = classify(row.get("title"), row.get("summary"))
+        temas.setdefault(row["url_hash"], row_topics)
+        textos.setdefault(row["url_hash"], (row.get("title"), row.get("summary"), row.get("created_at")))
+        articles.append(row)
+
+    stmt = sqlite_insert(Article).on_conflict_do_nothing().returning(Article.id, Article.url_hash)
+    try:
+        inserted = db.session.execute(stmt, articles).all()
+        topic_rows = [r for article_id, h in inserted for r in _topic_rows(article_id, temas[h])]
+        if topic_rows:
+            db.session.execute(db.insert(ArticleTopic), topic_rows)
+        _assign_clusters([(article_id, *textos[h]) for article_id, h in inserted])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    KNOWN_URLS.add_many(h for _, h in inserted)
+    return inserted
+
+def _save_entries(source_key, candidatos, feed=None, remember_validators=True):
+    """
+    Guarda los candidatos de un feed: los nuevos en una sola transacción y
+    los que cambiaron (con article_id) actualizados en su sitio. Retorna
+    cuántos se insertaron.
+    """
+    ahora = datetime.utcnow()
+    cambiados = [c for c in candidatos if c.get("article_id")]
+    candidatos = [c for c in candidatos if not c.get("article_id")]
+    rows = [{
+        "url": c["url"],
+        "url_hash": c["url_hash"],
+        "title": c["title"],
+        "date_iso": c["date_iso"],
+        "summary": c["summary"],
+        "author": c["author"],
+        "section": c["section"],
+        "content_long": c["content_long"],
+        "source": source_key,
+        "created_at": ahora,
+        "enriched_at": c.get("enriched_at"),
+        "topics": c.get("topics"),
+        "content_hash": c.get("content_hash"),
+        "entry_updated": c.get("entry_updated"),
+    } for c in candidatos]
+    
+    nuevos = len(insert_articles(rows))
+    if cambiados:
+        update_articles(cambiados)
+    
+    if feed is not None:
+        _update_feed_state(source_key, feed, remember_validators)
+    return nuevos
+
+def update_articles(candidatos):
+    """
+    Actualiza en su sitio los artículos cuya entrada cambió en el feed, con
+    sus temas y su historia de casi duplicados (firma, bandas y cluster_id
+    se recalculan con el nuevo texto). Si el nuevo contenido no vino con el
+    candidato (feed o página ya descargada), el artículo vuelve a la cola
+    de enriquecimiento y se olvida su página en caché para descargarla de
+    nuevo.
+    """
+    enriquecidos = [c for c in candidatos if c.get("enriched_at")]
+    pendientes = [c for c in candidatos if not c.get("enriched_at")]
+    base = lambda c: {
+        "id": c["article_id"],
+        "title": c["title"],
+        "date_iso": c["date_iso"],
+        "summary": c["summary"],
+        "author": c["author"],
+        "section": c["section"],
+        "content_hash": c["content_hash"],
+        "entry_updated": c["entry_updated"],
+    }
+    try:
+        # Mismas claves en cada grupo de filas para que se ejecuten en lote
+        if enriquecidos:
+            db.session.execute(db.update(Article), [
+                {**base(c), "content_long": c["content_long"], "enriched_at": c["enriched_at"]} for c in enriquecidos])
+        if pendientes:
+            db.session.execute(db.update(Article), [
+                {**base(c), "enriched_at": None, "enrich_attempts": 0, "enrich_claimed_until": None}
+                for c in pendientes])
+        ids = [c["article_id"] for c in candidatos]
+        ArticleTopic.query.filter(ArticleTopic.article_id.in_(ids)).delete(synchronize_session=False)
+        topic_rows = [r for c in candidatos
+                      for r in _topic_rows(c["article_id"], c.get("topics") or classify(c["title"], c["summary"]))]
+        if topic_rows:
+            db.session.execute(db.insert(ArticleTopic), topic_rows)
+        _repoint_followers(ids)
+        StoryBand.query.filter(StoryBand.article_id.in_(ids)).delete(synchronize_session=False)
+        created = dict(db.session.query(Article.id, Article.created_at).filter(Article.id.in_(ids)))
+        _assign_clusters([(c["article_id"], c["title"], c["summary"], created.get(c["article_id"]))
+                          for c in candidatos])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if pendientes and Config.PAGE_CACHE_ENABLED:
+        cache = get_page_cache()
+        for c in pendientes:
+            cache.discard(c["url"])
+    return len(candidatos)
+
+def _update_feed_state(source_key, feed, remember_validators=True):
+    """
+    Guarda los validadores HTTP y la marca de agua del feed una vez
+    procesadas sus entradas. Con remember_validators=False (p. ej. tras
+    filtrar por tema) no se actualizan, para que la próxima lectura completa
+    no reciba un 304 ni se salte las entradas descartadas.
+    """
+    try:
+        state = db.session.get(FeedState, source_key) or FeedState(source=source_key)
+        state.checked_at = datetime.utcnow()
+        if feed.get("status") == 304:
+            state.not_modified_count = (state.not_modified_count or 0) + 1
+        elif remember_validators:
+            state.etag = feed.get("etag")
+            state.last_modified = feed.get("modified")
+            language = RSS_SOURCES[source_key]["language"]
+            entry_id, entry_at = high_water_mark(seen_entries(feed), lambda e: entry_date(e, [language]))
+            if entry_id:
+                rescanned = needs_rescan(state.last_entry_id, state.polls_since_rescan)
+                state.polls_since_rescan = 0 if rescanned else (state.polls_since_rescan or 0) + 1
+                state.last_entry_id = entry_id
+                state.last_entry_at = entry_at
+            state.hub_url, state.topic_url = websub.discover_hub(feed, RSS_SOURCES[source_key]["url"])
+        db.session.add(state)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error guardando estado del feed {source_key}: {e}")
+
+# ---------- Enriquecimiento en segundo plano ----------
+def _pending_enrichment_query():
+    return Article.query.filter(Article.enriched_at.is_(None),
+                                Article.enrich_attempts < Config.ENRICH_MAX_ATTEMPTS)
+
+def _load_pending_enrichment(limit, now=None):
+    """
+    Reclama un lote de artículos sin contenido extendido (primero los de menos
+    intentos y más nuevos) con un solo UPDATE condicional, como las
+    concesiones: la web y cada scheduler enriquecen en paralelo sin descargar
+    dos veces la misma página. El reclamo caduca a los ENRICH_CLAIM_TTL
+    segundos por si el proceso muere a mitad del lote.
+    """
+    now = now or datetime.utcnow()
+    free = db.or_(Article.enrich_claimed_until.is_(None), Article.enrich_claimed_until < now)
+    batch = _pending_enrichment_query().filter(free).order_by(
+        Article.enrich_attempts, Article.id.desc()).limit(limit).with_entities(Article.id)
+    stmt = db.update(Article).where(Article.id.in_(batch.scalar_subquery()), free).values(
+        enrich_claimed_until=now + timedelta(seconds=Config.ENRICH_CLAIM_TTL)
+    ).returning(Article.id, Article.url, Article.date_iso, Article.author, Article.section,
+                Article.content_long, Article.enrich_attempts).execution_options(synchronize_session=False)
+    try:
+        claimed = db.session.execute(stmt).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [{
+        "id": a.id,
+        "url": a.url,
+        "date_iso": a.date_iso,
+        "author": a.author,
+        "section": a.section,
+        "content_long": a.content_long,
+        "enrich_attempts": a.enrich_attempts or 0,
+    } for a in sorted(claimed, key=lambda a: (a.enrich_attempts or 0, -a.id))]
+
+def _save_enrichment(enriquecidos, fallidos):
+    """
+    Guarda un lote enriquecido en una sola transacción (UPDATE por clave
+    primaria) y libera el reclamo. Los intentos se suman en la base de datos
+    (enrich_attempts + 1), no desde el valor leído al reclamar.
+    """
+    articles = Article.__table__
+    rows = [{
+        "b_id": c["id"],
+        "b_content_long": c["content_long"],
+        "b_date_iso": c["date_iso"],
+        "b_author": c["author"],
+        "b_section": c["section"],
+        "b_enriched_at": c.get("enriched_at") or datetime.utcnow(),
+    } for c in enriquecidos]
+    try:
+        if enriquecidos:
+            db.session.execute(articles.update().where(articles.c.id == bindparam("b_id")).values(
+                content_long=bindparam("b_content_long"),
+                date_iso=bindparam("b_date_iso"),
+                author=bindparam("b_author"),
+                section=bindparam("b_section"),
+                enriched_at=bindparam("b_enriched_at"),
+                enrich_attempts=articles.c.enrich_attempts + 1,
+                enrich_claimed_until=None,
+            ), rows)
+        if fallidos:
+            db.session.execute(articles.update().where(articles.c.id.in_([c["id"] for c in fallidos])).values(
+                enrich_attempts=articles.c.enrich_attempts + 1, enrich_claimed_until=None))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+ENRICHMENT = EnrichmentPipeline(_load_pending_enrichment, _enrich_entry, _save_enrichment,
+                                context=app.app_context)
+
+def enrichment_stats():
+    """Estado del enriquecimiento: pendientes en la base de datos y ritmo del hilo"""
+    stats = ENRICHMENT.stats()
+    stats["backlog"] = _pending_enrichment_query().count()
+    return stats
+
+def fetch_sources(source_keys, limit=10, days_back=None, topic_filter=None, limits=None, deadline=None, engine=None,
+                  enrich_pages=None, force=False):
+    """
+    Obtiene artículos de varias fuentes RSS en paralelo con el motor de ingesta
+    
+    Args:
+        source_keys: Claves de las fuentes en RSS_SOURCES
+        limit: Número máximo de artículos a procesar por fuente
+        days_back: Solo procesar artículos de los últimos N días (None = todos)
+        topic_filter: Filtrar por tema específico (None = todos)
+        limits: dict opcional {source_key: limit} que sobrescribe `limit`
+        deadline: Plazo total en segundos (None = Config.INGEST_DEADLINE)
+        engine: IngestionEngine a usar (para leer luego engine.limiter.stats())
+        enrich_pages: True descarga las páginas antes de guardar; False guarda
+            solo los datos del RSS y deja las páginas al enriquecimiento en
+            segundo plano (None = según Config.ENRICH_IN_BACKGROUND)
+        force: leer también las fuentes con el circuito abierto
+    
+    Retorna: dict {source_key: {"nuevos", "error", "timed_out", "not_modified",
+                                "pages_fetched", "queue_wait", "feed_latency",
+                                "elapsed", "skipped"}}. Las fuentes en pausa
+    por el circuit breaker vuelven con skipped=True sin leerse.
+    """
+    for source_key in source_keys:
+        if source_key not in RSS_SOURCES:
+            raise ValueError(f"Fuente no válida: {source_key}")
+    
+    limits = limits or {}
+    
+    # Las fuentes que vienen fallando se saltan hasta que vence su pausa
+    ahora = datetime.utcnow()
+    healths = {h.source: h for h in SourceHealth.query.filter(SourceHealth.source.in_(list(source_keys)))}
+    skipped = {} if force else {
+        key: _skipped_result(key, healths[key])
+        for key in source_keys if not health.is_available(healths.get(key), ahora)
+    }
+    
+    # Validadores de la última lectura de cada feed para el GET condicional
+    states = {st.source: st for st in FeedState.query.filter(FeedState.source.in_(list(source_keys)))}
+    sources = {}
+    for key in source_keys:
+        if key in skipped:
             continue
+        sources[key] = dict(RSS_SOURCES[key], limit=limits.get(key, limit))
+        if key in states:
+            sources[key]["etag"] = states[key].etag
+            sources[key]["modified"] = states[key].last_modified
+    
+    # Si se filtra por tema no se procesan todas las entradas del feed
+    full_read = not topic_filter or topic_filter == "all"
+    
+    # Marca de agua de cada feed: solo se recorren las entradas posteriores
+    marks = {
+        key: {
+            "entry_id": st.last_entry_id,
+            "entry_at": st.last_entry_at,
+            "rescan": needs_rescan(st.last_entry_id, st.polls_since_rescan),
+        }
+        for key, st in states.items()
+    } if full_read else {}
+    # ...y la descarga del feed se corta en la marca, salvo en los recorridos completos
+    for key, mark in marks.items():
+        if key in sources and not mark["rescan"]:
+            sources[key]["stop_at"] = mark["entry_id"]
+    
+    def plan(source_key, feed):
+        return _plan_entries(source_key, feed, limits.get(source_key, limit), days_back, topic_filter,
+                             watermark=marks.get(source_key))
+    
+    def save(source_key, candidatos, feed):
+        return _save_entries(source_key, candidatos, feed, remember_validators=full_read)
+    
+    if enrich_pages is None:
+        enrich_pages = not Config.ENRICH_IN_BACKGROUND
+    if not enrich_pages:
+        ENRICHMENT.start()
+    
+    engine = engine or IngestionEngine(deadline=deadline)
+    results = engine.run_sync(sources, plan, _enrich_entry if enrich_pages else None, save)
+    if not enrich_pages and any(r["nuevos"] for r in results.values()):
+        ENRICHMENT.wake()
+    
+    _record_health(results, healths)
+    for result in results.values():
+        result["skipped"] = False
+    results.update(skipped)
+    return results
+
+def _skipped_result(source_key, h):
+    return {
+        "source": source_key,
+        "nuevos": 0,
+        "error": f"Fuente en pausa hasta {h.open_until:%Y-%m-%d %H:%M} UTC tras {h.consecutive_failures} fallos ({h.last_error})",
+        "timed_out": False,
+        "not_modified": False,
+        "pages_fetched": 0,
+        "queue_wait": 0.0,
+        "feed_latency": None,
+        "elapsed": 0.0,
+        "skipped": True,
+    }
+
+def _record_health(results, healths):
+    """Guarda latencia, errores y estado del circuito de las fuentes leídas (una transacción)"""
+    try:
+        for source_key, result in results.items():
+            h = healths.get(source_key) or SourceHealth(source=source_key)
+            ok = not result["error"] and not (result["timed_out"] and result["feed_latency"] is None)
+            health.record_check(h, ok, result["feed_latency"], result["error"] or "plazo excedido")
+            db.session.add(h)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error guardando la salud de las fuentes: {e}")
+
+def active_sources(source_keys=None):
+    """Fuentes habilitadas que se pueden leer ahora (sin circuito abierto), en el orden del registro"""
+    keys = list(source_keys or RSS_SOURCES.enabled())
+    ahora = datetime.utcnow()
+    healths = {h.source: h for h in SourceHealth.query.filter(SourceHealth.source.in_(keys))}
+    return [key for key in keys if health.is_available(healths.get(key), ahora)]
+
+# ---------- WebSub (ingesta por push) ----------
+def websub_callback_url(source_key, base=None):
+    """URL pública del callback de una fuente (None si no hay WEBSUB_CALLBACK_BASE)"""
+    base = base or Config.WEBSUB_CALLBACK_BASE
+    if not base:
+        return None
+    return f"{base.rstrip('/')}/websub/callback/{source_key}"
+
+def websub_subscribe(source_key, hub=None, topic=None, callback_base=None, mode="subscribe"):
+    """
+    Pide al hub la (des)suscripción de una fuente. Sin hub/topic explícitos
+    se usan los anunciados por el feed en la última lectura.
+    
+    La suscripción queda pendiente hasta que el hub la confirma con un GET
+    al callback. Retorna el WebSubSubscription.
+    """
+    if source_key not in RSS_SOURCES:
+        raise ValueError(f"Fuente no válida: {source_key}")
+    callback = websub_callback_url(source_key, callback_base)
+    if not callback:
+        raise ValueError("Configura WEBSUB_CALLBACK_BASE con la URL pública de la app")
+    
+    state = db.session.get(FeedState, source_key)
+    sub = db.session.get(WebSubSubscription, source_key)
+    hub = hub or (sub.hub if sub else None) or (state.hub_url if state else None)
+    topic = topic or (sub.topic if sub else None) or (state.topic_url if state else None) or RSS_SOURCES[source_key]["url"]
+    if not hub:
+        raise ValueError(f"La fuente {source_key} no anuncia un hub WebSub")
+    
+    sub = sub or WebSubSubscription(source=source_key, pushes=0)
+    sub.hub, sub.topic = hub, topic
+    sub.requested_at = datetime.utcnow()
+    sub.last_error = None
+    if mode == "subscribe":
+        # Al renovar se conserva el secreto y el estado: las notificaciones siguen llegando
+        sub.secret = sub.secret or websub.new_secret()
+        if sub.state != "active":
+            sub.state = "pending"
+    else:
+        sub.state = "unsubscribing"
+    db.session.add(sub)
+    db.session.commit()  # antes de llamar al hub: puede verificar el callback en el acto
+    
+    ok, message = websub.request_subscription(hub, topic, callback, sub.secret, Config.WEBSUB_LEASE_SECONDS, mode)
+    if not ok:
+        db.session.refresh(sub)
+        sub.state = "failed"
+        sub.last_error = message[:500]
+        db.session.commit()
+    return sub
+
+def active_subscriptions(source_keys=None, now=None):
+    """Fuentes con una suscripción WebSub verificada y vigente (no necesitan sondeo)"""
+    now = now or datetime.utcnow()
+    query = WebSubSubscription.query.filter(WebSubSubscription.state == "active",
+                                            WebSubSubscription.expires_at > now)
+    if source_keys is not None:
+        query = query.filter(WebSubSubscription.source.in_(list(source_keys)))
+    return {sub.source for sub in query}
 
+# ---------- Concesiones de los schedulers ----------
+def renew_leases(worker, now=None):
+    """
+    Latido de un scheduler: renueva sus concesiones, suelta las que le
+    sobran y reclama particiones libres o caducadas hasta su parte justa.
+    
+    Cada reclamo es un UPDATE condicional (solo si sigue libre o caducada),
+    así que dos workers nunca se quedan con la misma partición.
+    Retorna la lista ordenada de particiones del worker.
+    """
+    now = now or datetime.utcnow()
+    ttl = timedelta(seconds=Config.LEASE_TTL)
+    expired = db.or_(ShardLease.owner.is_(None), ShardLease.expires_at < now)
+    try:
+        state = db.session.get(SchedulerWorker, worker) or SchedulerWorker(id=worker, started_at=now)
+        state.heartbeat_at = now
+        db.session.add(state)
+        db.session.flush()
+        SchedulerWorker.query.filter(SchedulerWorker.heartbeat_at < now - ttl).delete(synchronize_session=False)
+        share = fair_share(SchedulerWorker.query.count())
+        
+        mine = ShardLease.query.filter(ShardLease.owner == worker, ShardLease.expires_at >= now)
+        mine.update({"expires_at": now + ttl}, synchronize_session=False)
+        owned = [shard for (shard,) in mine.with_entities(ShardLease.shard).order_by(ShardLease.shard)]
+        if len(owned) > share:
+            ShardLease.query.filter(ShardLease.shard.in_(owned[share:]), ShardLease.owner == worker).update(
+                {"owner": None, "expires_at": None}, synchronize_session=False)
+            owned = owned[:share]
+        elif len(owned) < share:
+            free = [shard for (shard,) in db.session.query(ShardLease.shard).filter(expired)]
+            random.shuffle(free)  # menos choques entre workers que reclaman a la vez
+            for shard in free:
+                if len(owned) >= share:
+                    break
+                claimed = ShardLease.query.filter(ShardLease.shard == shard, expired).update(
+                    {"owner": worker, "acquired_at": now, "expires_at": now + ttl}, synchronize_session=False)
+                if claimed:
+                    owned.append(shard)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sorted(owned)
+
+def release_leases(worker):
+    """Suelta las concesiones de un worker que se detiene (los demás las toman en su siguiente latido)"""
+    try:
+        ShardLease.query.filter_by(owner=worker).update({"owner": None, "expires_at": None}, synchronize_session=False)
+        SchedulerWorker.query.filter_by(id=worker).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def in_shards(shards):
+    """Filtro de Source por partición (None = todas)"""
+    if shards is None:
+        return db.true()
+    return (Source.id % Config.SCHEDULER_SHARDS).in_(list(shards))
+
+def ingest_pushed_feed(source_key, body, content_type=None):
+    """
+    Guarda las entradas de una notificación WebSub por el mismo camino que
+    la lectura del feed (_plan_entries + _save_entries). El contenido
+    extendido lo completa el enriquecimiento en segundo plano.
+    """
+    feed = parse_feed(body, content_type)
+    candidatos = _plan_entries(source_key, feed, limit=None)
+    nuevos = _save_entries(source_key, candidatos)
+    if nuevos:
+        ENRICHMENT.start()
+        ENRICHMENT.wake()
     return nuevos
 
+def fetch_articles_from_source(source_key, limit=10, days_back=None, topic_filter=None):
+    """
+    Obtiene artículos de una fuente RSS específica
+    
+    Args:
+        source_key: Clave de la fuente en RSS_SOURCES
+        limit: Número máximo de artículos a procesar
+        days_back: Solo procesar artículos de los últimos N días (None = todos)
+        topic_filter: Filtrar por tema específico (None = todos)
+    """
+    if source_key not in RSS_SOURCES:
+        raise ValueError(f"Fuente no válida: {source_key}")
+    
+    result = fetch_sources([source_key], limit, days_back, topic_filter)[source_key]
+    if result["error"] and not result["nuevos"]:
+        raise RuntimeError(result["error"])
+    return result["nuevos"]
+
 @app.post("/refresh")
 def refresh():
     try:
@@ -488,6 +1514,8 @@ def refresh():
         }.get(topic_filter, topic_filter)
         
         mensaje = f"Se actualizaron {nuevos} artículos nuevos desde {source_name} (últimos 30 días, tema: {tema_nombre})."
+        if ENRICHMENT.running:
+            mensaje += " El contenido completo se descarga en segundo plano."
         
         if nuevos > 0:
             flash(mensaje, "ok")
@@ -509,32 +1537,25 @@ def update_all_sources():
         limit = data.get('limit', 10)
         days_back = data.get('days_back', 30)
         
-        # Fuentes que funcionan correctamente (basado en nuestras pruebas)
-        working_sources = [
-            'bbc_mundo',
-            'el_tiempo_mundo', 
-            'elpais_portada',
-            'clarin',
-            'diario_libre_portada',
-            'diario_libre_economia',
-            'diario_libre_politica'
-        ]
+        # Fuentes activas según su salud: las que vienen fallando quedan en pausa
+        working_sources = active_sources()
         
         total_articles = 0
         sources_processed = 0
         errors = []
         
+        engine = IngestionEngine()
+        results = fetch_sources(working_sources, limit, days_back, engine=engine)
         for source_key in working_sources:
-            try:
-                nuevos = fetch_articles_from_source(source_key, limit, days_back)
-                total_articles += nuevos
-                sources_processed += 1
-                print(f"✅ {RSS_SOURCES[source_key]['name']}: {nuevos} artículos nuevos")
-            except Exception as e:
-                error_msg = f"Error en {RSS_SOURCES[source_key]['name']}: {str(e)}"
+            result = results[source_key]
+            if result["error"]:
+                error_msg = f"Error en {RSS_SOURCES[source_key]['name']}: {result['error']}"
                 errors.append(error_msg)
                 print(f"❌ {error_msg}")
                 continue
+            total_articles += result["nuevos"]
+            sources_processed += 1
+            print(f"✅ {RSS_SOURCES[source_key]['name']}: {result['nuevos']} artículos nuevos ({result['elapsed']}s)")
         
         # Preparar respuesta
         response_data = {
@@ -542,7 +1563,11 @@ def update_all_sources():
             'total_articles': total_articles,
             'sources_processed': sources_processed,
             'total_sources': len(working_sources),
-            'errors': errors
+            'paused_sources': [key for key in RSS_SOURCES.enabled() if key not in working_sources],
+            'errors': errors,
+            'host_waits': engine.limiter.stats(),
+            'fetch_stats': fetch_stats(),
+            'enrichment': enrichment_stats()
         }
         
         return jsonify(response_data)
@@ -557,7 +1582,7 @@ def update_all_sources():
 def download_csv():
     """Descarga todos los artículos en formato CSV"""
     try:
-        articles = Article.query.order_by(Article.created_at.desc()).all()
+        articles = collapse_duplicates(Article.query, request.args.get('collapse') == '1').order_by(Article.created_at.desc()).all()
         
         def generate_csv():
             data = []
@@ -737,7 +1762,7 @@ def download_by_date():
 def download_json():
     """Descarga todos los artículos en formato JSON"""
     try:
-        articles = Article.query.order_by(Article.created_at.desc()).all()
+        articles = collapse_duplicates(Article.query, request.args.get('collapse') == '1').order_by(Article.created_at.desc()).all()
         
         data = []
         for article in articles:
@@ -852,8 +1877,10 @@ def delete_link(link_id):
 def delete_article(article_id):
     try:
         art = Article.query.get_or_404(article_id)
+        delete_article_rows([article_id])
         db.session.delete(art)
         db.session.commit()
+        KNOWN_URLS.discard_many([art.url_hash])
         flash("Artículo eliminado.", "ok")
     except Exception as e:
         db.session.rollback()
@@ -885,8 +1912,10 @@ def search():
     section = request.args.get('section', '')
     date_from = request.args.get('date_from', '')
     date_to = request.args.get('date_to', '')
+    topic = request.args.get('topic', '')
+    collapse = request.args.get('collapse') == '1'
     
-    articles = Article.query
+    articles = filter_by_topic(Article.query, topic)
     
     if query:
         articles = articles.filter(
@@ -920,7 +1949,7 @@ def search():
         except:
             pass
     
-    results = articles.order_by(Article.created_at.desc()).all()
+    results = collapse_duplicates(articles, collapse).order_by(Article.created_at.desc()).all()
     
     return render_template("search.html", 
                          results=results, 
@@ -930,6 +1959,10 @@ def search():
                          section=section,
                          date_from=date_from,
                          date_to=date_to,
+                         topic=topic,
+                         topics=list(TOPIC_KEYWORDS),
+                         collapse=collapse,
+                         story_sizes=cluster_sizes(results) if collapse else {},
                          rss_sources=RSS_SOURCES)
 
 # ---------- API REST ----------
@@ -939,14 +1972,17 @@ def api_articles():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
     source = request.args.get('source', '')
+    topic = request.args.get('topic', '')
+    collapse = request.args.get('collapse') == '1'
     
-    query = Article.query
+    query = filter_by_topic(Article.query, topic)
     if source:
         query = query.filter(Article.source == source)
     
-    articles = query.order_by(Article.created_at.desc()).paginate(
+    articles = collapse_duplicates(query, collapse).order_by(Article.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
+    sizes = cluster_sizes(articles.items)
     
     return {
         'articles': [{
@@ -958,7 +1994,9 @@ def api_articles():
             'section': a.section,
             'source': a.source,
             'summary': a.summary,
-            'created_at': a.created_at.isoformat() if a.created_at else None
+            'created_at': a.created_at.isoformat() if a.created_at else None,
+            'cluster_id': a.cluster_id or a.id,
+            'duplicates': sizes.get(a.cluster_id or a.id, 1) - 1
         } for a in articles.items],
         'pagination': {
             'page': page,
@@ -970,6 +2008,237 @@ def api_articles():
         }
     }
 
+@app.get("/api/ingest/stats")
+def api_ingest_stats():
+    """Contadores de descarga, conexiones reutilizadas, fechas por nivel, marca de agua, parser de feeds, contenido de los feeds, enriquecimiento y caché"""
+    return {
+        'fetch': fetch_stats(),
+        'http': http_stats(),
+        'dates': date_stats(),
+        'watermark': watermark_stats(),
+        'feed_parser': parse_stats(),
+        'feed_content': feed_content_stats(),
+        'enrichment': enrichment_stats(),
+        'page_cache': get_page_cache().stats() if Config.PAGE_CACHE_ENABLED else None
+    }
+
+@app.get("/sources/status")
+def sources_status():
+    """
+    Estado en vivo de las fuentes RSS (reemplaza RSS_SOURCES_STATUS.md):
+    latencia y tasa de error recientes, último acierto y pausa del circuit
+    breaker. Con ?format=md devuelve el mismo informe en Markdown.
+    """
+    ahora = datetime.utcnow()
+    healths = {h.source: h for h in SourceHealth.query.all()}
+    sources = []
+    for key, cfg in RSS_SOURCES.items():
+        h = healths.get(key)
+        sources.append({
+            'key': key,
+            'name': cfg['name'],
+            'url': cfg['url'],
+            'region': cfg.get('region'),
+            'enabled': cfg['enabled'],
+            'state': health.source_state(h, ahora),
+            'latency_ms': round(h.latency * 1000) if h and h.latency is not None else None,
+            'error_rate': h.error_rate if h else None,
+            'checks': h.checks if h else 0,
+            'consecutive_failures': h.consecutive_failures if h else 0,
+            'last_success': h.last_success.isoformat() if h and h.last_success else None,
+            'last_error': h.last_error if h and h.consecutive_failures else None,
+            'paused_until': h.open_until.isoformat() if h and h.open_until and h.open_until > ahora else None,
+        })
+    summary = {state: sum(1 for src in sources if src['state'] == state)
+               for state in (health.STATE_OK, health.STATE_DEGRADED, health.STATE_OPEN, health.STATE_UNKNOWN)}
+    
+    if request.args.get('format') == 'md':
+        titles = {
+            health.STATE_OK: "✅ Funcionan correctamente",
+            health.STATE_DEGRADED: "⚠️ Con errores recientes",
+            health.STATE_OPEN: "⏸️ En pausa (circuit breaker)",
+            health.STATE_UNKNOWN: "❔ Sin lecturas todavía",
+        }
+        lines = ["# 📊 Estado de las Fuentes RSS", "", f"_Generado el {ahora:%Y-%m-%d %H:%M} UTC_", ""]
+        for state, title in titles.items():
+            group = [src for src in sources if src['state'] == state]
+            if not group:
+                continue
+            lines += [f"## {title} ({len(group)}/{len(sources)})", ""]
+            for src in group:
+                detail = []
+                if src['latency_ms'] is not None:
+                    detail.append(f"{src['latency_ms']} ms")
+                if src['paused_until']:
+                    detail.append(f"en pausa hasta {src['paused_until'][:16]} UTC")
+                if src['last_error']:
+                    detail.append(src['last_error'])
+                extra = f" ({'; '.join(detail)})" if detail else ""
+                lines.append(f"- **{src['name']}** - {src['url']}{extra}")
+            lines.append("")
+        return Response("\n".join(lines), mimetype="text/markdown")
+    
+    return {'generated_at': ahora.isoformat(), 'summary': summary, 'sources': sources}
+
+# ---------- Registro de fuentes ----------
+@app.get("/api/sources")
+def api_sources():
+    """Fuentes del registro con sus ajustes y la versión actual"""
+    return {
+        'version': RSS_SOURCES.version,
+        'sources': [{'key': key, **cfg} for key, cfg in RSS_SOURCES.items()],
+    }
+
+@app.post("/api/sources")
+def api_save_source():
+    """Crea o actualiza una fuente (JSON o formulario con key, name, url y ajustes)"""
+    data = request.get_json(silent=True) or request.form.to_dict()
+    try:
+        key = save_source(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'source': {'key': key, **RSS_SOURCES[key]}})
+
+@app.delete("/api/sources/<key>")
+def api_delete_source(key):
+    if not delete_source(key):
+        return jsonify({'success': False, 'error': f"Fuente no encontrada: {key}"}), 404
+    return jsonify({'success': True})
+
+@app.post("/sources/import-opml")
+def import_opml():
+    """Importa fuentes desde un OPML (archivo "opml" del formulario o el cuerpo de la petición)"""
+    upload = request.files.get("opml")
+    content = upload.read() if upload else request.get_data()
+    try:
+        result = import_opml_sources(content)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+@app.get("/sources/export.opml")
+def export_opml():
+    """Exporta el registro de fuentes (con sus ajustes) como OPML"""
+    return Response(build_opml(RSS_SOURCES), mimetype="text/x-opml",
+                    headers={"Content-Disposition": "attachment; filename=fuentes.opml"})
+
+# ---------- WebSub ----------
+@app.get("/websub/callback/<source_key>")
+def websub_verify(source_key):
+    """Verificación de intención del hub: se responde hub.challenge si esperábamos la petición"""
+    mode = request.args.get("hub.mode")
+    sub = db.session.get(WebSubSubscription, source_key)
+    if sub is None or request.args.get("hub.topic") != sub.topic:
+        return Response("Suscripción desconocida", status=404, mimetype="text/plain")
+    
+    ahora = datetime.utcnow()
+    if mode == "denied":
+        sub.state = "denied"
+        sub.last_error = (request.args.get("hub.reason") or "Suscripción denegada por el hub")[:500]
+        db.session.commit()
+        return Response("", mimetype="text/plain")
+    
+    challenge = request.args.get("hub.challenge")
+    if not challenge:
+        return Response("Falta hub.challenge", status=400, mimetype="text/plain")
+    if mode == "subscribe" and sub.state in ("pending", "active"):
+        lease = request.args.get("hub.lease_seconds", type=int) or Config.WEBSUB_LEASE_SECONDS
+        sub.state = "active"
+        sub.verified_at = ahora
+        sub.lease_seconds = lease
+        sub.expires_at = ahora + timedelta(seconds=lease)
+    elif mode == "unsubscribe" and sub.state == "unsubscribing":
+        sub.state = "unsubscribed"
+        sub.expires_at = None
+    else:
+        return Response("Petición no esperada", status=404, mimetype="text/plain")
+    db.session.commit()
+    print(f"🔔 WebSub {mode} verificado para {source_key} ({sub.hub})")
+    return Response(challenge, mimetype="text/plain")
+
+@app.post("/websub/callback/<source_key>")
+def websub_push(source_key):
+    """Notificación del hub con las entradas nuevas (firmada con X-Hub-Signature)"""
+    sub = db.session.get(WebSubSubscription, source_key)
+    if sub is None or source_key not in RSS_SOURCES or sub.state in ("unsubscribed", "denied"):
+        return Response("Suscripción desconocida", status=410, mimetype="text/plain")
+    if request.content_length and request.content_length > Config.PAGE_MAX_BYTES:
+        return Response("Notificación demasiado grande", status=413, mimetype="text/plain")
+    
+    body = request.get_data()
+    if sub.secret and not websub.verify_signature(sub.secret, body, request.headers.get("X-Hub-Signature")):
+        # El protocolo pide responder 2xx igualmente y descartar el contenido
+        print(f"⚠️ WebSub {source_key}: firma no válida, notificación descartada")
+        return Response("", status=202, mimetype="text/plain")
+    
+    try:
+        nuevos = ingest_pushed_feed(source_key, body, request.content_type)
+        sub.last_push_at = datetime.utcnow()
+        sub.pushes = (sub.pushes or 0) + 1
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ WebSub {source_key}: {e}")
+        return Response("Error procesando la notificación", status=500, mimetype="text/plain")
+    return Response(f"{nuevos} artículos nuevos", mimetype="text/plain")
+
+@app.post("/websub/subscribe")
+def websub_subscribe_route():
+    """(Des)suscribe una fuente: form source, y opcionalmente hub, topic y mode=unsubscribe"""
+    try:
+        sub = websub_subscribe(
+            request.form.get("source", ""),
+            hub=request.form.get("hub") or None,
+            topic=request.form.get("topic") or None,
+            callback_base=Config.WEBSUB_CALLBACK_BASE or request.url_root,
+            mode="unsubscribe" if request.form.get("mode") == "unsubscribe" else "subscribe",
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': sub.state != "failed", 'subscription': _subscription_json(sub)})
+
+@app.get("/api/websub")
+def api_websub():
+    """Suscripciones WebSub y fuentes que anuncian un hub"""
+    hubs = {st.source: st.hub_url for st in FeedState.query.filter(FeedState.hub_url.isnot(None))}
+    return {
+        'subscriptions': [_subscription_json(sub) for sub in WebSubSubscription.query.order_by(WebSubSubscription.source)],
+        'hubs': hubs,
+    }
+
+@app.get("/api/scheduler/workers")
+def api_scheduler_workers():
+    """Schedulers vivos y particiones de fuentes que tiene cada uno"""
+    now = datetime.utcnow()
+    leases = ShardLease.query.filter(ShardLease.owner.isnot(None), ShardLease.expires_at >= now)
+    shards = {}
+    for lease in leases.order_by(ShardLease.shard):
+        shards.setdefault(lease.owner, []).append(lease.shard)
+    return {
+        'workers': [{
+            'id': w.id,
+            'started_at': w.started_at.isoformat() if w.started_at else None,
+            'heartbeat_at': w.heartbeat_at.isoformat() if w.heartbeat_at else None,
+            'shards': shards.get(w.id, []),
+        } for w in SchedulerWorker.query.order_by(SchedulerWorker.started_at)],
+        'total_shards': Config.SCHEDULER_SHARDS,
+        'unassigned': Config.SCHEDULER_SHARDS - sum(len(v) for v in shards.values()),
+    }
+
+def _subscription_json(sub):
+    return {
+        'source': sub.source,
+        'hub': sub.hub,
+        'topic': sub.topic,
+        'state': sub.state,
+        'requested_at': sub.requested_at.isoformat() if sub.requested_at else None,
+        'verified_at': sub.verified_at.isoformat() if sub.verified_at else None,
+        'expires_at': sub.expires_at.isoformat() if sub.expires_at else None,
+        'last_push_at': sub.last_push_at.isoformat() if sub.last_push_at else None,
+        'pushes': sub.pushes or 0,
+        'last_error': sub.last_error,
+    }
+
 # ---------- Acciones en Lote ----------
 @app.post("/bulk-action")
 def bulk_action():
@@ -982,8 +2251,11 @@ def bulk_action():
     
     try:
         if action == 'delete':
+            hashes = [h for (h,) in db.session.query(Article.url_hash).filter(Article.id.in_(article_ids))]
+            delete_article_rows(article_ids)
             Article.query.filter(Article.id.in_(article_ids)).delete(synchronize_session=False)
             db.session.commit()
+            KNOWN_URLS.discard_many(hashes)
             flash(f"Se eliminaron {len(article_ids)} artículos.", "ok")
         elif action == 'mark_favorite':
             Article.query.filter(Article.id.in_(article_ids)).update({'is_favorite': True}, synchronize_session=False)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Agrupación de noticias casi duplicadas para News Aggregator Pro
+Muchas fuentes publican la misma nota de agencia con pequeños cambios. Al
+ingerir cada artículo se calcula la firma MinHash de su título + resumen
+(bigramas de palabras sin tildes) y se parte en bandas LSH: dos artículos
+con una banda igual son candidatos a la misma historia, y se confirma
+estimando su similitud de Jaccard con las firmas completas.
+
+Las bandas se guardan en la tabla story_bands (app.py), así que asignar la
+historia de un artículo nuevo es una consulta por clave, sin comparar con
+todos los artículos anteriores.
+"""
+
+import hashlib
+import random
+import re
+from array import array
+
+from topics import fold
+
+NUM_PERM = 64  # valores de la firma (cambiarlo invalida las firmas guardadas)
+BANDS = 16  # bandas LSH de NUM_PERM // BANDS valores: umbral ~ (1/16) ** (1/4) ~= 0.5
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+_rng = random.Random(20261017)  # semilla fija: las firmas son estables entre procesos
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(*texts):
+    """Bigramas de palabras (o palabras sueltas si el texto es muy corto), sin tildes ni mayúsculas"""
+    words = _WORD.findall(fold(" ".join(t for t in texts if t)))
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def signature(*texts):
+    """
+    Firma MinHash del texto (NUM_PERM enteros de 32 bits) como bytes para
+    guardarla en la base de datos, o None si no hay texto.
+    """
+    hashes = [_hash(s) for s in shingles(*texts)]
+    if not hashes:
+        return None
+    values = array("I", (min((a * h + b) % _PRIME for h in hashes) & _MASK for a, b in _PERMS))
+    return values.tobytes()
+
+
+def similarity(sig_a, sig_b):
+    """Similitud de Jaccard estimada: fracción de valores iguales de las dos firmas"""
+    if not sig_a or not sig_b:
+        return 0.0
+    a, b = array("I", sig_a), array("I", sig_b)
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_keys(sig):
+    """
+    Claves LSH de una firma: una por banda, como entero de 63 bits (cabe en
+    un INTEGER de SQLite). Incluyen el número de banda para no mezclarlas.
+    """
+    if not sig:
+        return []
+    width = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + sig[band * width:(band + 1) * width],
+                                       digest_size=8).digest(), "little") >> 1
+        for band in range(BANDS)
+    ]
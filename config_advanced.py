@@ -39,6 +39,82 @@ class Config:
     AUTO_REFRESH_INTERVAL = int(os.environ.get('AUTO_REFRESH_INTERVAL') or 300)  # 5 minutos
     MAX_ARTICLES_PER_SOURCE = int(os.environ.get('MAX_ARTICLES_PER_SOURCE') or 20)
     
+    # Ingesta concurrente (ingestion.py)
+    INGEST_MAX_CONCURRENCY = int(os.environ.get('INGEST_MAX_CONCURRENCY') or 16)  # peticiones simultáneas
+    INGEST_DEADLINE = int(os.environ.get('INGEST_DEADLINE') or 120)  # plazo total en segundos
+    KNOWN_URLS_MAX = int(os.environ.get('KNOWN_URLS_MAX') or 200000)  # URLs ya vistas en memoria
+    FEED_FAST_PARSER = os.environ.get('FEED_FAST_PARSER', 'true').lower() in ['true', 'on', '1']  # feed_stream.py (si no, feedparser)
+    DATE_SHAPES_MAX = int(os.environ.get('DATE_SHAPES_MAX') or 10000)  # formas de fecha con su idioma en memoria (dates.py)
+    
+    # Sondeo adaptativo del scheduler
+    POLL_MIN_INTERVAL = int(os.environ.get('POLL_MIN_INTERVAL') or 120)  # segundos
+    POLL_MAX_INTERVAL = int(os.environ.get('POLL_MAX_INTERVAL') or 6 * 3600)  # segundos
+    POLL_TARGET_ARTICLES = float(os.environ.get('POLL_TARGET_ARTICLES') or 2)  # artículos nuevos esperados por lectura
+    POLL_RATE_WINDOW_HOURS = int(os.environ.get('POLL_RATE_WINDOW_HOURS') or 48)  # ventana para medir el ritmo
+    POLL_TICK = int(os.environ.get('POLL_TICK') or 30)  # cada cuánto se buscan fuentes pendientes
+    POLL_MAX_BATCH = int(os.environ.get('POLL_MAX_BATCH') or 200)  # fuentes leídas como mucho por ciclo (por prioridad)
+    WATERMARK_RESCAN_EVERY = int(os.environ.get('WATERMARK_RESCAN_EVERY') or 12)  # lecturas entre recorridos completos del feed
+    
+    # Varios schedulers a la vez (leases.py): reparto de fuentes por concesiones
+    LEASE_TTL = int(os.environ.get('LEASE_TTL') or 90)  # segundos sin latido hasta que otro worker toma las fuentes
+    LEASE_HEARTBEAT = int(os.environ.get('LEASE_HEARTBEAT') or 30)  # cada cuánto renueva cada worker
+    SCHEDULER_WORKERS = int(os.environ.get('SCHEDULER_WORKERS') or 1)  # procesos scheduler que lanza start_all.py
+    # Particiones de fuentes: cambiarlo reparte de nuevo todas las fuentes (todos los workers deben usar el
+    # mismo valor) y más workers que particiones no suman
+    SCHEDULER_SHARDS = int(os.environ.get('SCHEDULER_SHARDS') or 128)
+    
+    # Registro de fuentes en la base de datos (sources.py)
+    SOURCES_RELOAD_SECONDS = int(os.environ.get('SOURCES_RELOAD_SECONDS') or 5)  # cada cuánto se mira si cambió
+    
+    # Suscripciones WebSub (websub.py): sin URL pública no se suscribe nada
+    WEBSUB_CALLBACK_BASE = os.environ.get('WEBSUB_CALLBACK_BASE')  # p. ej. https://noticias.example.com
+    WEBSUB_LEASE_SECONDS = int(os.environ.get('WEBSUB_LEASE_SECONDS') or 10 * 86400)  # duración pedida al hub
+    WEBSUB_RENEW_MARGIN = int(os.environ.get('WEBSUB_RENEW_MARGIN') or 86400)  # renovar cuando falte menos que esto
+    WEBSUB_RETRY = int(os.environ.get('WEBSUB_RETRY') or 3600)  # segundos antes de reintentar una suscripción fallida
+    
+    # Salud de las fuentes y circuit breaker
+    HEALTH_EWMA_ALPHA = float(os.environ.get('HEALTH_EWMA_ALPHA') or 0.3)  # peso de la última lectura
+    HEALTH_FAILURE_THRESHOLD = int(os.environ.get('HEALTH_FAILURE_THRESHOLD') or 2)  # fallos seguidos para abrir el circuito
+    HEALTH_BACKOFF_BASE = int(os.environ.get('HEALTH_BACKOFF_BASE') or 300)  # segundos de la primera pausa
+    HEALTH_BACKOFF_MAX = int(os.environ.get('HEALTH_BACKOFF_MAX') or 6 * 3600)  # pausa máxima
+    
+    # Cliente HTTP compartido (feeds y páginas)
+    HTTP_POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS') or 100)  # hosts con pool de conexiones
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE') or 16)  # conexiones keep-alive por host
+    DNS_CACHE_TTL = int(os.environ.get('DNS_CACHE_TTL') or 300)  # segundos (0 = sin caché)
+    
+    # Descarga acotada de páginas de artículos
+    PAGE_MAX_BYTES = int(os.environ.get('PAGE_MAX_BYTES') or 2 * 1024 * 1024)  # 2 MB por página
+    PAGE_DEADLINE = int(os.environ.get('PAGE_DEADLINE') or 20)  # segundos totales por página
+    PAGE_CONNECT_TIMEOUT = int(os.environ.get('PAGE_CONNECT_TIMEOUT') or 5)  # segundos
+    PAGE_TARGET_PARAGRAPHS = int(os.environ.get('PAGE_TARGET_PARAGRAPHS') or 12)  # 0 = leer la página completa
+    FEED_CONTENT_MIN_CHARS = int(os.environ.get('FEED_CONTENT_MIN_CHARS') or 500)  # contenido del feed suficiente para no descargar la página
+    
+    # Procesos para parsear HTML (0 = en el propio hilo)
+    EXTRACT_PROCESSES = int(os.environ.get('EXTRACT_PROCESSES', os.cpu_count() or 1))
+    
+    # Historias de casi duplicados (clustering.py)
+    CLUSTER_THRESHOLD = float(os.environ.get('CLUSTER_THRESHOLD') or 0.5)  # similitud MinHash mínima para unir artículos
+    CLUSTER_WINDOW_HOURS = int(os.environ.get('CLUSTER_WINDOW_HOURS') or 72)  # solo se compara con artículos recientes
+    
+    # Enriquecimiento en segundo plano (contenido extendido de las páginas)
+    ENRICH_IN_BACKGROUND = os.environ.get('ENRICH_IN_BACKGROUND', 'true').lower() == 'true'
+    ENRICH_WORKERS = int(os.environ.get('ENRICH_WORKERS') or 8)
+    ENRICH_BATCH_SIZE = int(os.environ.get('ENRICH_BATCH_SIZE') or 50)
+    ENRICH_IDLE_SLEEP = int(os.environ.get('ENRICH_IDLE_SLEEP') or 10)  # segundos entre sondeos sin trabajo
+    ENRICH_MAX_ATTEMPTS = int(os.environ.get('ENRICH_MAX_ATTEMPTS') or 3)
+    ENRICH_CLAIM_TTL = int(os.environ.get('ENRICH_CLAIM_TTL') or 600)  # segundos que un proceso se reserva un lote
+    
+    # Cortesía por dominio (politeness.py)
+    POLITE_RATE = float(os.environ.get('POLITE_RATE') or 2.0)  # peticiones por segundo y dominio
+    POLITE_BURST = int(os.environ.get('POLITE_BURST') or 2)  # ráfaga máxima por dominio
+    POLITE_CONCURRENCY = int(os.environ.get('POLITE_CONCURRENCY') or 2)  # simultáneas por dominio
+    
+    # Caché en disco de páginas de artículos (page_cache.py)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR') or 'page_cache'
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES') or 512 * 1024 * 1024)  # 512 MB
+    
     # Cleanup configuration
     CLEANUP_DAYS = int(os.environ.get('CLEANUP_DAYS') or 30)  # Eliminar artículos más antiguos de 30 días
     
@@ -101,7 +177,8 @@ config = {
     'default': DevelopmentConfig
 }
 
-# RSS Sources con configuración avanzada
+# RSS Sources con configuración avanzada: solo siembran los ajustes (prioridad,
+# límite, intervalo) del registro de fuentes la primera vez que se crea la tabla
 RSS_SOURCES_ADVANCED = {
     "bbc_mundo": {
         "name": "BBC Mundo",
@@ -160,6 +237,12 @@ RSS_SOURCES_ADVANCED = {
     }
 }
 
+# Límites de cortesía por dominio (sobrescriben POLITE_RATE/BURST/CONCURRENCY)
+HOST_LIMITS = {
+    # Diario Libre tiene varios feeds en el mismo dominio
+    "diariolibre.com": {"rate": 1.0, "burst": 2, "concurrency": 2},
+}
+
 # Categorías de noticias
 NEWS_CATEGORIES = {
     "internacional": "🌍 Internacional",
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuración compartida de las pruebas (pytest)
+Fija una base de datos temporal antes de que ningún módulo de prueba importe
+la app y ofrece como fixtures las fuentes de prueba y los fetchers sin red.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+from ingestion import FetchedPage, IngestionEngine
+from politeness import HostLimiter
+
+
+def pytest_configure(config):
+    """Base de datos temporal para toda la sesión: se fija antes de recolectar (e importar) las pruebas"""
+    os.environ.setdefault("NEWS_DB_PATH", os.path.join(tempfile.mkdtemp(), "news.db"))
+
+
+def _recording_page_fetcher(fetched, text=lambda n: "Contenido de la página descargada. "):
+    """page_fetcher sin red: anota cada URL en `fetched` y devuelve un párrafo con text(descargas hechas)"""
+    def page_fetcher(url, *args):
+        fetched.append(url)
+        return FetchedPage(url, f"<html><p>{text(len(fetched)) * 5}</p></html>".encode(),
+                           200, {"Content-Type": "text/html"})
+    return page_fetcher
+
+
+@contextmanager
+def _demo_source(key, url, feed_fetcher, page_fetcher):
+    """
+    Registra una fuente de prueba y da una función que la ingesta con
+    fetch_sources y un motor sin red; al salir borra sus artículos y la fuente.
+    """
+    import app as news_app
+
+    engine = IngestionEngine(feed_fetcher=feed_fetcher, page_fetcher=page_fetcher,
+                             limiter_factory=lambda: HostLimiter(rate=1000, burst=1000, concurrency=100, overrides={}))
+    with news_app.app.app_context():
+        news_app.save_source({"key": key, "name": key.replace("_", " ").title(), "url": url})
+        try:
+            yield lambda: news_app.fetch_sources([key], engine=engine, enrich_pages=True)[key]
+        finally:
+            ids = [a.id for a in news_app.Article.query.filter_by(source=key)]
+            news_app.delete_article_rows(ids)
+            news_app.Article.query.filter(news_app.Article.id.in_(ids)).delete(synchronize_session=False)
+            news_app.db.session.commit()
+            news_app.delete_source(key)
+
+
+@pytest.fixture
+def recording_page_fetcher():
+    """Fábrica de page_fetchers sin red que anotan las URLs descargadas"""
+    return _recording_page_fetcher
+
+
+@pytest.fixture
+def demo_source():
+    """Fábrica de fuentes de prueba (context manager) que se ingestan sin red"""
+    return _demo_source
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Parseo rápido de fechas para News Aggregator Pro
+Resuelve la fecha de una entrada por niveles, del más barato al más caro:
+
+1. struct_time ya parseado por feedparser (published_parsed / updated_parsed)
+2. RFC 822 (email.utils), el formato de <pubDate> en RSS
+3. ISO 8601 (datetime.fromisoformat), el de Atom y las meta etiquetas
+4. dateparser, memoizado por formato: el idioma detectado para una forma de
+   fecha ("00 de octubre de 0000") se reutiliza y las formas que no se
+   pudieron parsear no se vuelven a intentar (LRU de DATE_SHAPES_MAX
+   formas, compartida por los hilos de ingesta y de enriquecimiento). No se
+   memoiza el resultado: las fechas relativas ("hace 1 hora", "ayer")
+   dependen del momento
+
+Todas las fechas se devuelven como datetime naive en UTC.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import dateparser
+
+from config_advanced import Config
+
+TIERS = ("feedparser", "rfc822", "iso8601", "dateparser")
+
+_DIGITS = re.compile(r"\d")
+
+_stats = {tier: {"hits": 0, "seconds": 0.0} for tier in TIERS}
+_stats["misses"] = {"hits": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+# Forma de la fecha (dígitos -> 0) -> locale detectado, o None si dateparser falló (LRU)
+_shape_locales = OrderedDict()
+_shape_locales_lock = threading.Lock()
+_MISSING = object()
+
+
+def _record(tier, started):
+    with _stats_lock:
+        _stats[tier]["hits"] += 1
+        _stats[tier]["seconds"] += time.perf_counter() - started
+
+
+def date_stats():
+    """Aciertos y tiempo acumulado por nivel, con el porcentaje de aciertos"""
+    with _stats_lock:
+        total = sum(s["hits"] for s in _stats.values()) or 1
+        return {
+            tier: {
+                "hits": s["hits"],
+                "hit_rate": round(s["hits"] / total, 3),
+                "seconds": round(s["seconds"], 4),
+                "avg_ms": round(1000 * s["seconds"] / s["hits"], 3) if s["hits"] else 0.0,
+            }
+            for tier, s in _stats.items()
+        }
+
+
+def _to_utc_naive(dt):
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _from_struct(value):
+    try:
+        return datetime(*value[:6])
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rfc822(value):
+    if "," not in value and not value[:1].isdigit():
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _parse_iso(value):
+    if not value[:4].isdigit():
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _shape_locale(key):
+    with _shape_locales_lock:
+        locale = _shape_locales.get(key, _MISSING)
+        if locale is not _MISSING:
+            _shape_locales.move_to_end(key)
+        return locale
+
+
+def _remember_shape(key, locale):
+    with _shape_locales_lock:
+        _shape_locales[key] = locale
+        _shape_locales.move_to_end(key)
+        while len(_shape_locales) > Config.DATE_SHAPES_MAX:
+            _shape_locales.popitem(last=False)
+
+
+def _parse_dateparser(value, languages):
+    shape = _DIGITS.sub("0", value)
+    key = (shape, languages)
+    locale = _shape_locale(key)
+    if locale is None:
+        return None  # esta forma ya falló antes: no repetir el intento
+    if locale is not _MISSING:
+        dt = dateparser.parse(value, locales=[locale])
+        if dt is not None:
+            return dt
+
+    data = dateparser.DateDataParser(languages=list(languages) if languages else None).get_date_data(value)
+    _remember_shape(key, data.locale if data.date_obj else None)
+    return data.date_obj
+
+
+def parse_date(value, languages=None):
+    """
+    Parsea una fecha en texto probando los parsers rápidos antes que dateparser.
+
+    Args:
+        value: texto de la fecha (pubDate, updated, meta etiqueta...)
+        languages: idiomas para dateparser (p. ej. ['es']); solo se usan
+            en el último nivel
+
+    Retorna: datetime naive en UTC, o None si no se pudo parsear
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    started = time.perf_counter()
+
+    for tier, parser in (("rfc822", _parse_rfc822), ("iso8601", _parse_iso)):
+        dt = parser(value)
+        if dt is not None:
+            _record(tier, started)
+            return _to_utc_naive(dt)
+
+    dt = _parse_dateparser(value, tuple(languages) if languages else None)
+    if dt is not None:
+        _record("dateparser", started)
+        return _to_utc_naive(dt)
+    _record("misses", started)
+    return None
+
+
+def entry_date(entry, languages=None):
+    """
+    Fecha de una entrada de feedparser: primero los struct_time que feedparser
+    ya calculó (en UTC) y, si no hay, el texto de published/pubDate/updated.
+    """
+    started = time.perf_counter()
+    for key in ("published_parsed", "updated_parsed"):
+        parsed = entry.get(key)
+        if parsed:
+            dt = _from_struct(parsed)
+            if dt is not None:
+                _record("feedparser", started)
+                return dt
+
+    fecha = entry.get("published") or entry.get("pubDate") or entry.get("updated")
+    return parse_date(fecha, languages)
@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, fetch_articles_from_source, RSS_SOURCES, db
+from app import app, fetch_sources, RSS_SOURCES, db
 from datetime import datetime
 
 def download_all_sources():
@@ -17,20 +17,21 @@ def download_all_sources():
     total_articles = 0
     
     with app.app_context():
+        # Descargar 50 artículos por fuente para obtener más datos, todas en paralelo
+        results = fetch_sources(list(RSS_SOURCES.keys()), limit=50, enrich_pages=True)
+        
         for source_key, source_info in RSS_SOURCES.items():
+            result = results[source_key]
             print(f"\n📰 Procesando: {source_info['name']}")
             print(f"   URL: {source_info['url']}")
             print(f"   Web: {source_info['website']}")
             
-            try:
-                # Descargar 50 artículos por fuente para obtener más datos
-                nuevos = fetch_articles_from_source(source_key, limit=50)
-                total_articles += nuevos
-                print(f"   ✅ {nuevos} artículos nuevos agregados")
-                
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
+            if result['error']:
+                print(f"   ❌ Error: {result['error']}")
                 continue
+            
+            total_articles += result['nuevos']
+            print(f"   ✅ {result['nuevos']} artículos nuevos agregados ({result['elapsed']}s)")
     
     print("\n" + "=" * 60)
     print(f"🎉 Descarga completada!")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Etapa de enriquecimiento en segundo plano para News Aggregator Pro
+La ingesta guarda enseguida los metadatos del RSS; este hilo recoge por
+lotes los artículos que aún no tienen contenido extendido, descarga sus
+páginas con su propio pool de workers (respetando la cortesía por dominio,
+con el mismo limitador que la ingesta) y completa content_long, autor,
+sección y fecha.
+
+Igual que el motor de ingesta, no sabe nada de la base de datos: recibe
+funciones para cargar los pendientes y guardar los resultados.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from config_advanced import Config
+from ingestion import fetch_page
+from politeness import get_host_limiter
+
+
+class EnrichmentPipeline:
+    """
+    Hilo de enriquecimiento con su propio pool de descargas.
+
+    Args:
+        load_pending: f(limit) -> lista de dicts candidatos (con "id" y "url")
+        enrich_entry: f(candidato, respuesta_http) -> None (modifica el dict)
+        save_results: f(enriquecidos, fallidos) -> None
+        context: f() -> context manager para las llamadas a la base de datos
+            (p. ej. app.app_context)
+    """
+
+    def __init__(self, load_pending, enrich_entry, save_results, context=None,
+                 workers=None, batch_size=None, idle_sleep=None,
+                 page_fetcher=None, limiter_factory=get_host_limiter):
+        self.load_pending = load_pending
+        self.enrich_entry = enrich_entry
+        self.save_results = save_results
+        self.context = context or nullcontext
+        self.workers = workers or Config.ENRICH_WORKERS
+        self.batch_size = batch_size or Config.ENRICH_BATCH_SIZE
+        self.idle_sleep = idle_sleep or Config.ENRICH_IDLE_SLEEP
+        self.page_fetcher = page_fetcher or (lambda url: fetch_page(url, use_cache=True))
+        self.limiter_factory = limiter_factory
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._completed = deque()  # instantes de los últimos artículos enriquecidos
+        self._stats = {
+            "enriched": 0,
+            "failed": 0,
+            "batches": 0,
+            "in_flight": 0,
+            "errors": 0,
+            "last_error": None,
+            "last_batch_at": None,
+            "last_batch_seconds": 0.0,
+        }
+
+    # ---------- Control del hilo ----------
+    def start(self):
+        """Arranca el hilo (idempotente)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="enriquecimiento", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Avisa de que hay artículos nuevos sin esperar al siguiente sondeo"""
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------- Trabajo ----------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                processed = 0
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = str(e)
+            if processed < self.batch_size:
+                self._wake.wait(self.idle_sleep)
+                self._wake.clear()
+
+    def run_once(self):
+        """Procesa un lote de pendientes. Retorna cuántos artículos se intentaron"""
+        with self.context():
+            batch = self.load_pending(self.batch_size)
+        if not batch:
+            return 0
+
+        started = time.monotonic()
+        with self._lock:
+            self._stats["in_flight"] = len(batch)
+        try:
+            ok = asyncio.run(self._enrich_batch(batch))
+        finally:
+            with self._lock:
+                self._stats["in_flight"] = 0
+        enriched = [c for c, done in zip(batch, ok) if done]
+        failed = [c for c, done in zip(batch, ok) if not done]
+
+        with self.context():
+            self.save_results(enriched, failed)
+
+        now = time.monotonic()
+        with self._lock:
+            self._stats["enriched"] += len(enriched)
+            self._stats["failed"] += len(failed)
+            self._stats["batches"] += 1
+            self._stats["last_batch_at"] = time.time()
+            self._stats["last_batch_seconds"] = round(now - started, 3)
+            self._completed.extend([now] * len(enriched))
+        return len(batch)
+
+    async def _enrich_batch(self, batch):
+        limiter = self.limiter_factory()
+        semaphore = asyncio.Semaphore(self.workers)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="enriquecimiento")
+        loop = asyncio.get_running_loop()
+
+        async def enrich(candidato):
+            try:
+                async with limiter.slot(candidato["url"]):
+                    async with semaphore:
+                        page = await loop.run_in_executor(executor, self.page_fetcher, candidato["url"])
+                if page is None:
+                    return False
+                await loop.run_in_executor(executor, self.enrich_entry, candidato, page)
+                return True
+            except Exception:
+                return False
+
+        try:
+            return await asyncio.gather(*(enrich(c) for c in batch))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Contadores del proceso y artículos enriquecidos en el último minuto"""
+        now = time.monotonic()
+        with self._lock:
+            while self._completed and self._completed[0] < now - 60:
+                self._completed.popleft()
+            stats = dict(self._stats)
+            stats["per_minute"] = len(self._completed)
+        stats["running"] = self.running
+        stats["workers"] = self.workers
+        return stats
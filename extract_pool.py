@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Pool de procesos para la extracción de páginas en News Aggregator Pro
+Parsear HTML es trabajo de CPU que retiene el GIL: con hilos, un solo núcleo
+parsea mientras los demás esperan. Aquí la extracción corre en
+EXTRACT_PROCESSES procesos; a los workers solo se envían los bytes crudos
+de la página y vuelve un dict pequeño (extractor.extract_record). La red
+sigue en el lado asíncrono (ingestion.py / enrichment.py).
+
+Con EXTRACT_PROCESSES=0 la extracción se hace en el propio hilo.
+"""
+
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config_advanced import Config
+from extractor import extract_record
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _mp_context():
+    # forkserver: no se hace fork de un proceso con hilos activos, y solo se
+    # precarga el extractor (no la app Flask del proceso principal)
+    if sys.platform != "win32" and "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["extractor"])
+        return ctx
+    return None
+
+
+def get_pool():
+    """Pool compartido (se crea la primera vez); None si está desactivado"""
+    global _pool
+    if Config.EXTRACT_PROCESSES <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=Config.EXTRACT_PROCESSES, mp_context=_mp_context())
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def extract(content, content_type=None):
+    """
+    Extrae una página en el pool de procesos (bloquea el hilo que llama, no
+    el GIL). Si el pool se rompe (p. ej. un worker murió) o no puede
+    arrancar (script sin `if __name__ == "__main__"`, intérprete cerrándose)
+    se descarta y esta página se extrae en el propio hilo.
+    """
+    pool = get_pool()
+    if pool is None:
+        return extract_record(content, content_type)
+    try:
+        return pool.submit(extract_record, bytes(content), content_type).result()
+    except (BrokenProcessPool, RuntimeError):
+        shutdown_pool()
+        return extract_record(content, content_type)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Extractor de contenido de páginas de artículos para News Aggregator Pro
+Lee en una sola pasada el título, los párrafos y todas las meta etiquetas
+relevantes (fecha, autor, sección, descripción). Decodifica desde bytes con
+el charset declarado en vez de adivinarlo.
+
+Usa lxml si está instalado; si no, el parser incremental de la librería
+estándar (html.parser), que evita construir el árbol completo de
+BeautifulSoup.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Meta etiquetas por orden de preferencia (name o property)
+DATE_META = ("article:published_time", "date", "og:updated_time")
+AUTHOR_META = ("author", "article:author", "twitter:creator")
+SECTION_META = ("article:section", "section", "og:section")
+DESCRIPTION_META = ("description", "og:description")
+
+MIN_PARAGRAPH_LEN = 30  # párrafos más cortos suelen ser pies de foto, botones, etc.
+
+_PARAGRAPH = re.compile(rb"<p[\s>](.*?)</p\s*>", re.I | re.S)
+_TAG = re.compile(rb"<[^>]*>")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""", re.I)
+
+
+def _valid_charset(name):
+    try:
+        return codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+
+
+def declared_charset(content, content_type=None):
+    """Charset declarado en la cabecera Content-Type o en <meta> (primeros 2 KB)"""
+    if content_type and "charset=" in content_type.lower():
+        charset = content_type.lower().split("charset=")[-1].split(";")[0].strip(" \"'")
+        if _valid_charset(charset):
+            return _valid_charset(charset)
+    match = _META_CHARSET.search(content[:2048])
+    if match:
+        return _valid_charset(match.group(1).decode("ascii", "ignore"))
+    return None
+
+
+def decode_html(content, content_type=None):
+    """Decodifica bytes HTML con el charset declarado (utf-8 y cp1252 como respaldo)"""
+    if isinstance(content, str):
+        return content
+    charset = declared_charset(content, content_type)
+    if charset:
+        return content.decode(charset, errors="replace")
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("cp1252", errors="replace")
+
+
+class _PageParser(HTMLParser):
+    """Parser de una sola pasada: título, párrafos y meta etiquetas"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.paragraphs = []
+        self.meta = {}
+        self._paragraph = None
+        self._title_parts = None
+        self._skip = 0
+
+    def _close_paragraph(self):
+        if self._paragraph is not None:
+            self.paragraphs.append(" ".join(self._paragraph))
+            self._paragraph = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            self._close_paragraph()
+            self._paragraph = []
+        elif tag == "meta":
+            attrs = dict(attrs)
+            key = (attrs.get("property") or attrs.get("name") or "").lower()
+            if key and attrs.get("content") is not None and key not in self.meta:
+                self.meta[key] = attrs["content"]
+        elif tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p":
+            self._close_paragraph()
+        elif tag == "title" and self._title_parts is not None:
+            self.title = " ".join(self._title_parts)
+            self._title_parts = None
+        elif tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        text = data.strip()
+        if not text:
+            return
+        if self._paragraph is not None:
+            self._paragraph.append(text)
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+
+    def close(self):
+        super().close()
+        self._close_paragraph()
+
+
+def _parse_stdlib(html):
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser.title, parser.paragraphs, parser.meta
+
+
+def _parse_lxml(html):
+    doc = lxml.html.fromstring(html)
+    title = None
+    paragraphs = []
+    meta = {}
+    for el in doc.iter("p", "meta", "title"):
+        if el.tag == "p":
+            paragraphs.append(" ".join(t.strip() for t in el.itertext() if t.strip()))
+        elif el.tag == "meta":
+            key = (el.get("property") or el.get("name") or "").lower()
+            if key and el.get("content") is not None and key not in meta:
+                meta[key] = el.get("content")
+        elif title is None:
+            title = " ".join(t.strip() for t in el.itertext() if t.strip())
+    return title, paragraphs, meta
+
+
+def _first_meta(meta, keys):
+    for key in keys:
+        value = (meta.get(key) or "").strip()
+        if value:
+            return value
+    return None
+
+
+def extract_page(content, content_type=None, min_paragraph_len=MIN_PARAGRAPH_LEN):
+    """
+    Extrae los datos de una página de artículo.
+
+    Args:
+        content: bytes (o str) del HTML
+        content_type: cabecera Content-Type de la respuesta, para el charset
+
+    Retorna: dict con title, paragraphs (solo los de más de
+    `min_paragraph_len` caracteres), meta (todas las meta etiquetas por
+    name/property en minúsculas) y date, author, section, description
+    resueltos desde las meta etiquetas.
+    """
+    html = decode_html(content, content_type)
+    title, paragraphs, meta = (None, [], {})
+    if html.strip():
+        if LXML_AVAILABLE:
+            try:
+                title, paragraphs, meta = _parse_lxml(html)
+            except (ValueError, lxml.etree.ParserError):
+                title, paragraphs, meta = _parse_stdlib(html)
+        else:
+            title, paragraphs, meta = _parse_stdlib(html)
+
+    return {
+        "title": title or None,
+        "paragraphs": [p for p in paragraphs if len(p) > min_paragraph_len],
+        "meta": meta,
+        "date": _first_meta(meta, DATE_META),
+        "author": _first_meta(meta, AUTHOR_META),
+        "section": _first_meta(meta, SECTION_META),
+        "description": _first_meta(meta, DESCRIPTION_META),
+    }
+
+
+def extract_record(content, content_type=None, max_paragraphs=12):
+    """
+    Versión compacta de extract_page para los procesos de extracción: sin el
+    dict completo de meta etiquetas y con solo los primeros párrafos, para
+    que el resultado que vuelve del worker sea pequeño.
+    """
+    page = extract_page(content, content_type)
+    return {
+        "title": page["title"],
+        "paragraphs": page["paragraphs"][:max_paragraphs],
+        "date": page["date"],
+        "author": page["author"],
+        "section": page["section"],
+        "description": page["description"],
+    }
+
+
+def count_paragraphs(content, start=0, min_len=MIN_PARAGRAPH_LEN):
+    """
+    Cuenta aproximada de párrafos con texto en bytes HTML aún incompletos,
+    sin parsear: sirve para cortar una descarga en cuanto hay suficiente
+    texto. Retorna (párrafos encontrados, posición desde la que seguir).
+    """
+    found = 0
+    pos = start
+    for match in _PARAGRAPH.finditer(content, start):
+        text = b" ".join(_TAG.sub(b" ", match.group(1)).split())
+        if len(text) > min_len:
+            found += 1
+        pos = match.end()
+    return found, pos
+
+
+class _TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        text = data.strip()
+        if text:
+            self.parts.append(text)
+
+
+def html_to_text(html):
+    """Texto plano de un fragmento HTML (p. ej. el summary de una entrada RSS)"""
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return html.strip()
+    parser = _TextParser()
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.parts)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Contenido completo desde el propio feed para News Aggregator Pro
+Muchos feeds traen el cuerpo entero de cada artículo (content:encoded en
+RSS, <content> en Atom, o una description larga). En ese caso content_long
+se saca de la entrada con el mismo extractor de párrafos que las páginas y
+no hace falta descargar la página del artículo; si el contenido falta o es
+demasiado corto (menos de FEED_CONTENT_MIN_CHARS), la página se descarga
+como siempre.
+
+Los contadores por fuente muestran qué feeds traen contenido completo.
+
+Cada artículo guarda además un hash de su contenido en el feed (título,
+resumen y contenido) y la fecha `updated` de la entrada. Cuando una URL ya
+conocida vuelve a aparecer, entry_changed() decide sin tocar la red si hay
+que actualizarla (correcciones, entradillas nuevas) o se puede saltar. Los
+artículos guardados antes de tener hash no tienen con qué comparar: la
+primera vez que reaparecen solo anotan el hash de la entrada de ese momento,
+así que una corrección publicada antes no se les aplica.
+"""
+
+import hashlib
+import threading
+
+from config_advanced import Config
+from dates import parse_date
+from extractor import extract_page, html_to_text
+
+MAX_PARAGRAPHS = 10  # los mismos que se guardan de una página descargada
+
+_stats = {"entries": 0, "from_feed": 0, "too_short": 0, "missing": 0, "known": 0, "changed": 0}
+_sources = {}  # source_key -> {"entries", "from_feed"}
+_stats_lock = threading.Lock()
+
+
+def feed_content_stats():
+    """
+    Entradas con contenido del feed, demasiado corto o sin contenido (en
+    total y por fuente), y entradas ya conocidas revisadas frente a cambiadas
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+        stats["sources"] = {key: dict(counts) for key, counts in _sources.items()}
+        return stats
+
+
+def _fragments(entry):
+    """Textos HTML candidatos de una entrada: sus content y el summary"""
+    values = [c.get("value") for c in entry.get("content") or [] if c.get("value")]
+    if entry.get("summary"):
+        values.append(entry["summary"])
+    return values
+
+
+def fragment_text(html, max_paragraphs=MAX_PARAGRAPHS):
+    """Texto de un fragmento HTML: sus párrafos <p> como en una página o, si no tiene, el texto entero"""
+    paragraphs = extract_page(html)["paragraphs"] if "<p" in html.lower() else []
+    if paragraphs:
+        return " ".join(paragraphs[:max_paragraphs])
+    return html_to_text(html)
+
+
+def entry_content(entry, source_key=None, min_chars=None):
+    """
+    content_long sacado de la entrada del feed, o None si no trae contenido
+    suficiente (entonces hay que descargar la página).
+    """
+    min_chars = Config.FEED_CONTENT_MIN_CHARS if min_chars is None else min_chars
+    text = max((fragment_text(html) for html in _fragments(entry)), key=len, default="")
+    outcome = "from_feed" if len(text) >= min_chars else ("too_short" if text else "missing")
+    with _stats_lock:
+        _stats["entries"] += 1
+        _stats[outcome] += 1
+        if source_key:
+            counts = _sources.setdefault(source_key, {"entries": 0, "from_feed": 0})
+            counts["entries"] += 1
+            counts["from_feed"] += outcome == "from_feed"
+    return text if outcome == "from_feed" else None
+
+
+def content_hash(title, summary, content=None):
+    """
+    Hash del contenido de una entrada: título, resumen en texto (como se
+    guarda en articles.summary) y el HTML de su contenido si lo trae.
+    """
+    text = "\x1f".join((title or "", summary or "", content or ""))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def raw_content(entry):
+    """HTML del primer contenido de una entrada (content:encoded / <content>), o None"""
+    for c in entry.get("content") or []:
+        if c.get("value"):
+            return c["value"]
+    return None
+
+
+def entry_updated(entry, languages=None):
+    """Fecha `updated` de la entrada, o None (sin el respaldo a `published` de feedparser)"""
+    return parse_date(dict.get(entry, "updated"), languages)
+
+
+def entry_changed(stored_hash, stored_updated, new_hash, new_updated):
+    """
+    True si una entrada ya guardada cambió. Si las dos versiones traen
+    `updated` y la nueva no es posterior se da por igual; si no, decide el
+    hash del contenido.
+    """
+    if stored_updated and new_updated and new_updated <= stored_updated:
+        changed = False
+    else:
+        changed = stored_hash != new_hash
+    with _stats_lock:
+        _stats["known"] += 1
+        _stats["changed"] += changed
+    return changed
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Parser en streaming de feeds RSS 2.0 y Atom 1.0 para News Aggregator Pro
+feedparser construye el feed completo en memoria y resuelve en Python todas
+las rarezas de cada formato, aunque luego solo se usen las primeras
+entradas. Para las formas habituales de RSS 2.0 y Atom este parser lee el
+XML por bloques (XMLPullParser) y entrega las entradas de una en una, ya
+como FeedParserDict con las mismas claves que usa la ingesta (title, link,
+id, summary, content, published, updated, author, tags). Quien lo consume
+puede cortar en `limit` o en la marca de agua sin parsear el resto, y cada
+entrada se quita del árbol XML en cuanto se entrega. Un feed descargado se
+lee según llega de la red (prefetch() en el hilo de la descarga) y la
+descarga se corta tras las entradas pedidas o al llegar a la entrada de la
+marca de agua: la memoria depende de las entradas recorridas, no del tamaño
+del feed.
+
+Los feeds que no entiende (RSS 1.0/RDF, Atom 0.3, XML mal formado,
+entidades HTML, codificaciones distintas de UTF-8 anunciadas por HTTP) se
+leen con feedparser, también si el error aparece a mitad del documento.
+"""
+
+import threading
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+import feedparser
+
+from config_advanced import Config
+from watermark import entry_key
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+
+CHUNK_SIZE = 16 * 1024  # bloques pequeños: cada uno construye a lo sumo unas decenas de entradas
+_TEXT_TYPES = {"text": "text/plain", "html": "text/html", "xhtml": "application/xhtml+xml"}
+
+_stats = {"streamed": 0, "fallback": 0, "entries": 0}
+_stats_lock = threading.Lock()
+
+
+def parse_stats():
+    """
+    Feeds leídos en streaming hasta el final o hasta cortar la lectura, con
+    feedparser (incluye los que fallaron a mitad de documento), y entradas
+    entregadas en streaming
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+class _Unsupported(Exception):
+    """Formato que el parser rápido no maneja: se usa feedparser"""
+
+
+def _text(elem):
+    return (elem.text or "").strip()
+
+
+def _atom_text(elem):
+    """Texto de un elemento Atom (text, html o xhtml)"""
+    kind = elem.get("type", "text")
+    if kind == "xhtml":
+        return " ".join("".join(elem.itertext()).split())
+    return _text(elem)
+
+
+def _detail(value, kind):
+    return feedparser.FeedParserDict(type=kind, value=value)
+
+
+def _tag(term, scheme=None):
+    return feedparser.FeedParserDict(term=term, scheme=scheme, label=None)
+
+
+def _link(rel, href, kind=None):
+    return feedparser.FeedParserDict(rel=rel, href=href, type=kind or "text/html")
+
+
+def _rss_item(item, base):
+    entry = feedparser.FeedParserDict()
+    links, tags, content = [], [], []
+    for child in item:
+        tag, text = child.tag, _text(child)
+        if tag == "title":
+            entry["title"] = text
+        elif tag == "link" and text:
+            entry["link"] = urljoin(base, text)
+            links.append(_link("alternate", entry["link"]))
+        elif tag == "guid" and text:
+            entry["id"] = text
+            entry["guidislink"] = child.get("isPermaLink", "true") != "false"
+        elif tag == "description":
+            entry["summary"] = text
+        elif tag == CONTENT + "encoded":
+            content.append(_detail(text, "text/html"))
+        elif tag == "pubDate":
+            entry["published"] = text
+        elif tag in (DC + "date", ATOM + "updated"):
+            entry["updated"] = text
+        elif tag in ("author", DC + "creator") and text and "author" not in entry:
+            entry["author"] = text
+        elif tag in ("category", DC + "subject") and text:
+            tags.append(_tag(text, child.get("domain")))
+        elif tag == ATOM + "link" and child.get("href"):
+            links.append(_link(child.get("rel", "alternate"), urljoin(base, child.get("href")), child.get("type")))
+    if "link" not in entry and entry.get("guidislink"):
+        entry["link"] = entry["id"]
+    if content:
+        entry["content"] = content
+        entry.setdefault("summary", content[0]["value"])
+    if links:
+        entry["links"] = links
+    if tags:
+        entry["tags"] = tags
+    if "author" in entry:
+        entry["authors"] = [feedparser.FeedParserDict(name=entry["author"])]
+    return entry
+
+
+def _atom_entry(elem, base):
+    entry = feedparser.FeedParserDict()
+    links, tags, content = [], [], []
+    for child in elem:
+        tag = child.tag
+        if tag == ATOM + "title":
+            entry["title"] = _atom_text(child)
+        elif tag == ATOM + "link" and child.get("href"):
+            rel = child.get("rel", "alternate")
+            href = urljoin(base, child.get("href"))
+            links.append(_link(rel, href, child.get("type")))
+            if rel == "alternate" and "link" not in entry:
+                entry["link"] = href
+        elif tag == ATOM + "id":
+            entry["id"] = _text(child)
+        elif tag == ATOM + "summary":
+            entry["summary"] = _atom_text(child)
+        elif tag == ATOM + "content":
+            if child.get("src"):
+                continue  # contenido fuera del feed
+            content.append(_detail(_atom_text(child), _TEXT_TYPES.get(child.get("type", "text"), child.get("type"))))
+        elif tag == ATOM + "published":
+            entry["published"] = _text(child)
+        elif tag == ATOM + "updated":
+            entry["updated"] = _text(child)
+        elif tag == ATOM + "author" and "author" not in entry:
+            name = child.find(ATOM + "name")
+            if name is not None and _text(name):
+                entry["author"] = _text(name)
+        elif tag == ATOM + "category" and child.get("term"):
+            tags.append(_tag(child.get("term"), child.get("scheme")))
+    if content:
+        entry["content"] = content
+        entry.setdefault("summary", content[0]["value"])
+    if links:
+        entry["links"] = links
+    if tags:
+        entry["tags"] = tags
+    if "author" in entry:
+        entry["authors"] = [feedparser.FeedParserDict(name=entry["author"])]
+    return entry
+
+
+def _declared_charset(content_type):
+    for part in (content_type or "").split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset":
+            return value.strip("\"' ").lower()
+    return None
+
+
+class StreamedFeed(feedparser.FeedParserDict):
+    """
+    Resultado de parse_feed(): se usa como el de feedparser.parse (claves
+    status, etag, feed...), pero las entradas se leen con iter_entries().
+
+    `feed` (título, enlace, links del canal) tiene lo que aparece antes de
+    la primera entrada, que es donde RSS y Atom ponen la cabecera del canal
+    (y los enlaces rel="hub" de WebSub). Las entradas ya leídas se guardan
+    para poder recorrerlas otra vez (p. ej. para calcular la marca de agua).
+    """
+
+    def __init__(self, content, content_type=None, url=None):
+        super().__init__(feed=feedparser.FeedParserDict(), bozo=0)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            self._content, self._body, self._raw = content, None, None
+        else:
+            # Bloques según llegan de la red: se guardan los ya leídos por si
+            # hay que volver a feedparser a mitad del documento
+            self._content, self._body, self._raw = None, iter(content), bytearray()
+        self._content_type = content_type
+        self._url = url or ""
+        self._seen = []
+        self._pending = []
+        self._stream = self._parse()
+        self.streamed = True
+        self._counted = False
+        try:
+            self._fill()  # cabecera del canal y formato antes de la primera entrada
+        except StopIteration:
+            pass
+
+    # ----- lectura -----
+    def _parse(self):
+        charset = _declared_charset(self._content_type)
+        if not Config.FEED_FAST_PARSER or charset not in (None, "utf-8", "utf8", "us-ascii"):
+            yield from self._fallback()
+            return
+        try:
+            yield from self._pull()
+        except (ET.ParseError, _Unsupported):
+            yield from self._fallback()
+
+    def _chunks(self):
+        if self._body is None:
+            view = memoryview(self._content)
+            for offset in range(0, max(len(view), 1), CHUNK_SIZE):
+                yield view[offset:offset + CHUNK_SIZE].tobytes()
+            return
+        for chunk in self._body:
+            self._raw += chunk
+            yield chunk
+
+    def _pull(self):
+        parser = ET.XMLPullParser(events=("start", "end"))
+        stack, kind, container = [], None, None
+        meta = self["feed"]
+        links = []
+        for chunk in self._chunks():
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if kind is None:
+                        if elem.tag == "rss":
+                            kind = "rss"
+                        elif elem.tag == ATOM + "feed":
+                            kind, container = "atom", elem
+                        else:
+                            raise _Unsupported(elem.tag)
+                    elif kind == "rss" and container is None and elem.tag == "channel":
+                        container = elem
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                parent = stack[-1] if stack else None
+                if parent is None or parent is not container:
+                    continue
+                if elem.tag in ("item", ATOM + "entry"):
+                    entry = _rss_item(elem, self._url) if kind == "rss" else _atom_entry(elem, self._url)
+                    container.remove(elem)  # memoria constante: la entrada ya no hace falta en el árbol
+                    yield entry
+                elif elem.tag in ("title", ATOM + "title"):
+                    meta.setdefault("title", _atom_text(elem) if kind == "atom" else _text(elem))
+                elif elem.tag == "link" and _text(elem):
+                    meta.setdefault("link", _text(elem))
+                    links.append(_link("alternate", _text(elem)))
+                elif elem.tag == ATOM + "link" and elem.get("href"):
+                    rel = elem.get("rel", "alternate")
+                    links.append(_link(rel, urljoin(self._url, elem.get("href")), elem.get("type")))
+                    if rel == "alternate":
+                        meta.setdefault("link", links[-1]["href"])
+                if links:
+                    meta["links"] = links
+        parser.close()
+        self._done()
+
+    def _done(self):
+        # Solo cuenta en streaming un feed que no acabó en feedparser
+        if self.streamed and not self._counted:
+            self._counted = True
+            _count("streamed")
+
+    def _fallback(self):
+        """Lee el documento con feedparser, sin repetir las entradas ya entregadas"""
+        self.streamed = False
+        _count("fallback")
+        if self._body is not None:
+            self._raw += b"".join(self._body)  # el resto del documento
+            self._content, self._raw = bytes(self._raw), None
+        parsed = feedparser.parse(self._content, response_headers={
+            "content-type": self._content_type or "",
+            "content-location": self._url,
+        })
+        self["feed"] = parsed.feed
+        self["bozo"] = parsed.get("bozo", 0)
+        if parsed.get("bozo_exception") is not None:
+            self["bozo_exception"] = parsed.bozo_exception
+        yield from parsed.entries[len(self._seen) + len(self._pending):]
+
+    def _fill(self):
+        self._pending.append(next(self._stream))
+
+    def _next(self):
+        if not self._pending:
+            self._fill()
+        entry = self._pending.pop(0)
+        self._seen.append(entry)
+        if self.streamed:
+            _count("entries")
+        return entry
+
+    # ----- interfaz pública -----
+    def prefetch(self, limit=None, stop_at=None):
+        """
+        Lee ya, en el hilo que llama, las primeras `limit` entradas (todas con
+        None), o hasta la entrada cuyo entry_key es `stop_at` (la marca de
+        agua, incluida), y suelta el resto del documento: con un feed
+        descargado, la descarga se puede cerrar y el feed se queda con esas
+        entradas.
+        """
+        reached = stop_at is not None and any(entry_key(e) == stop_at for e in self._seen + self._pending)
+        try:
+            while not reached and (limit is None or len(self._seen) + len(self._pending) < limit):
+                self._fill()
+                reached = stop_at is not None and entry_key(self._pending[-1]) == stop_at
+        except StopIteration:
+            pass
+        self._stream.close()
+        self._stream = iter(())
+        self._done()
+        self._body = self._raw = None
+        return self
+
+    def iter_entries(self):
+        """Entradas en el orden del feed; las ya leídas se repiten sin volver a parsear"""
+        index = 0
+        while True:
+            if index < len(self._seen):
+                yield self._seen[index]
+            else:
+                try:
+                    yield self._next()
+                except StopIteration:
+                    return
+            index += 1
+
+    def seen_entries(self):
+        """Entradas leídas hasta ahora"""
+        return list(self._seen)
+
+    @property
+    def entries(self):
+        """Todas las entradas (lee el resto del documento)"""
+        return list(self.iter_entries())
+
+
+def parse_feed(content, content_type=None, url=None):
+    """
+    Feed RSS/Atom de `content` (bytes, o un iterable de bloques de bytes
+    según llegan de la red). Retorna un StreamedFeed que lee las entradas
+    bajo demanda.
+    """
+    return StreamedFeed(content, content_type, url)
+
+
+def iter_entries(feed):
+    """Entradas de un feed de parse_feed() (en streaming) o de feedparser.parse()"""
+    if isinstance(feed, StreamedFeed):
+        return feed.iter_entries()
+    return iter(feed.get("entries", []))
+
+
+def seen_entries(feed):
+    """Entradas ya recorridas (streaming) o todas (feedparser)"""
+    if isinstance(feed, StreamedFeed):
+        return feed.seen_entries()
+    return feed.get("entries", [])
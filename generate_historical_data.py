@@ -12,7 +12,7 @@ import random
 # Agregar el directorio actual al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Article, RSS_SOURCES
+from app import app, Article, RSS_SOURCES, insert_articles
 
 def generate_historical_articles():
     """Genera artículos históricos de ejemplo"""
@@ -25,6 +25,7 @@ def generate_historical_articles():
         
         # Generar artículos para los últimos 30 días
         articles_created = 0
+        rows = []
         
         for days_ago in range(30):
             # Fecha del artículo
@@ -55,10 +56,6 @@ def generate_historical_articles():
                 # Generar URL única
                 url = f"https://{source_info['website'].replace('https://', '')}/noticia-{days_ago}-{i}-{random.randint(1000, 9999)}"
                 
-                # Verificar si ya existe
-                if Article.query.filter_by(url=url).first():
-                    continue
-                
                 # Generar resumen
                 summaries = [
                     f"Este es un resumen de la noticia del {article_date.strftime('%d/%m/%Y')} que cubre aspectos importantes del tema.",
@@ -98,32 +95,27 @@ def generate_historical_articles():
                 ]
                 section = random.choice(sections)
                 
-                # Crear artículo
-                article = Article(
-                    url=url,
-                    title=title,
-                    date_iso=article_date.strftime('%Y-%m-%dT%H:%M:%S'),
-                    summary=summary,
-                    author=author,
-                    section=section,
-                    content_long=content_long,
-                    source=source,
-                    is_favorite=random.choice([True, False]),
-                    created_at=article_date
-                )
-                
-                try:
-                    db.session.add(article)
-                    db.session.commit()
-                    articles_created += 1
-                    
-                    if articles_created % 10 == 0:
-                        print(f"✅ {articles_created} artículos históricos creados...")
-                        
-                except Exception as e:
-                    db.session.rollback()
-                    print(f"❌ Error creando artículo: {e}")
-                    continue
+                # Crear artículo (las URLs repetidas las descarta la base de datos)
+                rows.append({
+                    "url": url,
+                    "title": title,
+                    "date_iso": article_date.strftime('%Y-%m-%dT%H:%M:%S'),
+                    "summary": summary,
+                    "author": author,
+                    "section": section,
+                    "content_long": content_long,
+                    "source": source,
+                    "is_favorite": random.choice([True, False]),
+                    "created_at": article_date,
+                })
+            
+            # Una transacción por día de datos
+            try:
+                articles_created += len(insert_articles(rows))
+                print(f"✅ {articles_created} artículos históricos creados...")
+            except Exception as e:
+                print(f"❌ Error creando artículos del {article_date.strftime('%d/%m/%Y')}: {e}")
+            rows = []
         
         print(f"\n🎉 ¡Generación completada!")
         print(f"📊 Total de artículos históricos creados: {articles_created}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Salud de las fuentes RSS para News Aggregator Pro
+Lleva por fuente la latencia y la tasa de error recientes (medias móviles
+exponenciales) y un circuit breaker: tras HEALTH_FAILURE_THRESHOLD fallos
+seguidos la fuente se pausa y se vuelve a probar con espera exponencial
+(HEALTH_BACKOFF_BASE, el doble en cada fallo, hasta HEALTH_BACKOFF_MAX).
+Un acierto cierra el circuito.
+
+Las funciones trabajan sobre cualquier objeto con los atributos de
+SourceHealth (latency, error_rate, consecutive_failures, checks,
+last_success, last_failure, last_error, open_until).
+"""
+
+from datetime import datetime, timedelta
+
+from config_advanced import Config
+
+# Estados que muestra /sources/status
+STATE_OK = "ok"
+STATE_DEGRADED = "degraded"
+STATE_OPEN = "open"
+STATE_UNKNOWN = "unknown"
+
+
+def _ewma(previous, value, alpha=None):
+    alpha = Config.HEALTH_EWMA_ALPHA if alpha is None else alpha
+    if previous is None:
+        return value
+    return alpha * value + (1 - alpha) * previous
+
+
+def backoff_seconds(failures):
+    """Pausa tras `failures` fallos seguidos (0 si aún no se abre el circuito)"""
+    over = failures - Config.HEALTH_FAILURE_THRESHOLD
+    if over < 0:
+        return 0
+    return min(Config.HEALTH_BACKOFF_BASE * 2 ** over, Config.HEALTH_BACKOFF_MAX)
+
+
+def record_check(health, ok, latency=None, error=None, now=None):
+    """Actualiza la salud con el resultado de una lectura del feed"""
+    now = now or datetime.utcnow()
+    health.checks = (health.checks or 0) + 1
+    health.error_rate = round(_ewma(health.error_rate, 0.0 if ok else 1.0), 4)
+    if ok:
+        if latency is not None:
+            health.latency = round(_ewma(health.latency, latency), 3)
+        health.last_success = now
+        health.consecutive_failures = 0
+        health.open_until = None
+    else:
+        health.consecutive_failures = (health.consecutive_failures or 0) + 1
+        health.last_failure = now
+        health.last_error = (error or "error desconocido")[:500]
+        pause = backoff_seconds(health.consecutive_failures)
+        health.open_until = now + timedelta(seconds=pause) if pause else None
+    return health
+
+
+def is_available(health, now=None):
+    """True si la fuente se puede leer (sin datos, circuito cerrado o pausa vencida)"""
+    if health is None or health.open_until is None:
+        return True
+    return health.open_until <= (now or datetime.utcnow())
+
+
+def source_state(health, now=None):
+    if health is None or not health.checks:
+        return STATE_UNKNOWN
+    if not is_available(health, now):
+        return STATE_OPEN
+    if health.consecutive_failures or (health.error_rate or 0) >= 0.5:
+        return STATE_DEGRADED
+    return STATE_OK
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP compartido para News Aggregator Pro
+Una sola requests.Session para feeds y páginas de artículos:
+
+- pools de conexiones keep-alive por host (sin TCP + TLS nuevo en cada petición)
+- negociación de compresión (gzip/deflate, y br/zstd si están instalados
+  brotli o zstandard)
+- caché de DNS con TTL (LRU acotada), para no resolver el mismo host en cada
+  conexión; solo la usan las conexiones de esta sesión, no el resto del proceso
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config_advanced import Config
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# ---------- Caché de DNS ----------
+# Solo la usan las conexiones de la sesión compartida: socket.getaddrinfo no se toca
+_dns_cache = OrderedDict()  # (host, port) -> (caduca, direcciones), en orden LRU
+_dns_lock = threading.Lock()
+_dns_stats = {"hits": 0, "misses": 0}
+DNS_CACHE_MAX = 4096
+
+
+def _resolve(host, port):
+    """Direcciones de getaddrinfo para (host, port), reutilizadas durante DNS_CACHE_TTL (los errores no se cachean)"""
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _dns_cache.move_to_end(key)
+            _dns_stats["hits"] += 1
+            return cached[1]
+        _dns_stats["misses"] += 1
+    result = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    with _dns_lock:
+        _dns_cache[key] = (now + Config.DNS_CACHE_TTL, result)
+        _dns_cache.move_to_end(key)
+        while len(_dns_cache) > DNS_CACHE_MAX:
+            _dns_cache.popitem(last=False)
+    return result
+
+
+def _forget(host, port):
+    with _dns_lock:
+        _dns_cache.pop((host, port), None)
+
+
+def clear_dns_cache():
+    with _dns_lock:
+        _dns_cache.clear()
+
+
+class _CachedDNSMixin:
+    """Conexión de urllib3 que resuelve el host con la caché de DNS (el TLS sigue usando el nombre)"""
+
+    def _new_conn(self):
+        if Config.DNS_CACHE_TTL <= 0:
+            return super()._new_conn()
+        try:
+            addresses = _resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        error = None
+        for *_, sockaddr in addresses:
+            try:
+                return connection.create_connection((sockaddr[0], self.port), self.timeout,
+                                                    source_address=self.source_address,
+                                                    socket_options=self.socket_options)
+            except OSError as e:
+                error = e
+        # Ninguna dirección responde: puede que haya cambiado, se vuelve a resolver la próxima vez
+        _forget(self._dns_host, self.port)
+        if isinstance(error, socket.timeout):
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from error
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+
+class _CachedDNSHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class _CachedDNSHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDNSHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+
+class _CachedDNSHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter cuyos pools de conexiones resuelven los hosts con la caché de DNS"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CachedDNSHTTPPool, "https": _CachedDNSHTTPSPool}
+
+
+# ---------- Sesión compartida ----------
+def get_session():
+    """requests.Session compartida por todo el proceso (creada la primera vez)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = CachedDNSAdapter(pool_connections=Config.HTTP_POOL_HOSTS,
+                                           pool_maxsize=Config.HTTP_POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+
+def get(url, **kwargs):
+    """GET con la sesión compartida (mismos argumentos que requests.get)"""
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST con la sesión compartida (mismos argumentos que requests.post)"""
+    return get_session().post(url, **kwargs)
+
+
+def http_stats():
+    """Conexiones abiertas frente a peticiones por host, y aciertos de la caché de DNS"""
+    hosts = {}
+    if _session is not None:
+        adapter = _session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats = hosts.setdefault(pool.host, {"connections": 0, "requests": 0})
+            stats["connections"] += pool.num_connections
+            stats["requests"] += pool.num_requests
+    connections = sum(h["connections"] for h in hosts.values())
+    requests_made = sum(h["requests"] for h in hosts.values())
+    with _dns_lock:
+        dns = dict(_dns_stats)
+    return {
+        "connections": connections,
+        "requests": requests_made,
+        "reused": max(0, requests_made - connections),
+        "hosts": hosts,
+        "dns": dns,
+    }
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Motor de ingesta asíncrono para News Aggregator Pro
+Descarga feeds RSS y páginas de artículos en paralelo, con un límite global
+de concurrencia, límites de cortesía por dominio y un plazo total para toda
+la actualización.
+
+El motor no conoce la base de datos: recibe callbacks para seleccionar las
+entradas nuevas de cada feed, enriquecerlas con la página descargada y
+guardarlas. Así lo pueden usar /refresh, /update-all, el scheduler y los
+scripts de descarga masiva.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import feedparser
+import requests
+import urllib3
+
+import http_client
+from config_advanced import Config
+from extractor import count_paragraphs
+from feed_stream import CHUNK_SIZE, parse_feed
+from page_cache import get_page_cache
+from politeness import get_host_limiter
+
+SAVE_GRACE = 2.0  # segundos extra para guardar lo ya descargado al vencer el plazo
+
+
+def fetch_feed(url, etag=None, modified=None, limit=None, stop_at=None, timeout=15):
+    """
+    Descarga y parsea un feed RSS/Atom (bloqueante) con GET condicional.
+
+    Si se pasan los validadores de la última descarga (ETag / Last-Modified)
+    se envían como If-None-Match / If-Modified-Since. Ante un 304 no se parsea
+    nada: se retorna un resultado vacío con status 304 y los mismos
+    validadores. Igual que feedparser.parse(url), el resultado expone
+    `status`, `etag` y `modified`.
+
+    El cuerpo se parsea en streaming según llega, en el hilo que llama: se
+    leen solo las primeras `limit` entradas (todas con None), o hasta la
+    entrada cuyo entry_key es `stop_at` (la marca de agua de la fuente), y
+    la descarga se corta ahí, sin traer el resto del feed.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+
+    r = http_client.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        if r.status_code == 304:
+            return feedparser.FeedParserDict(
+                status=304, entries=[], feed=feedparser.FeedParserDict(),
+                etag=etag, modified=modified,
+            )
+        r.raise_for_status()
+        feed = parse_feed(r.iter_content(CHUNK_SIZE), r.headers.get("Content-Type"), url).prefetch(limit, stop_at)
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise requests.ConnectionError(e)
+    finally:
+        r.close()
+    feed["status"] = r.status_code
+    feed["etag"] = r.headers.get("ETag")
+    feed["modified"] = r.headers.get("Last-Modified")
+    feed["link_header"] = r.headers.get("Link")  # descubrimiento de hubs WebSub
+    return feed
+
+
+class FetchedPage:
+    """Página descargada (posiblemente truncada), con la interfaz básica de requests.Response"""
+
+    def __init__(self, url, content, status_code, headers, truncated=None):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers
+        self.truncated = truncated  # None, "max_bytes", "deadline", "enough_text" o "read_error"
+        self.from_cache = False
+
+    @property
+    def ok(self):
+        return 200 <= (self.status_code or 0) < 400
+
+
+# Contadores de descargas de páginas del proceso (ver fetch_stats())
+_fetch_stats = {
+    "pages": 0,
+    "bytes": 0,
+    "truncated_max_bytes": 0,
+    "truncated_deadline": 0,
+    "early_stop": 0,
+    "read_errors": 0,
+}
+_fetch_stats_lock = threading.Lock()
+_TRUNCATION_COUNTERS = {
+    "max_bytes": "truncated_max_bytes",
+    "deadline": "truncated_deadline",
+    "enough_text": "early_stop",
+    "read_error": "read_errors",
+}
+
+
+def fetch_stats():
+    """Copia de los contadores de descarga (páginas, bytes y truncados por motivo)"""
+    with _fetch_stats_lock:
+        return dict(_fetch_stats)
+
+
+def _response_socket(r):
+    """Socket de una respuesta en streaming, o None si la pila HTTP no lo expone (o ya se cerró)"""
+    fp = getattr(getattr(r.raw, "_fp", None), "fp", None)
+    return getattr(getattr(fp, "raw", None), "_sock", None)
+
+
+def _iter_body(r, chunk_size, deadline_at=None):
+    """
+    Lee el cuerpo según llega (read1), sin esperar a llenar cada bloque. Con
+    `deadline_at` cada lectura espera como mucho hasta ese instante (el
+    timeout del socket se ajusta a lo que queda del plazo).
+    """
+    raw = r.raw
+    if hasattr(raw, "read1"):
+        while True:
+            if deadline_at is not None:
+                sock = _response_socket(r)
+                if sock is not None:
+                    sock.settimeout(max(deadline_at - time.monotonic(), 0.001))
+            data = raw.read1(chunk_size, decode_content=True)
+            if not data:
+                return
+            yield data
+    else:
+        yield from r.iter_content(chunk_size)
+
+
+def _read_bounded(r, deadline_at):
+    """
+    Lee el cuerpo de la respuesta con un máximo de bytes, un plazo total y
+    corte anticipado cuando ya hay suficientes párrafos con texto. El plazo
+    se aplica también dentro de cada lectura: un servidor que deja de enviar
+    no la bloquea más allá de `deadline_at`.
+    Retorna (contenido, motivo del corte o None).
+    """
+    max_bytes = Config.PAGE_MAX_BYTES
+    target = Config.PAGE_TARGET_PARAGRAPHS
+    buf = bytearray()
+    scan_pos = 0
+    paragraphs = 0
+    try:
+        for chunk in _iter_body(r, 16384, deadline_at):
+            buf += chunk
+            if len(buf) >= max_bytes:
+                del buf[max_bytes:]
+                return bytes(buf), "max_bytes"
+            if time.monotonic() >= deadline_at:
+                return bytes(buf), "deadline"
+            if target:
+                found, scan_pos = count_paragraphs(buf, scan_pos)
+                paragraphs += found
+                if paragraphs >= target:
+                    return bytes(buf), "enough_text"
+    except (urllib3.exceptions.HTTPError, requests.RequestException, OSError):
+        if not buf:
+            raise
+        return bytes(buf), "deadline" if time.monotonic() >= deadline_at else "read_error"
+    return bytes(buf), None
+
+
+def download_page(url, timeout=15, use_cache=False):
+    """
+    Descarga una página de artículo (bloqueante) en streaming y la guarda en
+    la caché en disco. La descarga se corta al llegar a PAGE_MAX_BYTES, al
+    vencer PAGE_DEADLINE segundos (contados desde la petición: como mucho se
+    suma el tiempo de conexión) o en cuanto hay PAGE_TARGET_PARAGRAPHS
+    párrafos con texto (solo se usan los primeros). Este último prefijo se
+    guarda en la caché marcado como cortado, con los párrafos que contiene;
+    las páginas cortadas por tamaño, plazo o error de lectura no se guardan.
+
+    Con use_cache=True se sirve desde la caché si ya fue descargada (completa
+    o con al menos PAGE_TARGET_PARAGRAPHS párrafos), lo que permite re-extraer
+    y hacer backfills sin volver a la red.
+    Lanza requests.RequestException si la descarga falla.
+    """
+    cache = get_page_cache() if Config.PAGE_CACHE_ENABLED else None
+    if cache is not None and use_cache:
+        cached = cache.get(url, Config.PAGE_TARGET_PARAGRAPHS)
+        if cached is not None:
+            return cached
+
+    deadline_at = time.monotonic() + Config.PAGE_DEADLINE
+    read_timeout = min(timeout, Config.PAGE_DEADLINE)
+    r = http_client.get(url, stream=True,
+                     timeout=(Config.PAGE_CONNECT_TIMEOUT, read_timeout))
+    try:
+        r.raise_for_status()
+        content, truncated = _read_bounded(r, deadline_at)
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise requests.ConnectionError(e)
+    finally:
+        r.close()
+
+    with _fetch_stats_lock:
+        _fetch_stats["pages"] += 1
+        _fetch_stats["bytes"] += len(content)
+        if truncated:
+            _fetch_stats[_TRUNCATION_COUNTERS[truncated]] += 1
+
+    page = FetchedPage(r.url, content, r.status_code, r.headers, truncated)
+    if cache is not None and truncated in (None, "enough_text"):
+        try:
+            cache.put(url, content, r.status_code, r.headers,
+                      truncated, Config.PAGE_TARGET_PARAGRAPHS if truncated else None)
+        except (OSError, sqlite3.Error):
+            pass  # la caché nunca debe romper la ingesta
+    return page
+
+
+def fetch_page(url, timeout=15, use_cache=False):
+    """Como download_page, pero retorna None si la descarga falla"""
+    try:
+        return download_page(url, timeout, use_cache)
+    except requests.RequestException:
+        return None
+
+
+class KnownUrlFilter:
+    """
+    Conjunto acotado (LRU) de URLs (o sus url_hash) que ya están en la base de datos.
+
+    Se mantiene caliente entre ejecuciones dentro del proceso, de modo que
+    las entradas ya vistas de un feed se descartan sin consultar la base de
+    datos. Es solo un atajo: una URL ausente aquí se sigue comprobando en la
+    base de datos.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or Config.KNOWN_URLS_MAX
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, url):
+        with self._lock:
+            if url in self._urls:
+                self._urls.move_to_end(url)
+                return True
+            return False
+
+    def add_many(self, urls):
+        with self._lock:
+            for url in urls:
+                self._urls[url] = None
+                self._urls.move_to_end(url)
+            while len(self._urls) > self.max_size:
+                self._urls.popitem(last=False)
+
+    def discard_many(self, urls):
+        with self._lock:
+            for url in urls:
+                self._urls.pop(url, None)
+
+    def __len__(self):
+        return len(self._urls)
+
+
+class IngestionEngine:
+    """
+    Ejecuta la ingesta de varias fuentes en un bucle asyncio.
+
+    Las llamadas de red (bloqueantes) se ejecutan en un pool de hilos propio,
+    limitadas por un semáforo global y por el HostLimiter de cada dominio
+    (token bucket + concurrencia), por defecto el del proceso, compartido
+    con el enriquecimiento en segundo plano. El plazo total (deadline) se aplica a
+    toda la ejecución: lo que no termine a tiempo se cancela, las fuentes
+    afectadas se reportan como timed_out y no se espera a los hilos que
+    sigan bloqueados en la red.
+    """
+
+    def __init__(self, max_concurrency=None, deadline=None,
+                 feed_fetcher=fetch_feed, page_fetcher=fetch_page, limiter_factory=get_host_limiter):
+        self.max_concurrency = max_concurrency or Config.INGEST_MAX_CONCURRENCY
+        self.deadline = deadline or Config.INGEST_DEADLINE
+        self.feed_fetcher = feed_fetcher
+        self.page_fetcher = page_fetcher
+        self.limiter_factory = limiter_factory
+        self.limiter = None
+        self._semaphore = None
+        self._executor = None
+        self._deadline_at = None
+
+    def _remaining(self):
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    async def _fetch(self, fn, url, result, *args):
+        """
+        Ejecuta una descarga bloqueante respetando primero el turno del dominio
+        y después el límite global. La espera en cola se acumula en `result`.
+        """
+        async with self.limiter.slot(url) as waited:
+            result["queue_wait"] += waited
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fn, url, *args)
+
+    async def _process_source(self, source_key, source, plan_entries, enrich_entry, save_entries):
+        started = time.monotonic()
+        result = {
+            "source": source_key,
+            "nuevos": 0,
+            "error": None,
+            "timed_out": False,
+            "not_modified": False,
+            "pages_fetched": 0,
+            "queue_wait": 0.0,
+            "feed_latency": None,
+            "elapsed": 0.0,
+        }
+        try:
+            feed_started = time.monotonic()
+            # El feed se parsea en el hilo de la descarga, hasta `limit` entradas o la marca de agua
+            feed = await self._fetch(self.feed_fetcher, source["url"], result, source.get("etag"),
+                                     source.get("modified"), source.get("limit"), source.get("stop_at"))
+            # Tiempo de respuesta del feed, sin la espera de turno del dominio
+            result["feed_latency"] = round(time.monotonic() - feed_started - result["queue_wait"], 3)
+            result["not_modified"] = getattr(feed, "status", None) == 304
+            candidates = [] if result["not_modified"] else plan_entries(source_key, feed)
+
+            # Descargar las páginas de los candidatos en paralelo (sin enrich_entry
+            # solo se guardan los datos del RSS y las páginas se dejan para después).
+            # Los que ya traen el contenido en el feed (enriched_at) no la necesitan
+            pending = [c for c in candidates if c.get("url") and not c.get("enriched_at")] if enrich_entry else []
+            if pending:
+                tasks = {
+                    asyncio.ensure_future(self._fetch(self.page_fetcher, c["url"], result)): c
+                    for c in pending
+                }
+                done, not_done = await asyncio.wait(tasks, timeout=self._remaining())
+                for task in not_done:
+                    task.cancel()
+                if not_done:
+                    result["timed_out"] = True
+                # La extracción (CPU) va a los hilos de trabajo, no al bucle de eventos
+                loop = asyncio.get_running_loop()
+                extractions = []
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    page = task.result()
+                    if page is not None:
+                        result["pages_fetched"] += 1
+                        extractions.append(loop.run_in_executor(self._executor, enrich_entry, tasks[task], page))
+                await asyncio.gather(*extractions, return_exceptions=True)
+
+            result["nuevos"] = save_entries(source_key, candidates, feed)
+        except asyncio.CancelledError:
+            result["timed_out"] = True
+            raise
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            result["elapsed"] = round(time.monotonic() - started, 3)
+            result["queue_wait"] = round(result["queue_wait"], 3)
+        return result
+
+    async def run(self, sources, plan_entries, enrich_entry, save_entries):
+        """
+        Ingesta concurrente de varias fuentes.
+
+        Args:
+            sources: dict {source_key: config} con al menos la clave "url" y
+                opcionalmente "etag" / "modified" para el GET condicional,
+                "limit" (entradas que se parsean al descargar el feed) y
+                "stop_at" (entry_key de la marca de agua, donde se corta)
+            plan_entries: f(source_key, feed) -> lista de dicts candidatos
+                (no se llama si el feed respondió 304)
+            enrich_entry: f(candidato, respuesta_http) -> None (modifica el dict),
+                o None para no descargar las páginas. No se llama para los
+                candidatos que ya vienen con enriched_at
+            save_entries: f(source_key, candidatos, feed) -> número de artículos nuevos
+
+        Retorna: dict {source_key: resultado}. Las esperas por dominio quedan
+        en `self.limiter.stats()` (las del proceso si el limitador es el compartido).
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.limiter = self.limiter_factory()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix="ingesta")
+        self._deadline_at = time.monotonic() + self.deadline
+        try:
+            return await self._run_all(sources, plan_entries, enrich_entry, save_entries)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_all(self, sources, plan_entries, enrich_entry, save_entries):
+        tasks = {
+            asyncio.ensure_future(
+                self._process_source(key, cfg, plan_entries, enrich_entry, save_entries)
+            ): key
+            for key, cfg in sources.items()
+        }
+        results = {}
+        if not tasks:
+            return results
+
+        done, not_done = await asyncio.wait(tasks, timeout=self._remaining() + SAVE_GRACE)
+        for task in not_done:
+            task.cancel()
+        for task in done:
+            results[tasks[task]] = task.result()
+        for task in not_done:
+            results[tasks[task]] = {
+                "source": tasks[task],
+                "nuevos": 0,
+                "error": "deadline excedido",
+                "timed_out": True,
+                "not_modified": False,
+                "pages_fetched": 0,
+                "queue_wait": 0.0,
+                "feed_latency": None,
+                "elapsed": round(self.deadline, 3),
+            }
+        return results
+
+    def run_sync(self, sources, plan_entries, enrich_entry, save_entries):
+        """Versión síncrona de run() para rutas Flask, scheduler y scripts"""
+        return asyncio.run(self.run(sources, plan_entries, enrich_entry, save_entries))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Reparto de fuentes entre varios schedulers para News Aggregator Pro
+Las fuentes se dividen en SCHEDULER_SHARDS particiones (por su id) y cada partición
+se asigna a un worker mediante una concesión (lease) con caducidad en la
+base de datos (tabla scheduler_leases, app.py). Cada worker renueva sus
+concesiones con un latido cada LEASE_HEARTBEAT segundos; si deja de
+hacerlo, caducan a los LEASE_TTL segundos y otro worker las toma.
+
+Cada worker intenta quedarse con su parte justa (particiones / workers vivos,
+redondeado hacia arriba): cuando entra uno nuevo, los demás liberan
+particiones en su siguiente latido y el nuevo las reclama. Así se puede
+arrancar scheduler.py varias veces, en una o varias máquinas, sin leer
+cada feed más de una vez.
+"""
+
+import math
+import os
+import socket
+import uuid
+
+from config_advanced import Config
+
+LEADER_SHARD = 0  # el dueño de esta partición hace además las tareas globales (limpieza, reporte)
+
+
+def new_worker_id():
+    """Identificador único del worker: máquina, proceso y un sufijo aleatorio"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def shard_of(source_id):
+    """Partición de una fuente (según el id de la tabla sources)"""
+    return source_id % Config.SCHEDULER_SHARDS
+
+
+def fair_share(workers, shards=None):
+    """Particiones que le tocan como mucho a cada uno de `workers` workers vivos"""
+    return math.ceil((shards or Config.SCHEDULER_SHARDS) / max(1, workers))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Caché en disco de páginas de artículos para News Aggregator Pro
+Guarda el HTML descargado comprimido y direccionado por contenido (sha256),
+con un índice SQLite por URL canónica que conserva los metadatos de la
+respuesta. Tiene un tamaño máximo y expulsa por LRU.
+
+Así la re-extracción de contenido y los backfills leen del disco en lugar de
+volver a descargar cada página. Las descargas cortadas en cuanto hay texto
+suficiente se guardan marcadas, con los párrafos que contienen, y solo se
+sirven a quien no necesita leer más párrafos que esos.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from config_advanced import Config
+from urlnorm import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url_key     TEXT PRIMARY KEY,
+    url         TEXT NOT NULL,
+    blob        TEXT NOT NULL,
+    status      INTEGER,
+    headers     TEXT,
+    fetched_at  TEXT,
+    last_access REAL,
+    truncated   TEXT,
+    paragraphs  INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_pages_last_access ON pages (last_access);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Cabeceras de la respuesta que vale la pena conservar
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Content-Language")
+
+
+def cache_key(url):
+    """Clave de la caché: la URL canónica (ver urlnorm.canonical_url)"""
+    return canonical_url(url)
+
+
+class CachedPage:
+    """Respuesta leída de la caché, con la misma interfaz básica que requests.Response"""
+
+    def __init__(self, url, content, status_code, headers, fetched_at, truncated=None, paragraphs=None):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers
+        self.fetched_at = fetched_at
+        self.truncated = truncated  # None (página completa) o "enough_text"
+        self.paragraphs = paragraphs  # párrafos con texto que contiene una página cortada
+        self.from_cache = True
+
+    @property
+    def ok(self):
+        return 200 <= (self.status_code or 0) < 400
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get("Content-Type", "")
+        if "charset=" in content_type:
+            return content_type.split("charset=")[-1].split(";")[0].strip()
+        return None
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class PageCache:
+    """
+    Caché de páginas direccionada por contenido.
+
+    Los cuerpos se guardan una sola vez en blobs/<aa>/<sha256>.gz aunque
+    varias URLs devuelvan el mismo HTML; el índice lleva un contador de
+    referencias por blob. Cuando el total comprimido supera `max_bytes` se
+    eliminan las entradas menos usadas recientemente.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = Path(root or Config.PAGE_CACHE_DIR)
+        self.max_bytes = max_bytes or Config.PAGE_CACHE_MAX_BYTES
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        # Cachés creadas antes de que se guardaran páginas cortadas
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for column, kind in (("truncated", "TEXT"), ("paragraphs", "INTEGER")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def _blob_path(self, digest):
+        return self.root / "blobs" / digest[:2] / f"{digest}.gz"
+
+    def get(self, url, paragraphs=None):
+        """
+        Retorna un CachedPage o None si la URL no está en caché.
+
+        Una página cortada por texto suficiente solo se sirve si contiene al
+        menos `paragraphs` párrafos (los que va a leer quien la pide); sin
+        `paragraphs` solo se sirven páginas completas.
+        """
+        key = cache_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, blob, status, headers, fetched_at, truncated, paragraphs FROM pages WHERE url_key = ?",
+                (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if row[5] and (not paragraphs or (row[6] or 0) < paragraphs):
+                return None
+            try:
+                with gzip.open(self._blob_path(row[1]), "rb") as f:
+                    content = f.read()
+            except OSError:
+                # Blob perdido o corrupto: se olvida la entrada
+                self._remove(key, row[1])
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url_key = ?",
+                               (datetime.utcnow().timestamp(), key))
+            self._conn.commit()
+        return CachedPage(row[0], content, row[2], json.loads(row[3] or "{}"), row[4], row[5], row[6])
+
+    def put(self, url, content, status=200, headers=None, truncated=None, paragraphs=None):
+        """
+        Guarda (o reemplaza) la página de `url`. Un prefijo cortado se marca
+        con `truncated` y los `paragraphs` párrafos con texto que contiene.
+        """
+        key = cache_key(url)
+        digest = hashlib.sha256(content).hexdigest()
+        kept = {h: headers[h] for h in KEPT_HEADERS if headers and h in headers}
+        now = datetime.utcnow()
+
+        path = self._blob_path(digest)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                with gzip.open(tmp, "wb", compresslevel=6) as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            size = path.stat().st_size
+
+            old = self._conn.execute("SELECT blob FROM pages WHERE url_key = ?", (key,)).fetchone()
+            if old and old[0] != digest:
+                self._remove(key, old[0])
+                old = None
+            if not old:
+                self._conn.execute(
+                    "INSERT INTO blobs (hash, size, refcount) VALUES (?, ?, 1) "
+                    "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1", (digest, size))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url_key, url, blob, status, headers, fetched_at, last_access, truncated, paragraphs) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, digest, status, json.dumps(kept), now.isoformat(), now.timestamp(),
+                 truncated, paragraphs))
+            self._evict()
+            self._conn.commit()
+        return digest
+
+    def discard(self, url):
+        """Olvida la página de `url` (p. ej. porque el artículo cambió y hay que descargarla de nuevo)"""
+        key = cache_key(url)
+        with self._lock:
+            row = self._conn.execute("SELECT blob FROM pages WHERE url_key = ?", (key,)).fetchone()
+            if row:
+                self._remove(key, row[0])
+                self._conn.commit()
+        return row is not None
+
+    def _remove(self, key, digest):
+        """
+        Elimina una entrada del índice y su blob si ya nadie lo referencia.
+        Retorna los bytes liberados en disco.
+        """
+        self._conn.execute("DELETE FROM pages WHERE url_key = ?", (key,))
+        self._conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (digest,))
+        left = self._conn.execute("SELECT refcount, size FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if left is not None and left[0] <= 0:
+            self._conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            try:
+                self._blob_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            return left[1]
+        return 0
+
+    def _evict(self):
+        """Expulsa por LRU hasta quedar por debajo de max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, digest in self._conn.execute(
+                "SELECT url_key, blob FROM pages ORDER BY last_access").fetchall():
+            total -= self._remove(key, digest)
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """Número de páginas, blobs y bytes comprimidos en disco"""
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"pages": pages, "blobs": blobs, "bytes": size, "max_bytes": self.max_bytes}
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Caché compartida del proceso (se crea al primer uso)"""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+    return _page_cache
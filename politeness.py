@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Control de cortesía por dominio para News Aggregator Pro
+Cada dominio tiene su propio token bucket (ritmo de peticiones) y un límite de
+peticiones simultáneas, así los distintos medios se descargan en paralelo
+mientras cada uno se mantiene dentro de su presupuesto.
+
+El limitador del proceso (get_host_limiter) lo comparten la ingesta y el
+enriquecimiento en segundo plano, cada uno con su bucle asyncio en su propio
+hilo: por eso los límites son seguros entre hilos y entre bucles.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from config_advanced import Config, HOST_LIMITS
+
+
+def host_key(url):
+    """Dominio al que se aplica el límite (sin 'www.')"""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` tokens por segundo, hasta `burst` acumulados.
+    Cada petición reserva su token (el saldo puede quedar en negativo) y
+    espera lo que le toque, así se atienden en orden de llegada desde
+    cualquier hilo o bucle.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva un token y retorna los segundos que hay que esperar para usarlo"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def take(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class SharedSemaphore:
+    """
+    Semáforo para corrutinas de varios bucles asyncio (uno por hilo). Al
+    liberar, el permiso pasa al primero en espera a través de su propio bucle.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = deque()  # (bucle, future) en orden de llegada
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()  # el permiso llegó junto con la cancelación
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    continue  # su bucle ya se cerró
+            self._value += 1
+
+    def _grant(self, future):
+        # En el bucle del que espera: si ya se canceló, el permiso pasa al siguiente
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class HostLimiter:
+    """
+    Limitador por dominio: token bucket + semáforo de concurrencia.
+
+    Los valores por defecto vienen de Config (POLITE_RATE, POLITE_BURST,
+    POLITE_CONCURRENCY) y se pueden sobrescribir por dominio en HOST_LIMITS.
+    Registra cuánto esperó cada petición en la cola de su dominio.
+    """
+
+    def __init__(self, rate=None, burst=None, concurrency=None, overrides=None, history=200):
+        self.rate = rate or Config.POLITE_RATE
+        self.burst = burst or Config.POLITE_BURST
+        self.concurrency = concurrency or Config.POLITE_CONCURRENCY
+        self.overrides = HOST_LIMITS if overrides is None else overrides
+        self._buckets = {}
+        self._semaphores = {}
+        self._waits = defaultdict(lambda: deque(maxlen=history))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _limits_for(self, host):
+        limits = self.overrides.get(host, {})
+        return (limits.get("rate", self.rate),
+                limits.get("burst", self.burst),
+                limits.get("concurrency", self.concurrency))
+
+    def _state(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst, concurrency = self._limits_for(host)
+                self._buckets[host] = TokenBucket(rate, burst)
+                self._semaphores[host] = SharedSemaphore(concurrency)
+            return self._buckets[host], self._semaphores[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """
+        Espera turno para `url` en su dominio.
+        Retorna (vía `as`) los segundos que la petición esperó en la cola.
+        """
+        host = host_key(url)
+        bucket, semaphore = self._state(host)
+        started = time.monotonic()
+        async with semaphore:
+            await bucket.take()
+            waited = time.monotonic() - started
+            with self._lock:
+                self._waits[host].append(waited)
+                self._counts[host] += 1
+            yield waited
+
+    def stats(self):
+        """Espera en cola por dominio: {host: {requests, avg_wait, max_wait}}"""
+        result = {}
+        with self._lock:
+            waits_by_host = {host: list(waits) for host, waits in self._waits.items()}
+            counts = dict(self._counts)
+        for host, waits in waits_by_host.items():
+            result[host] = {
+                "requests": counts[host],
+                "avg_wait": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "max_wait": round(max(waits), 3) if waits else 0.0,
+            }
+        return result
+
+
+_host_limiter = None
+_host_limiter_lock = threading.Lock()
+
+
+def get_host_limiter():
+    """Limitador compartido del proceso (ingesta y enriquecimiento), se crea al primer uso"""
+    global _host_limiter
+    with _host_limiter_lock:
+        if _host_limiter is None:
+            _host_limiter = HostLimiter()
+    return _host_limiter
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Sondeo adaptativo de fuentes para News Aggregator Pro
+El intervalo de cada fuente se calcula a partir de su ritmo de publicación
+(artículos nuevos por hora en la ventana POLL_RATE_WINDOW_HOURS): se busca
+que cada lectura traiga unos POLL_TARGET_ARTICLES artículos nuevos. Las
+fuentes muy activas se leen más a menudo y las tranquilas cada vez menos,
+siempre entre POLL_MIN_INTERVAL y POLL_MAX_INTERVAL.
+"""
+
+from config_advanced import Config
+
+
+def clamp_interval(seconds):
+    return int(max(Config.POLL_MIN_INTERVAL, min(Config.POLL_MAX_INTERVAL, seconds)))
+
+
+def poll_interval(rate_per_hour, previous=None, found_new=None):
+    """
+    Intervalo de sondeo en segundos.
+
+    Args:
+        rate_per_hour: artículos nuevos por hora observados en la ventana
+        previous: intervalo anterior (None si la fuente aún no tiene historial)
+        found_new: si la última lectura trajo artículos nuevos
+
+    Sin publicaciones en la ventana el intervalo crece un 50% por lectura
+    vacía (en lugar de saltar al máximo), y cualquier artículo nuevo lo
+    devuelve al ritmo observado.
+    """
+    if rate_per_hour and rate_per_hour > 0:
+        return clamp_interval(3600 * Config.POLL_TARGET_ARTICLES / rate_per_hour)
+    if previous is None:
+        return Config.POLL_MIN_INTERVAL
+    if found_new:
+        return clamp_interval(previous)
+    return clamp_interval(previous * 1.5)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script para volver a extraer el contenido de los artículos desde la caché
+de páginas en disco, sin descargarlas de nuevo
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db, Article, _enrich_entry
+from page_cache import get_page_cache
+from config_advanced import Config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+def reextract_articles(source=None, batch_size=200):
+    """Re-extrae content_long (y metadatos vacíos) de los artículos en caché"""
+    print("♻️ Re-extrayendo artículos desde la caché de páginas...")
+    print("=" * 60)
+
+    cache = get_page_cache()
+    updated = 0
+    missing = 0
+    started = datetime.now()
+
+    with app.app_context():
+        query = Article.query
+        if source:
+            query = query.filter(Article.source == source)
+
+        ids = [article_id for (article_id,) in query.with_entities(Article.id)]
+
+        for start in range(0, len(ids), batch_size):
+            pending = []
+            for article in Article.query.filter(Article.id.in_(ids[start:start + batch_size])):
+                # Sirven también las páginas cortadas con los párrafos que lee la extracción
+                page = cache.get(article.url, Config.PAGE_TARGET_PARAGRAPHS)
+                if page is None:
+                    missing += 1
+                    continue
+
+                candidato = {
+                    "url": article.url,
+                    "date_iso": article.date_iso,
+                    "author": article.author,
+                    "section": article.section,
+                    "content_long": article.content_long,
+                }
+                pending.append((article, candidato, page))
+
+            # El parseo corre en el pool de procesos: un hilo por proceso lo mantiene ocupado
+            with ThreadPoolExecutor(max_workers=max(1, Config.EXTRACT_PROCESSES)) as pool:
+                list(pool.map(lambda item: _enrich_entry(item[1], item[2]), pending))
+
+            for article, candidato, _ in pending:
+                article.content_long = candidato["content_long"]
+                article.date_iso = candidato["date_iso"]
+                article.author = candidato["author"]
+                article.section = candidato["section"]
+                article.enriched_at = candidato["enriched_at"]
+                updated += 1
+
+            db.session.commit()
+            print(f"   ✅ {updated} artículos re-extraídos...")
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"\n🎉 Re-extracción completada en {elapsed:.1f}s")
+    print(f"📊 Actualizados: {updated} | Sin página en caché: {missing}")
+    print(f"💾 Caché: {cache.stats()}")
+    return {"updated": updated, "missing": missing}
+
+if __name__ == "__main__":
+    reextract_articles(sys.argv[1] if len(sys.argv) > 1 else None)
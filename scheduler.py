@@ -7,6 +7,8 @@ Actualiza las fuentes RSS automáticamente según su configuración
 import schedule
 import time
 import logging
+import threading
+import signal
 from datetime import datetime, timedelta
 import sys
 import os
@@ -14,8 +16,11 @@ import os
 # Agregar el directorio actual al path para importar app
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, fetch_articles_from_source, RSS_SOURCES, db, Article
-from config_advanced import RSS_SOURCES_ADVANCED
+from app import (app, fetch_sources, RSS_SOURCES, db, Article, FeedState, Source,
+                 WebSubSubscription, websub_subscribe, delete_article_rows, renew_leases, release_leases, in_shards)
+from config_advanced import Config
+from leases import LEADER_SHARD, new_worker_id
+from polling import poll_interval
 
 # Configurar logging
 logging.basicConfig(
@@ -27,41 +32,185 @@ logging.basicConfig(
     ]
 )
 
-def update_source(source_key):
-    """Actualiza una fuente específica"""
+# Este proceso como worker: solo lee las fuentes de sus particiones (ver leases.py)
+WORKER_ID = new_worker_id()
+_owned_shards = []
+_renewed_at = None  # time.monotonic() de la última renovación correcta
+_stop = threading.Event()
+
+def heartbeat():
+    """
+    Renueva las concesiones del worker y actualiza sus particiones. Si no se
+    pueden renovar, las particiones se conservan solo mientras sus
+    concesiones siguen vigentes (LEASE_TTL desde la última renovación);
+    después otro worker puede haberlas tomado y se dejan de leer.
+    """
+    global _owned_shards, _renewed_at
+    started = time.monotonic()  # las concesiones vencen contando desde antes de renovarlas
     try:
         with app.app_context():
-            source_config = RSS_SOURCES_ADVANCED.get(source_key, {})
-            if not source_config.get('enabled', True):
-                logging.info(f"Fuente {source_key} deshabilitada, saltando...")
-                return
-            
-            max_articles = source_config.get('max_articles', 10)
-            source_name = source_config.get('name', source_key)
-            
-            logging.info(f"Actualizando {source_name}...")
-            nuevos = fetch_articles_from_source(source_key, max_articles)
-            
-            if nuevos > 0:
-                logging.info(f"✅ {source_name}: {nuevos} artículos nuevos")
-            else:
-                logging.info(f"ℹ️ {source_name}: Sin artículos nuevos")
-                
+            owned = renew_leases(WORKER_ID)
     except Exception as e:
-        logging.error(f"❌ Error actualizando {source_key}: {e}")
+        logging.error(f"❌ Error renovando concesiones: {e}")
+        if _owned_shards and (_renewed_at is None or time.monotonic() - _renewed_at >= Config.LEASE_TTL):
+            logging.warning(f"⚠️ Worker {WORKER_ID}: concesiones caducadas, se dejan sus particiones")
+            _owned_shards = []
+        return _owned_shards
+    _renewed_at = started
+    if len(owned) != len(_owned_shards):
+        logging.info(f"🧩 Worker {WORKER_ID}: {len(owned)} particiones de fuentes")
+    _owned_shards = owned
+    return owned
 
-def update_all_sources():
-    """Actualiza todas las fuentes habilitadas"""
-    logging.info("🔄 Iniciando actualización de todas las fuentes...")
+def _heartbeat_loop():
+    # En su propio hilo: una lectura larga no deja caducar las concesiones
+    while not _stop.wait(Config.LEASE_HEARTBEAT):
+        heartbeat()
+
+def _is_leader():
+    return LEADER_SHARD in _owned_shards
+
+def _enabled_sources():
+    """Fuentes habilitadas de las particiones de este worker, en el orden del registro"""
+    mine = db.session.query(Source.key).filter(Source.enabled.is_(True), in_shards(_owned_shards)).order_by(Source.id)
+    return [key for (key,) in mine if key in RSS_SOURCES]
+
+def _setting(source_key, name, default):
+    value = RSS_SOURCES.get(source_key, {}).get(name)
+    return default if value is None else value
+
+def publish_rates(source_keys, window_hours=None):
+    """
+    Artículos publicados por hora, por fuente (según date_iso). Si el
+    historial de la fuente no cubre toda la ventana (feeds que solo traen las
+    últimas entradas), el ritmo se mide sobre el tramo que sí cubre.
+    """
+    window_hours = window_hours or Config.POLL_RATE_WINDOW_HOURS
+    now = datetime.utcnow()
+    since = (now - timedelta(hours=window_hours)).strftime("%Y-%m-%dT%H:%M:%S")
+    counts = db.session.query(Article.source, db.func.count(Article.id), db.func.min(Article.date_iso)).filter(
+        Article.source.in_(list(source_keys)),
+        Article.date_iso >= since
+    ).group_by(Article.source)
+    rates = {}
+    for source, count, oldest in counts:
+        try:
+            span = (now - datetime.strptime(oldest[:19], "%Y-%m-%dT%H:%M:%S")).total_seconds() / 3600
+        except (TypeError, ValueError):
+            span = window_hours
+        rates[source] = count / min(window_hours, max(1.0, span))
+    return rates
+
+def due_sources(now=None, limit=None, shards=None):
+    """
+    Fuentes habilitadas cuyo próximo sondeo ya venció (o que nunca se leyeron),
+    las más prioritarias y atrasadas primero, como mucho `limit`
+    (POLL_MAX_BATCH): el resto queda para el siguiente ciclo.
     
-    for source_key in RSS_SOURCES_ADVANCED.keys():
-        update_source(source_key)
-        time.sleep(2)  # Pequeña pausa entre fuentes
+    Es una sola consulta sobre el índice de next_poll_at, sin recorrer todas
+    las fuentes. Las que tienen una suscripción WebSub vigente no se
+    sondean: el sondeo queda como respaldo para las fuentes sin hub.
+    Con `shards` solo se miran las fuentes de esas particiones.
+    """
+    now = now or datetime.utcnow()
+    pushed = db.session.query(WebSubSubscription.source).filter(
+        WebSubSubscription.state == "active", WebSubSubscription.expires_at > now)
+    due = db.session.query(Source.key).outerjoin(FeedState, FeedState.source == Source.key).filter(
+        Source.enabled.is_(True),
+        db.or_(FeedState.next_poll_at.is_(None), FeedState.next_poll_at <= now),
+        Source.key.notin_(pushed),
+        in_shards(shards),
+    ).order_by(Source.priority, FeedState.next_poll_at, Source.id).limit(limit or Config.POLL_MAX_BATCH)
+    return [key for (key,) in due if key in RSS_SOURCES]
+
+def schedule_next_polls(results):
+    """Recalcula el intervalo de cada fuente leída según su ritmo de publicación"""
+    now = datetime.utcnow()
+    rates = publish_rates(results.keys())
+    intervals = {}
+    try:
+        for source_key, result in results.items():
+            state = db.session.get(FeedState, source_key) or FeedState(source=source_key)
+            previous = state.poll_interval or _setting(source_key, 'update_interval', 300)
+            interval = poll_interval(rates.get(source_key, 0.0), previous, result['nuevos'] > 0)
+            state.publish_rate = round(rates.get(source_key, 0.0), 3)
+            state.poll_interval = interval
+            state.next_poll_at = now + timedelta(seconds=interval)
+            db.session.add(state)
+            intervals[source_key] = interval
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return intervals
+
+def poll_due_sources():
+    """Lee juntas (en paralelo) las fuentes a las que les toca y programa su siguiente lectura"""
+    try:
+        with app.app_context():
+            RSS_SOURCES.refresh()  # fuentes añadidas o editadas desde la web
+            if not _owned_shards:
+                return  # otros workers tienen todas las particiones
+            due = due_sources(shards=_owned_shards)
+            if not due:
+                return
+            limits = {key: _setting(key, 'max_articles', 10) for key in due}
+            results = fetch_sources(due, limits=limits)
+            intervals = schedule_next_polls(results)
+    except Exception as e:
+        logging.error(f"❌ Error en sondeo de fuentes: {e}")
+        return
     
-    logging.info("✅ Actualización completa finalizada")
+    nuevos = sum(r['nuevos'] for r in results.values())
+    logging.info(f"📡 {len(due)} fuentes leídas, {nuevos} artículos nuevos")
+    for source_key, result in results.items():
+        source_name = _setting(source_key, 'name', source_key)
+        if result['skipped']:
+            logging.info(f"⏸️ {source_name}: {result['error']}")
+        elif result['error']:
+            logging.error(f"❌ Error actualizando {source_key}: {result['error']}")
+        else:
+            logging.info(f"   {source_name}: {result['nuevos']} nuevos, próxima lectura en {intervals[source_key] // 60} min")
+
+def renew_websub_subscriptions():
+    """
+    Suscribe las fuentes que anuncian un hub WebSub y renueva las que están
+    por vencer. Las fallidas o sin confirmar se reintentan cada WEBSUB_RETRY.
+    """
+    if not Config.WEBSUB_CALLBACK_BASE:
+        return
+    try:
+        with app.app_context():
+            now = datetime.utcnow()
+            RSS_SOURCES.refresh()
+            enabled = _enabled_sources()
+            hubs = {st.source for st in FeedState.query.filter(FeedState.source.in_(enabled),
+                                                               FeedState.hub_url.isnot(None))}
+            subs = {sub.source: sub for sub in WebSubSubscription.query.filter(WebSubSubscription.source.in_(enabled))}
+            for source_key in enabled:
+                sub = subs.get(source_key)
+                if sub is None:
+                    if source_key not in hubs:
+                        continue  # sin hub: solo sondeo
+                elif sub.state in ("unsubscribing", "unsubscribed", "denied"):
+                    continue
+                elif sub.state == "active":
+                    if sub.expires_at and sub.expires_at - now > timedelta(seconds=Config.WEBSUB_RENEW_MARGIN):
+                        continue
+                elif sub.requested_at and now - sub.requested_at < timedelta(seconds=Config.WEBSUB_RETRY):
+                    continue  # pendiente de confirmar o fallida hace poco
+                sub = websub_subscribe(source_key)
+                if sub.state == "failed":
+                    logging.error(f"❌ WebSub {source_key}: {sub.last_error}")
+                else:
+                    logging.info(f"🔔 WebSub {source_key}: suscripción pedida a {sub.hub}")
+    except Exception as e:
+        logging.error(f"❌ Error renovando suscripciones WebSub: {e}")
 
 def cleanup_old_articles():
-    """Limpia artículos antiguos según la configuración"""
+    """Limpia artículos antiguos según la configuración (solo el worker líder)"""
+    if not _is_leader():
+        return
     try:
         with app.app_context():
             from config_advanced import Config
@@ -71,6 +220,8 @@ def cleanup_old_articles():
             count = len(old_articles)
             
             if count > 0:
+                old_ids = [article.id for article in old_articles]
+                delete_article_rows(old_ids)
                 for article in old_articles:
                     db.session.delete(article)
                 db.session.commit()
@@ -82,7 +233,9 @@ def cleanup_old_articles():
         logging.error(f"❌ Error en limpieza: {e}")
 
 def generate_daily_report():
-    """Genera un reporte diario de estadísticas"""
+    """Genera un reporte diario de estadísticas (solo el worker líder)"""
+    if not _is_leader():
+        return
     try:
         with app.app_context():
             today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -106,7 +259,7 @@ def generate_daily_report():
             logging.info(f"   Artículos ayer: {articles_yesterday}")
             logging.info("   Por fuente:")
             for source, count in sources_stats:
-                source_name = RSS_SOURCES_ADVANCED.get(source, {}).get('name', source)
+                source_name = _setting(source, 'name', source)
                 logging.info(f"     {source_name}: {count}")
                 
     except Exception as e:
@@ -116,25 +269,16 @@ def setup_scheduler():
     """Configura el scheduler con las tareas programadas"""
     logging.info("⏰ Configurando scheduler automático...")
     
-    # Actualización de fuentes según su intervalo configurado
-    for source_key, config in RSS_SOURCES_ADVANCED.items():
-        if config.get('enabled', True):
-            interval = config.get('update_interval', 300)  # 5 minutos por defecto
-            
-            if interval < 60:
-                schedule.every(interval).seconds.do(update_source, source_key)
-                logging.info(f"   {config['name']}: cada {interval} segundos")
-            elif interval < 3600:
-                minutes = interval // 60
-                schedule.every(minutes).minutes.do(update_source, source_key)
-                logging.info(f"   {config['name']}: cada {minutes} minutos")
-            else:
-                hours = interval // 3600
-                schedule.every(hours).hours.do(update_source, source_key)
-                logging.info(f"   {config['name']}: cada {hours} horas")
+    # Sondeo adaptativo: cada fuente se lee según su ritmo de publicación
+    # (entre POLL_MIN_INTERVAL y POLL_MAX_INTERVAL); update_interval solo es
+    # el intervalo inicial de las fuentes sin historial
+    schedule.every(Config.POLL_TICK).seconds.do(poll_due_sources)
+    logging.info(f"   Sondeo adaptativo: entre {Config.POLL_MIN_INTERVAL // 60} min y {Config.POLL_MAX_INTERVAL // 3600} h por fuente")
     
-    # Actualización completa cada 2 horas
-    schedule.every(2).hours.do(update_all_sources)
+    # Suscripciones WebSub: las fuentes con hub reciben las entradas por push
+    if Config.WEBSUB_CALLBACK_BASE:
+        schedule.every(10).minutes.do(renew_websub_subscriptions)
+        logging.info(f"   WebSub: callbacks en {Config.WEBSUB_CALLBACK_BASE}")
     
     # Limpieza diaria a las 3 AM
     schedule.every().day.at("03:00").do(cleanup_old_articles)
@@ -146,14 +290,22 @@ def setup_scheduler():
 
 def main():
     """Función principal del scheduler"""
-    logging.info("🚀 Iniciando News Aggregator Scheduler...")
+    logging.info(f"🚀 Iniciando News Aggregator Scheduler (worker {WORKER_ID})...")
     
     # Configurar el scheduler
     setup_scheduler()
     
-    # Ejecutar una actualización inicial
+    # Concesiones: reparte las fuentes con los demás schedulers en marcha.
+    # SIGTERM (p. ej. desde start_all.py) también las libera al salir
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    heartbeat()
+    threading.Thread(target=_heartbeat_loop, name="lease-heartbeat", daemon=True).start()
+    logging.info(f"   Latido cada {Config.LEASE_HEARTBEAT}s, relevo tras {Config.LEASE_TTL}s sin latido")
+    
+    # Ejecutar una actualización inicial (las fuentes con sondeo vencido o sin historial)
     logging.info("🔄 Ejecutando actualización inicial...")
-    update_all_sources()
+    poll_due_sources()
+    renew_websub_subscriptions()
     
     # Ejecutar el scheduler
     logging.info("⏰ Scheduler iniciado. Presiona Ctrl+C para detener...")
@@ -166,6 +318,13 @@ def main():
         logging.info("🛑 Scheduler detenido por el usuario")
     except Exception as e:
         logging.error(f"❌ Error en scheduler: {e}")
+    finally:
+        _stop.set()
+        try:
+            with app.app_context():
+                release_leases(WORKER_ID)
+        except Exception as e:
+            logging.error(f"❌ Error liberando concesiones: {e}")
 
 if __name__ == "__main__":
     main()
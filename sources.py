@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Registro de fuentes RSS para News Aggregator Pro
+Las fuentes viven en la base de datos (tabla sources) en lugar de en
+diccionarios del código: se pueden añadir, editar o importar desde OPML
+sin reiniciar. Cada proceso (web, scheduler) guarda una copia en memoria
+y la recarga cuando cambia el número de versión del registro, que se
+consulta como mucho cada SOURCES_RELOAD_SECONDS.
+
+Igual que el motor de ingesta, no sabe nada de Flask: recibe funciones
+para leer la versión y las fuentes.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+from config_advanced import Config
+
+# Valores por defecto de los ajustes de cada fuente
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "priority": 10,  # 1 = la más prioritaria
+    "max_articles": 10,
+    "update_interval": 300,  # intervalo inicial de sondeo (segundos)
+}
+
+_KEY_CHARS = re.compile(r"[^a-z0-9]+")
+
+
+class SourceRegistry(Mapping):
+    """
+    Fuentes RSS por clave, con la misma interfaz de lectura que un dict
+    ({clave: {"name", "url", "language", ...}}).
+
+    Args:
+        load_version: f() -> número de versión actual del registro
+        load_sources: f() -> dict ordenado {clave: ajustes}
+        check_every: segundos entre comprobaciones de la versión
+    """
+
+    def __init__(self, load_version, load_sources, check_every=None):
+        self.load_version = load_version
+        self.load_sources = load_sources
+        self.check_every = Config.SOURCES_RELOAD_SECONDS if check_every is None else check_every
+        self._lock = threading.Lock()
+        self._sources = None
+        self._enabled = []
+        self._version = None
+        self._checked_at = 0.0
+
+    def _current(self, force_check=False):
+        now = time.monotonic()
+        sources = self._sources
+        if sources is not None and not force_check and now - self._checked_at < self.check_every:
+            return sources
+        with self._lock:
+            version = self.load_version()
+            self._checked_at = now
+            if self._sources is None or version != self._version:
+                sources = self.load_sources()
+                self._enabled = [key for key, cfg in sources.items() if cfg["enabled"]]
+                self._sources = sources
+                self._version = version
+            return self._sources
+
+    def refresh(self):
+        """Comprueba la versión ahora (p. ej. al empezar cada ciclo del scheduler)"""
+        self._current(force_check=True)
+
+    def invalidate(self):
+        """Fuerza la comprobación en el próximo acceso (tras modificar el registro)"""
+        self._checked_at = float("-inf")
+
+    @property
+    def version(self):
+        self._current()
+        return self._version
+
+    def enabled(self):
+        """Claves de las fuentes habilitadas, en orden de registro"""
+        self._current()
+        return list(self._enabled)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def __iter__(self):
+        return iter(list(self._current()))
+
+    def __len__(self):
+        return len(self._current())
+
+
+def make_key(name, taken=()):
+    """Clave única a partir del nombre ("El País América" -> "el_pais_america")"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    base = _KEY_CHARS.sub("_", text).strip("_")[:80] or "fuente"
+    key, n = base, 2
+    while key in taken:
+        key = f"{base}_{n}"
+        n += 1
+    return key
+
+
+# ---------- OPML ----------
+def parse_opml(content):
+    """
+    Fuentes de un documento OPML (outlines con xmlUrl, también dentro de
+    carpetas). La carpeta se usa como categoría si el outline no trae una.
+
+    Retorna: lista de dicts con name, url, website, language, region,
+    category y los ajustes que vengan como atributos (priority,
+    max_articles, update_interval, enabled)
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        raise ValueError(f"OPML no válido: {e}")
+    body = root.find("body")
+    if body is None:
+        raise ValueError("OPML sin <body>")
+    feeds = []
+
+    def walk(node, folder):
+        for outline in node.findall("outline"):
+            url = outline.get("xmlUrl")
+            title = outline.get("title") or outline.get("text")
+            if not url:
+                walk(outline, title or folder)
+                continue
+            feed = {
+                "name": title or url,
+                "url": url.strip(),
+                "website": outline.get("htmlUrl"),
+                "language": outline.get("language") or "es",
+                "region": outline.get("region"),
+                "category": outline.get("category") or folder,
+            }
+            for attr, setting in (("priority", "priority"), ("maxArticles", "max_articles"),
+                                  ("updateInterval", "update_interval")):
+                if outline.get(attr, "").isdigit():
+                    feed[setting] = int(outline.get(attr))
+            if outline.get("enabled") in ("true", "false"):
+                feed["enabled"] = outline.get("enabled") == "true"
+            feeds.append(feed)
+
+    walk(body, None)
+    return feeds
+
+
+def build_opml(sources, title="News Aggregator Pro"):
+    """Documento OPML (bytes) con las fuentes {clave: ajustes} y sus ajustes como atributos"""
+    root = ET.Element("opml", version="2.0")
+    head = ET.SubElement(root, "head")
+    ET.SubElement(head, "title").text = title
+    ET.SubElement(head, "dateCreated").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    body = ET.SubElement(root, "body")
+    for cfg in sources.values():
+        attrs = {
+            "type": "rss",
+            "text": cfg["name"],
+            "title": cfg["name"],
+            "xmlUrl": cfg["url"],
+            "htmlUrl": cfg.get("website"),
+            "language": cfg.get("language"),
+            "region": cfg.get("region"),
+            "category": cfg.get("category"),
+            "priority": cfg.get("priority"),
+            "maxArticles": cfg.get("max_articles"),
+            "updateInterval": cfg.get("update_interval"),
+            "enabled": "true" if cfg.get("enabled", True) else "false",
+        }
+        ET.SubElement(body, "outline", {k: str(v) for k, v in attrs.items() if v is not None})
+    ET.indent(root)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
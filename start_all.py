@@ -12,6 +12,8 @@ import signal
 import threading
 from datetime import datetime
 
+from config_advanced import Config
+
 class ServiceManager:
     def __init__(self):
         self.processes = {}
@@ -119,11 +121,14 @@ class ServiceManager:
         # Esperar un poco para que la app se inicie
         time.sleep(3)
         
-        # Scheduler automático
-        scheduler_process = self.start_service(
-            "Scheduler",
-            [sys.executable, "scheduler.py"]
-        )
+        # Scheduler automático: con SCHEDULER_WORKERS > 1 se lanzan varios
+        # procesos que se reparten las fuentes (ver leases.py)
+        workers = Config.SCHEDULER_WORKERS
+        for n in range(1, workers + 1):
+            self.start_service(
+                "Scheduler" if workers == 1 else f"Scheduler {n}",
+                [sys.executable, "scheduler.py"]
+            )
         
         # Análisis de sentimientos (opcional)
         try:
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la agrupación de noticias casi duplicadas (MinHash + LSH)
+"""
+
+import sys
+
+import pytest
+
+import clustering
+
+WIRE_A = ("Terremoto de magnitud 7,1 sacude el sur de México",
+          "Un fuerte sismo de magnitud 7,1 sacudió este martes el sur de México, según el Servicio Sismológico Nacional.")
+WIRE_B = ("Terremoto de magnitud 7.1 sacude el sur de México",
+          "Un fuerte sismo de magnitud 7,1 sacudió el martes el sur de México, informó el Servicio Sismológico Nacional.")
+OTHER = ("El Real Madrid gana el clásico", "El equipo blanco se impuso con dos goles en el último minuto del partido.")
+
+
+def test_minhash_similarity():
+    """Las versiones de una misma nota comparten bandas LSH; las notas distintas no"""
+    print("🧬 Probando firmas MinHash...")
+    a, b, c = clustering.signature(*WIRE_A), clustering.signature(*WIRE_B), clustering.signature(*OTHER)
+    assert len(a) == clustering.NUM_PERM * 4
+    assert clustering.signature(*WIRE_A) == a  # estable (no depende del hash de Python)
+    assert clustering.similarity(a, b) >= 0.5
+    assert clustering.similarity(a, c) < 0.2
+    assert set(clustering.band_keys(a)) & set(clustering.band_keys(b))
+    assert not set(clustering.band_keys(a)) & set(clustering.band_keys(c))
+    assert clustering.signature("", None) is None and clustering.band_keys(None) == []
+    print(f"   ✅ Similitud duplicado {clustering.similarity(a, b):.2f}, distinta {clustering.similarity(a, c):.2f}")
+
+
+def test_story_clusters():
+    """Al insertar, los casi duplicados de varias fuentes quedan en la misma historia"""
+    print("🗂️ Probando historias al ingerir...")
+    import app as news_app
+
+    rows = [
+        {"url": "https://agencia.example.com/sismo", "title": WIRE_A[0], "summary": WIRE_A[1], "source": "bbc_mundo"},
+        {"url": "https://diario.example.com/sismo", "title": WIRE_B[0], "summary": WIRE_B[1], "source": "infobae"},
+        {"url": "https://diario.example.com/futbol", "title": OTHER[0], "summary": OTHER[1], "source": "infobae"},
+    ]
+    with news_app.app.app_context():
+        inserted = news_app.insert_articles(rows[:1])
+        inserted += news_app.insert_articles(rows[1:])
+        ids = [article_id for article_id, _ in inserted]
+        articles = [news_app.db.session.get(news_app.Article, article_id) for article_id in ids]
+        assert articles[0].cluster_id == ids[0]
+        assert articles[1].cluster_id == ids[0]
+        assert articles[2].cluster_id == ids[2]
+
+        client = news_app.app.test_client()
+        data = client.get("/api/articles", query_string={"per_page": 100}).get_json()
+        mine = [a for a in data["articles"] if a["id"] in ids]
+        assert len(mine) == 3
+
+        data = client.get("/api/articles", query_string={"per_page": 100, "collapse": "1"}).get_json()
+        mine = {a["id"]: a for a in data["articles"] if a["id"] in ids}
+        assert set(mine) == {ids[1], ids[2]}  # de la historia queda el más reciente
+        assert mine[ids[1]]["duplicates"] == 1 and mine[ids[2]]["duplicates"] == 0
+
+        assert client.get("/?collapse=1").status_code == 200
+        assert client.get("/search?collapse=1&q=sismo").status_code == 200
+
+        news_app.delete_article_rows(ids)
+        news_app.Article.query.filter(news_app.Article.id.in_(ids)).delete(synchronize_session=False)
+        news_app.db.session.commit()
+    print("   ✅ 3 artículos en 2 historias")
+
+
+def test_head_leaves_story():
+    """Si el artículo que encabeza una historia se borra o se re-agrupa, la historia pasa al más antiguo que queda"""
+    print("🧭 Probando la salida de la cabeza de una historia...")
+    import app as news_app
+    from datetime import datetime
+
+    wire_c = (WIRE_A[0], "Un fuerte sismo de magnitud 7,1 sacudió este martes el sur de México, según el Sismológico Nacional.")
+    rows = [{"url": f"https://cabeza.example.com/sismo-{n}", "title": t, "summary": s, "source": "infobae"}
+            for n, (t, s) in enumerate((WIRE_A, WIRE_B, wire_c))]
+    with news_app.app.app_context():
+        ids = [article_id for article_id, _ in news_app.insert_articles(rows)]
+        story = lambda: [news_app.db.session.get(news_app.Article, i).cluster_id for i in ids[1:]]
+        assert story() == [ids[0], ids[0]]
+
+        # Se borra la cabeza: sus seguidores pasan al más antiguo de ellos
+        news_app.delete_article_rows(ids[:1])
+        news_app.Article.query.filter_by(id=ids[0]).delete()
+        news_app.db.session.commit()
+        news_app.db.session.expire_all()
+        assert story() == [ids[1], ids[1]]
+
+        # La nueva cabeza se corrige con otra noticia: sale de la historia y el resto la conserva
+        news_app.update_articles([{"article_id": ids[1], "url": rows[1]["url"], "title": OTHER[0], "summary": OTHER[1],
+                                   "date_iso": None, "author": None, "section": None, "content_hash": None,
+                                   "entry_updated": None, "content_long": None, "enriched_at": datetime.utcnow()}])
+        news_app.db.session.expire_all()
+        assert story() == [ids[1], ids[2]]
+        sizes = news_app.cluster_sizes([news_app.db.session.get(news_app.Article, i) for i in ids[1:]])
+        assert sizes == {ids[1]: 1, ids[2]: 1}, sizes
+
+        news_app.delete_article_rows(ids[1:])
+        news_app.Article.query.filter(news_app.Article.id.in_(ids[1:])).delete(synchronize_session=False)
+        news_app.db.session.commit()
+    print("   ✅ Historia re-apuntada al miembro más antiguo")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
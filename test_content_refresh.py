@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la actualización de entradas ya guardadas que cambian en el feed
+"""
+
+import sys
+from datetime import datetime
+
+import pytest
+
+import clustering
+from config_advanced import Config
+from feed_content import content_hash, entry_changed, feed_content_stats
+from feed_stream import parse_feed
+
+ITEM = """<item><title>{title}</title><link>https://fresco.example.com/{slug}</link>
+<guid>fresco-{slug}</guid><description>{summary}</description><pubDate>Sat, 17 Oct 2026 10:00:00 GMT</pubDate>
+<category>Economía</category><author>Eva</author></item>"""
+
+
+def _feed(*items):
+    body = "".join(ITEM.format(title=t, slug=s, summary=r) for s, t, r in items)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Fresco</title>{body}</channel></rss>""".encode()
+
+
+def test_entry_changed():
+    """Hash del contenido y fecha `updated` para decidir si una entrada cambió"""
+    print("🔁 Probando detección de cambios...")
+    before = feed_content_stats()
+    h = content_hash("Título", "Resumen")
+    assert h == content_hash("Título", "Resumen", None) and len(h) == 32
+    assert h != content_hash("Título corregido", "Resumen") != content_hash("Título", "Resumen", "<p>x</p>")
+
+    antes, despues = datetime(2026, 10, 17, 10), datetime(2026, 10, 17, 11)
+    assert not entry_changed(h, None, h, None)
+    assert entry_changed(h, None, content_hash("Otro", "Resumen"), None)
+    # Con las dos fechas manda `updated`; sin ellas (o más nueva) decide el hash
+    assert not entry_changed(h, despues, content_hash("Otro", "Resumen"), antes)
+    assert not entry_changed(h, antes, h, despues)
+    assert entry_changed(h, antes, content_hash("Otro", "Resumen"), despues)
+    after = feed_content_stats()
+    assert after["known"] - before["known"] == 5 and after["changed"] - before["changed"] == 2
+    print("   ✅ 2 de 5 versiones cambiadas")
+
+
+def test_refresh_in_place(demo_source, recording_page_fetcher):
+    """Las entradas sin cambios se saltan sin red; las corregidas se actualizan en su sitio"""
+    print("✏️ Probando actualización de artículos corregidos...")
+    import app as news_app
+
+    feeds = {"actual": _feed(("uno", "La economía crece y sube el paro", "Entradilla uno"),
+                             ("dos", "Bolsa estable", "Entradilla dos"))}
+    fetched = []
+    rescan_every = Config.WATERMARK_RESCAN_EVERY
+    Config.WATERMARK_RESCAN_EVERY = 0  # cada lectura recorre el feed entero
+    try:
+        with demo_source("fresco_demo", "https://fresco.example.com/rss",
+                         lambda url, *args: parse_feed(feeds["actual"]),
+                         recording_page_fetcher(fetched, lambda n: "Página versión %d. " % n)) as ingest:
+            result = ingest()
+            assert result["nuevos"] == 2 and len(fetched) == 2, result
+            original = {a.url: (a.id, a.content_hash) for a in news_app.Article.query.filter_by(source="fresco_demo")}
+            assert all(h for _, h in original.values())
+
+            # Mismo feed otra vez: nada nuevo y ninguna página descargada
+            result = ingest()
+            assert result["nuevos"] == 0 and result["pages_fetched"] == 0 and len(fetched) == 2, result
+
+            # Otra fuente ya publicó la versión corregida: tras corregirse, "uno" pasa a su historia
+            corregido = ("Elecciones generales: el gobierno baja el paro", "Entradilla uno corregida")
+            otra = news_app.insert_articles([{"url": "https://otra.example.com/paro", "title": corregido[0],
+                                              "summary": corregido[1], "source": "bbc_mundo"}])[0][0]
+            assert news_app.db.session.get(news_app.Article, original["https://fresco.example.com/uno"][0]).cluster_id != otra
+
+            # Titular corregido en una entrada: se actualiza la misma fila y se vuelve a descargar su página
+            feeds["actual"] = _feed(("uno", *corregido), ("dos", "Bolsa estable", "Entradilla dos"))
+            result = ingest()
+            assert result["nuevos"] == 0 and result["pages_fetched"] == 1, result
+            assert fetched[-1] == "https://fresco.example.com/uno"
+            articles = {a.url: a for a in news_app.Article.query.filter_by(source="fresco_demo")}
+            uno = articles["https://fresco.example.com/uno"]
+            assert len(articles) == 2 and uno.id == original[uno.url][0]
+            assert uno.title == "Elecciones generales: el gobierno baja el paro" and uno.summary == "Entradilla uno corregida"
+            assert uno.content_long.startswith("Página versión 3") and uno.enriched_at is not None
+            assert uno.content_hash != original[uno.url][1] and uno.author == "Eva"
+            # Los temas se reclasifican con el nuevo texto
+            temas = {t.topic for t in news_app.ArticleTopic.query.filter_by(article_id=uno.id)}
+            assert temas == {"politica"}, temas
+            # Y su historia de casi duplicados, con la firma y las bandas del texto nuevo
+            assert uno.cluster_id == otra and uno.minhash == clustering.signature(*corregido)
+            bands = {b.band_key for b in news_app.StoryBand.query.filter_by(article_id=uno.id)}
+            assert bands == set(clustering.band_keys(uno.minhash))
+            dos = articles["https://fresco.example.com/dos"]
+            assert dos.content_hash == original[dos.url][1] and dos.content_long.startswith("Página versión")
+            news_app.delete_article_rows([otra])
+            news_app.Article.query.filter_by(id=otra).delete()
+            news_app.db.session.commit()
+    finally:
+        Config.WATERMARK_RESCAN_EVERY = rescan_every
+    print("   ✅ 1 artículo actualizado en su sitio, sin duplicados")
+
+
+def test_refresh_below_watermark(demo_source, recording_page_fetcher):
+    """Las entradas conocidas ya leídas se comparan en cada lectura, no solo en los recorridos completos"""
+    print("🌊 Probando correcciones por debajo de la marca de agua...")
+    import app as news_app
+
+    feeds = {"actual": _feed(("arriba", "Cumbre del clima en Belém", "Entradilla"),
+                             ("abajo", "Bolsa estable", "Entradilla dos"))}
+    fetched = []
+    rescan_every = Config.WATERMARK_RESCAN_EVERY
+    Config.WATERMARK_RESCAN_EVERY = 100
+    try:
+        with demo_source("marca_fresca_demo", "https://fresco.example.com/marca",
+                         lambda url, etag, modified, limit, stop_at=None: parse_feed(feeds["actual"]).prefetch(
+                             limit, stop_at),
+                         recording_page_fetcher(fetched)) as ingest:
+            assert ingest()["nuevos"] == 2 and len(fetched) == 2
+            # La entrada de la marca se corrige: la lectura se corta en ella, pero se compara igual
+            feeds["actual"] = _feed(("arriba", "Cumbre del clima en Belém: acuerdo final", "Entradilla"),
+                                    ("abajo", "Bolsa estable", "Entradilla dos"))
+            result = ingest()
+            assert result["nuevos"] == 0 and result["pages_fetched"] == 1, result
+            assert fetched[-1] == "https://fresco.example.com/arriba"
+            article = news_app.Article.query.filter_by(url="https://fresco.example.com/arriba").one()
+            assert article.title == "Cumbre del clima en Belém: acuerdo final"
+            assert ingest()["pages_fetched"] == 0
+    finally:
+        Config.WATERMARK_RESCAN_EVERY = rescan_every
+    print("   ✅ Corrección aplicada sin recorrido completo")
+
+
+def test_legacy_articles(demo_source, recording_page_fetcher):
+    """Los artículos sin hash (anteriores a la columna) lo anotan sin actualizarse ni descargar nada"""
+    print("🏷️ Probando artículos sin hash...")
+    import app as news_app
+
+    feeds = {"actual": _feed(("viejo", "Nota de siempre", "Entradilla"))}
+    fetched = []
+    rescan_every = Config.WATERMARK_RESCAN_EVERY
+    Config.WATERMARK_RESCAN_EVERY = 0
+    try:
+        with demo_source("antiguo_demo", "https://fresco.example.com/antiguo",
+                         lambda url, *args: parse_feed(feeds["actual"]), recording_page_fetcher(fetched)) as ingest:
+            assert ingest()["nuevos"] == 1
+            article = news_app.Article.query.filter_by(source="antiguo_demo").one()
+            article.content_hash = None  # como tras la migración
+            news_app.db.session.commit()
+
+            # La entrada trae ahora otro contenido (p. ej. content:encoded): se anota su hash, sin más
+            feeds["actual"] = _feed(("viejo", "Nota de siempre", "Entradilla con más texto"))
+            result = ingest()
+            assert result["nuevos"] == 0 and result["pages_fetched"] == 0 and len(fetched) == 1, result
+            news_app.db.session.refresh(article)
+            assert article.summary == "Entradilla" and article.content_hash == content_hash(
+                "Nota de siempre", "Entradilla con más texto")
+            assert ingest()["pages_fetched"] == 0 and len(fetched) == 1
+    finally:
+        Config.WATERMARK_RESCAN_EVERY = rescan_every
+    print("   ✅ Hash anotado sin volver a enriquecer")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
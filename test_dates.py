@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el parseo de fechas por niveles
+"""
+
+import time
+from datetime import datetime
+
+import dates
+from config_advanced import Config
+from dates import date_stats, entry_date, parse_date
+
+
+def test_fast_tiers():
+    """RFC 822, ISO 8601 y struct_time de feedparser, todo en UTC naive"""
+    print("📅 Probando niveles rápidos...")
+    before = date_stats()
+    assert parse_date("Mon, 12 Oct 2026 10:30:00 -0400") == datetime(2026, 10, 12, 14, 30)
+    assert parse_date("Mon, 12 Oct 2026 10:30:00 GMT") == datetime(2026, 10, 12, 10, 30)
+    assert parse_date("2026-10-12T10:30:00Z") == datetime(2026, 10, 12, 10, 30)
+    assert parse_date("2026-10-12T10:30:00+02:00") == datetime(2026, 10, 12, 8, 30)
+    assert parse_date("2026-10-12") == datetime(2026, 10, 12)
+
+    entry = {"published_parsed": time.struct_time((2026, 10, 12, 10, 30, 0, 0, 285, 0)),
+             "published": "no se usa"}
+    assert entry_date(entry) == datetime(2026, 10, 12, 10, 30)
+    assert entry_date({"updated": "2026-10-12T10:30:00Z"}) == datetime(2026, 10, 12, 10, 30)
+    assert entry_date({}) is None
+
+    after = date_stats()
+    assert after["rfc822"]["hits"] - before["rfc822"]["hits"] == 2
+    assert after["iso8601"]["hits"] - before["iso8601"]["hits"] == 4
+    assert after["feedparser"]["hits"] - before["feedparser"]["hits"] == 1
+    assert after["dateparser"]["hits"] == before["dateparser"]["hits"]
+    print(f"   ✅ {after}")
+
+
+def test_dateparser_fallback():
+    """Fechas en texto libre: dateparser, con el idioma memoizado por forma"""
+    print("🐢 Probando respaldo con dateparser...")
+    assert parse_date("12 de octubre de 2026 10:30", ["es"]) == datetime(2026, 10, 12, 10, 30)
+    assert parse_date("13 de octubre de 2026 11:45", ["es"]) == datetime(2026, 10, 13, 11, 45)
+    assert dates._shape_locales[("00 de octubre de 0000 00:00", ("es",))] == "es"
+
+    # Las fechas relativas se calculan en cada llamada, no quedan fijas en la primera
+    first = parse_date("hace 1 hora", ["es"])
+    time.sleep(1.1)
+    second = parse_date("hace 1 hora", ["es"])
+    assert first is not None and (second - first).total_seconds() >= 1
+
+    assert parse_date("sin fecha", ["es"]) is None
+    assert dates._shape_locales[("sin fecha", ("es",))] is None
+    assert parse_date("") is None
+    assert parse_date(None) is None
+    print("   ✅ Respaldo correcto")
+
+
+def test_shape_cache_bounded():
+    """La memoria de formas es una LRU acotada por DATE_SHAPES_MAX"""
+    print("📏 Probando límite de formas memorizadas...")
+    max_shapes = Config.DATE_SHAPES_MAX
+    try:
+        Config.DATE_SHAPES_MAX = 2
+        parse_date("1 de marzo de 2026", ["es"])
+        parse_date("2 marzo 2026", ["es"])
+        parse_date("3 de marzo de 2026", ["es"])  # renueva la primera forma
+        parse_date("marzo 4, 2026", ["es"])
+        assert list(dates._shape_locales) == [("0 de marzo de 0000", ("es",)), ("marzo 0, 0000", ("es",))]
+    finally:
+        Config.DATE_SHAPES_MAX = max_shapes
+    print("   ✅ 2 formas en memoria")
+
+
+if __name__ == "__main__":
+    test_fast_tiers()
+    test_dateparser_fallback()
+    test_shape_cache_bounded()
+    print("🎉 Pruebas de fechas completadas")
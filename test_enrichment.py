@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la etapa de enriquecimiento en segundo plano (sin red ni base de datos)
+"""
+
+import threading
+import time
+
+from enrichment import EnrichmentPipeline
+from politeness import HostLimiter
+
+
+class FakePage:
+    def __init__(self, url):
+        self.content = f"contenido de {url}".encode()
+
+
+def _pipeline(pending, saved, page_fetcher, **kwargs):
+    lock = threading.Lock()
+
+    def load_pending(limit):
+        with lock:
+            batch, pending[:] = pending[:limit], pending[limit:]
+        return batch
+
+    def enrich_entry(candidato, page):
+        candidato["content_long"] = page.content.decode()
+
+    def save_results(enriquecidos, fallidos):
+        saved["ok"].extend(enriquecidos)
+        saved["failed"].extend(fallidos)
+
+    return EnrichmentPipeline(load_pending, enrich_entry, save_results, page_fetcher=page_fetcher,
+                              limiter_factory=lambda: HostLimiter(rate=1000, burst=1000, concurrency=100, overrides={}),
+                              **kwargs)
+
+
+def test_batches():
+    """Cada lote se descarga en paralelo y se guarda de una vez"""
+    print("🧵 Probando lotes de enriquecimiento...")
+    pending = [{"id": i, "url": f"https://n{i % 3}.example/{i}"} for i in range(10)]
+    saved = {"ok": [], "failed": []}
+
+    def page_fetcher(url):
+        time.sleep(0.1)
+        return None if url.endswith("/7") else FakePage(url)
+
+    pipeline = _pipeline(pending, saved, page_fetcher, workers=5, batch_size=5)
+    started = time.monotonic()
+    assert pipeline.run_once() == 5
+    assert pipeline.run_once() == 5
+    assert pipeline.run_once() == 0
+    elapsed = time.monotonic() - started
+
+    stats = pipeline.stats()
+    print(f"   ✅ {stats['enriched']} enriquecidos en {elapsed:.2f}s: {stats}")
+    assert elapsed < 0.5  # 10 páginas de 0.1 s con 5 workers
+    assert [c["id"] for c in saved["failed"]] == [7]
+    assert len(saved["ok"]) == 9 and saved["ok"][0]["content_long"] == "contenido de https://n0.example/0"
+    assert stats["enriched"] == 9 and stats["failed"] == 1 and stats["batches"] == 2
+    assert stats["per_minute"] == 9
+
+
+def test_background_thread():
+    """El hilo procesa lo pendiente y wake() lo despierta sin esperar al sondeo"""
+    print("⏰ Probando hilo en segundo plano...")
+    pending = [{"id": 1, "url": "https://a.example/1"}]
+    saved = {"ok": [], "failed": []}
+    pipeline = _pipeline(pending, saved, FakePage, idle_sleep=30)
+    pipeline.start()
+    try:
+        for _ in range(50):
+            if saved["ok"]:
+                break
+            time.sleep(0.02)
+        assert [c["id"] for c in saved["ok"]] == [1]
+
+        pending.append({"id": 2, "url": "https://a.example/2"})
+        pipeline.wake()
+        for _ in range(50):
+            if len(saved["ok"]) == 2:
+                break
+            time.sleep(0.02)
+        assert [c["id"] for c in saved["ok"]] == [1, 2]
+        assert pipeline.stats()["running"]
+        print("   ✅ Pendientes procesados al despertar el hilo")
+    finally:
+        pipeline.stop(timeout=2)
+    assert not pipeline.running
+
+
+if __name__ == "__main__":
+    test_batches()
+    test_background_thread()
+    print("🎉 Pruebas del enriquecimiento completadas")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el extractor de páginas de artículos (sin red)
+"""
+
+import extract_pool
+import extractor
+from config_advanced import Config
+from extractor import decode_html, extract_page, extract_record, html_to_text
+
+PAGE = """<html><head>
+<meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">
+<title>Economía &amp; mercados</title>
+<meta name="author" content="Redacción">
+<meta property="article:section" content="Economía">
+<meta property="og:updated_time" content="2026-10-11T08:00:00Z">
+<meta property="article:published_time" content="2026-10-10T10:00:00Z">
+<meta name="description" content="La inflación baja por tercer mes">
+<script>var s = "<p>esto no es un párrafo</p>";</script>
+</head><body>
+<p>La inflación anual bajó por tercer mes consecutivo según el banco central.</p>
+<p>Corto</p>
+<p>Los analistas esperan <b>nuevos recortes</b> de la tasa de interés en diciembre.</p>
+</body></html>"""
+
+
+def _check(page):
+    assert page["title"] == "Economía & mercados"
+    assert page["paragraphs"] == [
+        "La inflación anual bajó por tercer mes consecutivo según el banco central.",
+        "Los analistas esperan nuevos recortes de la tasa de interés en diciembre.",
+    ]
+    assert page["date"] == "2026-10-10T10:00:00Z"  # article:published_time tiene prioridad
+    assert page["author"] == "Redacción"
+    assert page["section"] == "Economía"
+    assert page["description"] == "La inflación baja por tercer mes"
+
+
+def test_extract_page():
+    """Título, párrafos y meta etiquetas en una sola pasada, con el charset declarado"""
+    print("📄 Probando extracción de páginas...")
+    content = PAGE.encode("iso-8859-1")
+
+    _check(extract_page(content))
+    # La cabecera HTTP tiene prioridad sobre la meta etiqueta
+    _check(extract_page(PAGE.encode("utf-8"), "text/html; charset=UTF-8"))
+
+    lxml_available = extractor.LXML_AVAILABLE
+    try:
+        extractor.LXML_AVAILABLE = False
+        _check(extract_page(content))
+    finally:
+        extractor.LXML_AVAILABLE = lxml_available
+    print(f"   ✅ Extracción correcta (lxml disponible: {lxml_available})")
+
+
+def test_decode_and_text():
+    """Decodificación sin charset declarado y texto plano de summaries"""
+    print("🔤 Probando decodificación y texto plano...")
+    assert decode_html("<p>año</p>".encode("utf-8")) == "<p>año</p>"
+    assert decode_html("<p>año</p>".encode("cp1252")) == "<p>año</p>"
+    assert html_to_text("<p>Hola &amp; <b>mundo</b></p>") == "Hola & mundo"
+    assert html_to_text("  texto plano ") == "texto plano"
+    assert html_to_text(None) == ""
+    assert extract_page(b"")["paragraphs"] == []
+    print("   ✅ Decodificación correcta")
+
+
+def test_process_pool():
+    """El pool de procesos devuelve el mismo registro compacto que la extracción local"""
+    print("🧮 Probando extracción en el pool de procesos...")
+    content = PAGE.encode("iso-8859-1")
+    local = extract_record(content)
+    assert "meta" not in local and local["author"] == "Redacción"
+
+    processes = Config.EXTRACT_PROCESSES
+    try:
+        Config.EXTRACT_PROCESSES = 2
+        extract_pool.shutdown_pool()
+        assert extract_pool.extract(content) == local
+        assert extract_pool.get_pool() is not None
+        Config.EXTRACT_PROCESSES = 0
+        assert extract_pool.get_pool() is None
+        assert extract_pool.extract(content) == local
+    finally:
+        Config.EXTRACT_PROCESSES = processes
+        extract_pool.shutdown_pool()
+    print("   ✅ Registro idéntico en el pool y en el hilo")
+
+
+if __name__ == "__main__":
+    test_extract_page()
+    test_decode_and_text()
+    test_process_pool()
+    print("🎉 Pruebas del extractor completadas")
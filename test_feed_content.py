@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el contenido completo tomado del feed (sin descargar la página)
+"""
+
+import sys
+
+import pytest
+
+from feed_content import entry_content, feed_content_stats
+from feed_stream import parse_feed
+
+BODY = "".join(f"<p>Párrafo {i} del cuerpo completo de la noticia, con texto suficiente para contar.</p>"
+               for i in range(8))
+
+FEED = f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel><title>Rico</title>
+<item><title>Completa</title><link>https://rico.example.com/completa</link><description>Entradilla corta</description>
+<content:encoded><![CDATA[{BODY}]]></content:encoded><category>Ciencia</category><author>Ana</author></item>
+<item><title>Texto plano</title><link>https://rico.example.com/plano</link>
+<description>{"Descripción larga sin etiquetas que ya es el artículo entero. " * 12}</description></item>
+<item><title>Solo entradilla</title><link>https://rico.example.com/corta</link><description>Muy corta</description></item>
+</channel></rss>""".encode()
+
+
+def test_entry_content():
+    """Contenido suficiente en el feed frente a entradillas que obligan a descargar la página"""
+    print("📄 Probando contenido del feed...")
+    before = feed_content_stats()
+    completa, plano, corta = parse_feed(FEED).entries
+    text = entry_content(completa, "rico")
+    assert text.startswith("Párrafo 0 del cuerpo") and "Párrafo 7" in text
+    assert entry_content(plano, "rico").startswith("Descripción larga")
+    assert entry_content(corta, "rico") is None
+    assert entry_content({"title": "sin nada"}) is None
+    after = feed_content_stats()
+    assert after["from_feed"] - before["from_feed"] == 2
+    assert after["too_short"] - before["too_short"] == 1 and after["missing"] - before["missing"] == 1
+    assert after["sources"]["rico"]["from_feed"] >= 2
+    print("   ✅ 2 de 3 entradas con contenido completo")
+
+
+def test_skips_page_fetch(demo_source, recording_page_fetcher):
+    """La ingesta solo descarga la página de la entrada sin contenido suficiente"""
+    print("🚫 Probando que no se descargan páginas innecesarias...")
+    import app as news_app
+
+    fetched = []
+    with demo_source("rico_demo", "https://rico.example.com/rss", lambda url, *args: parse_feed(FEED),
+                     recording_page_fetcher(fetched)) as ingest:
+        result = ingest()
+        assert result["nuevos"] == 3 and result["pages_fetched"] == 1, result
+        assert fetched == ["https://rico.example.com/corta"]
+
+        articles = {a.title: a for a in news_app.Article.query.filter_by(source="rico_demo")}
+        assert articles["Completa"].content_long.startswith("Párrafo 0")
+        assert articles["Completa"].author == "Ana" and articles["Completa"].section == "Ciencia"
+        assert articles["Texto plano"].content_long.startswith("Descripción larga")
+        assert articles["Solo entradilla"].content_long.startswith("Contenido de la página")
+        assert all(a.enriched_at is not None for a in articles.values())
+    print("   ✅ 1 página descargada para 3 artículos")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el parser de feeds en streaming frente a feedparser
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+
+import feedparser
+import pytest
+
+import feed_stream
+import websub
+from config_advanced import Config
+from dates import entry_date
+from ingestion import fetch_feed
+from watermark import entry_key, select_entries
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:atom="http://www.w3.org/2005/Atom">
+<channel><title>Diario</title><link>https://diario.example.com/</link>
+<atom:link rel="hub" href="https://hub.example.com/"/>
+<atom:link rel="self" href="https://diario.example.com/rss"/>
+{items}
+</channel></rss>"""
+
+ITEM = """<item><title> Noticia {n} &amp; más </title><link>https://diario.example.com/n{n}</link>
+<guid isPermaLink="false">id-{n}</guid><description>&lt;p&gt;Resumen {n}&lt;/p&gt;</description>
+<content:encoded><![CDATA[<p>Cuerpo completo de la noticia {n}.</p>]]></content:encoded>
+<pubDate>Sat, 17 Oct 2026 10:{m:02d}:00 GMT</pubDate><dc:creator>Ana Pérez</dc:creator>
+<category>Política</category><category>Economía</category></item>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Blog</title>
+<link rel="hub" href="https://hub.example.com/"/><link rel="self" href="https://blog.example.com/atom"/>
+<entry><title type="html">Entrada &lt;b&gt;uno&lt;/b&gt;</title><link rel="alternate" href="/uno"/>
+<id>tag:blog.example.com,2026:1</id><updated>2026-10-17T10:00:00Z</updated><published>2026-10-16T09:00:00Z</published>
+<summary>Resumen uno</summary><content type="html">&lt;p&gt;Texto uno&lt;/p&gt;</content>
+<author><name>Luis</name></author><category term="ciencia"/></entry>
+<entry><title>Entrada dos</title><link href="https://blog.example.com/dos"/><id>tag:blog.example.com,2026:2</id>
+<updated>2026-10-17T11:00:00Z</updated><content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Texto <b>dos</b></p></div></content></entry>
+</feed>"""
+
+
+def _rss(n):
+    return RSS.format(items="".join(ITEM.format(n=i, m=i % 60) for i in range(n))).encode()
+
+
+def _fields(entry):
+    return (entry.get("title"), entry.get("link"), entry.get("id"), entry.get("summary"),
+            entry.get("author"), [t.term for t in entry.get("tags", [])],
+            [c.value for c in entry.get("content", [])], entry_date(entry))
+
+
+def test_same_fields_as_feedparser():
+    """Las entradas de RSS 2.0 y Atom traen los mismos datos que con feedparser"""
+    print("📰 Probando equivalencia con feedparser...")
+    body = _rss(5)
+    streamed = feed_stream.parse_feed(body, "application/rss+xml; charset=utf-8", "https://diario.example.com/rss")
+    assert streamed.streamed
+    assert [_fields(e) for e in streamed.entries] == [_fields(e) for e in feedparser.parse(body).entries]
+    assert websub.discover_hub(streamed) == ("https://hub.example.com/", "https://diario.example.com/rss")
+
+    atom = feed_stream.parse_feed(ATOM.encode(), None, "https://blog.example.com/atom")
+    reference = feedparser.parse(ATOM.encode(), response_headers={"content-location": "https://blog.example.com/atom"})
+    entries = atom.entries
+    assert atom.streamed and len(entries) == 2
+    for mine, theirs in zip(entries, reference.entries):
+        assert (mine.link, mine.id, entry_date(mine)) == (theirs.link, theirs.id, entry_date(theirs))
+    assert entries[0].title == "Entrada <b>uno</b>" and entries[0].author == "Luis"
+    assert entries[0].content[0].value == "<p>Texto uno</p>" and entries[0].tags[0].term == "ciencia"
+    assert entries[1].summary == "Texto dos"
+    assert websub.discover_hub(atom)[0] == "https://hub.example.com/"
+    print("   ✅ Mismos campos en RSS y Atom")
+
+
+def test_fallback_to_feedparser():
+    """Lo que el parser rápido no entiende se lee con feedparser, sin repetir entradas"""
+    print("🛟 Probando respaldo con feedparser...")
+    rdf = b"""<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">
+    <channel><title>x</title></channel><item><title>RDF</title><link>https://r.example.com/1</link></item></rdf:RDF>"""
+    feed = feed_stream.parse_feed(rdf)
+    assert not feed.streamed and [e.title for e in feed.entries] == ["RDF"]
+
+    # Entidad HTML a mitad del documento: las dos primeras ya salieron en streaming
+    body = _rss(4).replace(b"Noticia 2 &amp;", b"Noticia 2&nbsp;&amp;")
+    feed = feed_stream.parse_feed(body)
+    titles = [e.title for e in feed.iter_entries()]
+    assert not feed.streamed
+    assert len(titles) == 4 and titles[0] == "Noticia 0 & más" and titles[3] == "Noticia 3 & más"
+
+    latin = _rss(2).replace(b"UTF-8", b"ISO-8859-1")
+    assert not feed_stream.parse_feed(latin, "text/xml; charset=ISO-8859-1").streamed
+    assert [e.title for e in feed_stream.parse_feed(b"", None).entries] == []
+    print("   ✅ RDF, entidades HTML y otras codificaciones por feedparser")
+
+
+def test_lazy_entries():
+    """Con `limit` o la marca de agua no se parsea el resto de un feed grande"""
+    print("⚡ Probando lectura en streaming...")
+    body = _rss(1000)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    feed = feed_stream.parse_feed(body)
+    first = list(islice(feed.iter_entries(), 10))
+    stream_time = time.perf_counter() - started
+    stream_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    reference = feedparser.parse(body).entries[:10]
+    parser_time = time.perf_counter() - started
+    parser_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert [e.id for e in first] == [e.id for e in reference]
+    assert len(feed.seen_entries()) == 10
+    assert stream_time * 10 < parser_time and stream_peak * 10 < parser_peak
+
+    # La marca de agua corta el recorrido: ni se parsean las entradas siguientes
+    feed = feed_stream.parse_feed(body)
+    nuevas = select_entries(feed.iter_entries(), entry_key(first[3]))
+    assert [e.id for e in nuevas] == ["id-0", "id-1", "id-2"]
+    assert len(feed.seen_entries()) == 4
+    # Recorrer otra vez repite las ya leídas y sigue desde ahí
+    assert [e.id for e in islice(feed.iter_entries(), 6)] == [f"id-{i}" for i in range(6)]
+    print(f"   ✅ 10 de 1000 entradas: {stream_time * 1000:.1f} ms y {stream_peak // 1024} KB "
+          f"(feedparser {parser_time * 1000:.0f} ms y {parser_peak // 1024} KB)")
+
+
+def _chunked(body, read):
+    """Bloques de `body` como llegan de la red, contando cuántos se leyeron"""
+    for offset in range(0, len(body), feed_stream.CHUNK_SIZE):
+        read.append(offset)
+        yield body[offset:offset + feed_stream.CHUNK_SIZE]
+
+
+def test_network_stream():
+    """Desde los bloques de la red solo se lee hasta las entradas pedidas; el respaldo lee el resto"""
+    print("🌊 Probando lectura desde la red...")
+    body = _rss(1000)
+    read = []
+    before = feed_stream.parse_stats()
+    feed = feed_stream.parse_feed(_chunked(body, read)).prefetch(10)
+    assert [e.id for e in feed.entries] == [f"id-{i}" for i in range(10)]
+    assert feed.streamed and len(read) * feed_stream.CHUNK_SIZE < len(body) // 10
+    after = feed_stream.parse_stats()
+    assert after["streamed"] - before["streamed"] == 1 and after["fallback"] == before["fallback"]
+
+    # Error a mitad del documento: feedparser recibe lo ya leído más el resto
+    bad = _rss(300).replace(b"Noticia 200 &amp;", b"Noticia 200&nbsp;&amp;")
+    feed = feed_stream.parse_feed(_chunked(bad, [])).prefetch()
+    assert not feed.streamed and len(feed.entries) == 300
+    final = feed_stream.parse_stats()
+    assert final["streamed"] == after["streamed"] and final["fallback"] - after["fallback"] == 1
+    print(f"   ✅ {len(read)} bloques leídos de {len(body) // feed_stream.CHUNK_SIZE + 1}")
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = _rss(2000)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetch_feed():
+    """fetch_feed parsea en el hilo de la descarga y se queda con las primeras `limit` entradas"""
+    print("📡 Probando descarga del feed en streaming...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        feed = fetch_feed(f"http://127.0.0.1:{server.server_port}/rss", limit=5)
+        assert feed.status == 200 and feed.etag == '"v1"' and feed.streamed
+        assert len(feed.seen_entries()) == 0  # ya parseadas, aún sin recorrer
+        assert [e.id for e in feed.entries] == [f"id-{i}" for i in range(5)]
+        assert feed.feed.title == "Diario"
+
+        # Con la marca de agua la lectura se corta en su entrada (incluida)
+        feed = fetch_feed(f"http://127.0.0.1:{server.server_port}/rss", limit=50, stop_at="id-3")
+        assert [e.id for e in feed.seen_entries() + feed.entries] == [f"id-{i}" for i in range(4)]
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ 5 entradas de un feed de 2000")
+
+
+def test_stop_at_watermark(demo_source, recording_page_fetcher):
+    """fetch_sources pasa la marca de agua al descargar el feed, salvo en los recorridos completos"""
+    print("🌊 Probando corte de la descarga en la marca de agua...")
+    # De la más nueva a la más antigua, como la mayoría de los feeds
+    body = RSS.format(items="".join(ITEM.format(n=i, m=i) for i in reversed(range(30)))).encode()
+    calls = []
+
+    def feed_fetcher(url, etag, modified, limit, stop_at=None):
+        feed = feed_stream.parse_feed(body).prefetch(limit, stop_at)
+        calls.append((stop_at, len(feed.entries)))
+        return feed
+
+    rescan_every = Config.WATERMARK_RESCAN_EVERY
+    try:
+        Config.WATERMARK_RESCAN_EVERY = 5
+        with demo_source("marca_demo", "https://marca.example.com/rss", feed_fetcher,
+                         recording_page_fetcher([])) as ingest:
+            assert ingest()["nuevos"] == 10 and calls == [(None, 10)]
+            # Solo se lee hasta la entrada de la marca
+            result = ingest()
+            assert result["nuevos"] == 0 and calls[-1] == ("id-29", 1), (result, calls)
+            Config.WATERMARK_RESCAN_EVERY = 0
+            ingest()
+            assert calls[-1] == (None, 10)
+    finally:
+        Config.WATERMARK_RESCAN_EVERY = rescan_every
+    print("   ✅ Lectura cortada en la marca")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
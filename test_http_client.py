@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el cliente HTTP compartido (servidor local, sin red externa)
+"""
+
+import gzip
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+from config_advanced import Config
+from ingestion import download_page, fetch_feed
+
+FEED = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>Demo</title>
+<item><title>Nota</title><link>http://127.0.0.1/nota</link></item></channel></rss>"""
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = FEED if self.path == "/feed.xml" else b"<p>" + b"texto " * 200 + b"</p>"
+        compressed = "gzip" in self.headers.get("Accept-Encoding", "")
+        if compressed:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml" if self.path == "/feed.xml" else "text/html")
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connection_reuse():
+    """Feeds y páginas del mismo host comparten una conexión keep-alive comprimida"""
+    print("🔌 Probando reutilización de conexiones...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    cache_enabled = Config.PAGE_CACHE_ENABLED
+    try:
+        Config.PAGE_CACHE_ENABLED = False
+        # Contadores del proceso: otras pruebas también descargan de 127.0.0.1
+        before = http_client.http_stats()["hosts"].get("127.0.0.1", {"requests": 0, "connections": 0})
+        feed = fetch_feed(f"{base}/feed.xml")
+        assert feed.entries[0].title == "Nota"
+        for i in range(5):
+            page = download_page(f"{base}/nota-{i}")
+            assert page.content.startswith(b"<p>texto texto")  # descomprimido
+
+        host = http_client.http_stats()["hosts"]["127.0.0.1"]
+        print(f"   ✅ {host}")
+        assert host["requests"] - before["requests"] >= 6
+        assert host["connections"] - before["connections"] == 1
+    finally:
+        Config.PAGE_CACHE_ENABLED = cache_enabled
+        server.shutdown()
+        server.server_close()
+
+
+def test_dns_cache():
+    """Las resoluciones de la sesión se reutilizan durante el TTL, en una LRU acotada y sin tocar socket"""
+    print("🧭 Probando caché de DNS...")
+    real_getaddrinfo = socket.getaddrinfo
+    http_client.get_session()
+    assert socket.getaddrinfo is real_getaddrinfo  # el resto del proceso resuelve como siempre
+    assert isinstance(http_client.get_session().get_adapter("https://"), http_client.CachedDNSAdapter)
+    http_client.clear_dns_cache()
+    before = http_client.http_stats()["dns"]
+    http_client._resolve("localhost", 80)
+    http_client._resolve("localhost", 80)
+    after = http_client.http_stats()["dns"]
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # Al llenarse se expulsa la menos usada, no toda la caché
+    max_size = http_client.DNS_CACHE_MAX
+    try:
+        http_client.DNS_CACHE_MAX = 2
+        http_client._resolve("localhost", 81)
+        http_client._resolve("localhost", 80)  # pasa a ser la más reciente
+        http_client._resolve("localhost", 82)
+        assert list(http_client._dns_cache) == [("localhost", 80), ("localhost", 82)]
+    finally:
+        http_client.DNS_CACHE_MAX = max_size
+        http_client.clear_dns_cache()
+    print("   ✅ Segunda resolución servida desde la caché")
+
+
+def test_session_resolves_with_cache():
+    """Las conexiones de la sesión compartida pasan por la caché de DNS"""
+    print("🌐 Probando resolución de la sesión...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        http_client.clear_dns_cache()
+        r = http_client.get(f"http://localhost:{server.server_port}/feed.xml", timeout=5)
+        assert r.ok and r.content.startswith(b"<?xml")
+        assert ("localhost", server.server_port) in http_client._dns_cache
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ localhost resuelto por la caché de la sesión")
+
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_dns_cache()
+    test_session_resolves_with_cache()
+    print("🎉 Pruebas del cliente HTTP completadas")
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el motor de ingesta concurrente (sin red)
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ingestion
+import page_cache
+from config_advanced import Config
+from ingestion import IngestionEngine, download_page
+from politeness import HostLimiter, get_host_limiter
+
+
+def _permissive_limiter():
+    return HostLimiter(rate=1000, burst=1000, concurrency=100, overrides={})
+
+
+class FakeFeed:
+    def __init__(self, urls):
+        self.entries = [{"link": u} for u in urls]
+
+
+def _fake_network(delay):
+    """Crea fetchers falsos que duermen `delay` segundos y registran la concurrencia"""
+    state = {"active": 0, "max_active": 0}
+    lock = threading.Lock()
+
+    def track(fn):
+        def wrapper(url, *args):
+            with lock:
+                state["active"] += 1
+                state["max_active"] = max(state["max_active"], state["active"])
+            try:
+                time.sleep(delay)
+                return fn(url, *args)
+            finally:
+                with lock:
+                    state["active"] -= 1
+        return wrapper
+
+    feed_fetcher = track(lambda url, *args: FakeFeed([f"{url}/a{i}" for i in range(5)]))
+    page_fetcher = track(lambda url: f"<p>{url}</p>")
+    return state, feed_fetcher, page_fetcher
+
+
+def _callbacks():
+    def plan(source_key, feed):
+        return [{"url": e["link"], "content_long": None} for e in feed.entries]
+
+    def enrich(candidate, page):
+        candidate["content_long"] = page
+
+    def save(source_key, candidates, feed):
+        return sum(1 for c in candidates if c["content_long"])
+
+    return plan, enrich, save
+
+
+def test_concurrent_ingestion():
+    """Las fuentes se procesan en paralelo sin superar el límite global"""
+    print("⚡ Probando ingesta concurrente...")
+    state, feed_fetcher, page_fetcher = _fake_network(0.1)
+    sources = {f"src{i}": {"url": f"https://host{i}.example"} for i in range(4)}
+
+    engine = IngestionEngine(max_concurrency=8, deadline=10,
+                             feed_fetcher=feed_fetcher, page_fetcher=page_fetcher,
+                             limiter_factory=_permissive_limiter)
+    started = time.monotonic()
+    results = engine.run_sync(sources, *_callbacks())
+    elapsed = time.monotonic() - started
+
+    # Secuencialmente serían 4 * (1 + 5) * 0.1 = 2.4 s
+    print(f"   ✅ {sum(r['nuevos'] for r in results.values())} artículos en {elapsed:.2f}s "
+          f"(concurrencia máxima: {state['max_active']})")
+    assert all(r["nuevos"] == 5 and r["error"] is None for r in results.values())
+    assert state["max_active"] <= 8
+    assert elapsed < 1.5
+
+
+def test_deadline():
+    """Al vencer el plazo se guarda lo descargado y se marca timed_out"""
+    print("⏱️ Probando plazo total...")
+    _, feed_fetcher, _ = _fake_network(0.0)
+
+    def slow_page(url):
+        time.sleep(3 if url.endswith("a4") else 0)
+        return "<p>ok</p>"
+
+    engine = IngestionEngine(max_concurrency=8, deadline=0.5,
+                             feed_fetcher=feed_fetcher, page_fetcher=slow_page,
+                             limiter_factory=_permissive_limiter)
+    started = time.monotonic()
+    results = engine.run_sync({"lento": {"url": "https://lento.example"}}, *_callbacks())
+    elapsed = time.monotonic() - started
+
+    print(f"   ✅ {results['lento']['nuevos']} artículos antes del plazo ({elapsed:.2f}s)")
+    assert results["lento"]["timed_out"]
+    assert results["lento"]["nuevos"] == 4
+    assert elapsed < 2
+
+
+def test_feed_error():
+    """Un feed que falla se reporta sin afectar a las demás fuentes"""
+    print("❌ Probando errores por fuente...")
+    _, feed_fetcher, page_fetcher = _fake_network(0.0)
+
+    def broken_feed(url, *args):
+        if "roto" in url:
+            raise IOError("conexión rechazada")
+        return feed_fetcher(url, *args)
+
+    engine = IngestionEngine(max_concurrency=4, deadline=5,
+                             feed_fetcher=broken_feed, page_fetcher=page_fetcher,
+                             limiter_factory=_permissive_limiter)
+    results = engine.run_sync({"ok": {"url": "https://ok.example"},
+                               "roto": {"url": "https://roto.example"}}, *_callbacks())
+    assert results["ok"]["nuevos"] == 5
+    assert results["roto"]["error"] == "conexión rechazada"
+    print("   ✅ Error aislado por fuente")
+
+
+def test_host_politeness():
+    """Un mismo dominio respeta su ritmo; dominios distintos avanzan en paralelo"""
+    print("🚦 Probando cortesía por dominio...")
+    _, feed_fetcher, page_fetcher = _fake_network(0.0)
+    sources = {
+        "mismo1": {"url": "https://www.mismo.example/feed1"},
+        "mismo2": {"url": "https://mismo.example/feed2"},
+        "otro": {"url": "https://otro.example/feed"},
+    }
+
+    def limiter():
+        return HostLimiter(rate=10, burst=1, concurrency=1, overrides={})
+
+    engine = IngestionEngine(max_concurrency=8, deadline=10, feed_fetcher=feed_fetcher,
+                             page_fetcher=page_fetcher, limiter_factory=limiter)
+    results = engine.run_sync(sources, *_callbacks())
+    stats = engine.limiter.stats()
+
+    print(f"   ✅ Esperas por dominio: {stats}")
+    # 12 peticiones a mismo.example a 10/s (ráfaga 1) tardan al menos 1.1 s
+    assert stats["mismo.example"]["requests"] == 12
+    assert stats["otro.example"]["requests"] == 6
+    assert stats["mismo.example"]["max_wait"] > stats["otro.example"]["max_wait"]
+    assert results["mismo1"]["queue_wait"] > 0
+    assert results["otro"]["elapsed"] < results["mismo1"]["elapsed"] + results["mismo2"]["elapsed"]
+
+
+def test_shared_limiter():
+    """Un mismo limitador reparte el presupuesto del dominio entre bucles de hilos distintos"""
+    print("🤝 Probando limitador compartido entre hilos...")
+    from enrichment import EnrichmentPipeline
+    assert IngestionEngine().limiter_factory() is get_host_limiter()
+    assert EnrichmentPipeline(None, None, None).limiter_factory() is get_host_limiter()
+
+    limiter = HostLimiter(rate=20, burst=1, concurrency=1, overrides={})
+    state = {"active": 0, "max_active": 0}
+    lock = threading.Lock()
+
+    async def requests(n):
+        async def one():
+            async with limiter.slot("https://compartido.example/nota"):
+                with lock:
+                    state["active"] += 1
+                    state["max_active"] = max(state["max_active"], state["active"])
+                await asyncio.sleep(0.01)
+                with lock:
+                    state["active"] -= 1
+        await asyncio.gather(*(one() for _ in range(n)))
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=asyncio.run, args=(requests(5),)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    elapsed = time.monotonic() - started
+    # 10 peticiones a 20/s (ráfaga 1): al menos 0.45 s y nunca dos a la vez
+    assert state["max_active"] == 1 and elapsed >= 0.45, (state, elapsed)
+    assert limiter.stats()["compartido.example"]["requests"] == 10
+    print(f"   ✅ 10 peticiones desde 2 bucles en {elapsed:.2f}s")
+
+
+class _ArticleHandler(BaseHTTPRequestHandler):
+    """Sirve una página enorme por bloques; /lento la envía poco a poco y /colgada deja de enviar"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        if self.path == "/corta":
+            self.wfile.write(b"<html><body><p>Nota breve y completa.</p></body></html>")
+            return
+        if self.path == "/colgada":
+            # Un bloque justo antes del plazo y después silencio
+            self.wfile.write(b"<html><body><p>Primer parrafo.</p>")
+            self.wfile.flush()
+            time.sleep(0.9)
+            self.wfile.write(b"<p>Segundo parrafo.</p>")
+            self.wfile.flush()
+            time.sleep(3)
+            return
+        self.wfile.write(b"<html><body>")
+        try:
+            for i in range(2000):
+                if self.path == "/lento":
+                    time.sleep(0.2)
+                self.wfile.write(b"<p>Parrafo numero %d con texto suficiente para contar como contenido.</p>" % i)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_bounded_download():
+    """La descarga se corta por texto suficiente, por tamaño y por plazo"""
+    print("✂️ Probando descarga acotada de páginas...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ArticleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    saved = (Config.PAGE_CACHE_ENABLED, Config.PAGE_MAX_BYTES, Config.PAGE_DEADLINE, Config.PAGE_TARGET_PARAGRAPHS)
+    try:
+        Config.PAGE_CACHE_ENABLED = False
+        Config.PAGE_MAX_BYTES, Config.PAGE_DEADLINE, Config.PAGE_TARGET_PARAGRAPHS = 50000, 1, 5
+        before = ingestion.fetch_stats()
+
+        page = download_page(f"{base}/rapido")
+        assert page.truncated == "enough_text" and page.ok
+        assert len(page.content) < 20000
+
+        Config.PAGE_TARGET_PARAGRAPHS = 0
+        page = download_page(f"{base}/rapido")
+        assert page.truncated == "max_bytes" and len(page.content) == 50000
+
+        started = time.monotonic()
+        page = download_page(f"{base}/lento")
+        assert page.truncated == "deadline" and page.content.startswith(b"<html>")
+        assert time.monotonic() - started < 2
+
+        # La lectura en curso también respeta el plazo total (no suma otro timeout de lectura)
+        started = time.monotonic()
+        page = download_page(f"{base}/colgada")
+        assert page.truncated == "deadline" and page.content.endswith(b"Segundo parrafo.</p>")
+        assert time.monotonic() - started < 1.5, time.monotonic() - started
+
+        after = ingestion.fetch_stats()
+        assert after["pages"] - before["pages"] == 4
+        assert after["early_stop"] - before["early_stop"] == 1
+        assert after["truncated_max_bytes"] - before["truncated_max_bytes"] == 1
+        assert after["truncated_deadline"] - before["truncated_deadline"] == 2
+        print(f"   ✅ Contadores: {after}")
+    finally:
+        Config.PAGE_CACHE_ENABLED, Config.PAGE_MAX_BYTES, Config.PAGE_DEADLINE, Config.PAGE_TARGET_PARAGRAPHS = saved
+        server.shutdown()
+        server.server_close()
+
+
+def test_truncated_cache():
+    """Los prefijos cortados por texto suficiente se cachean marcados; los cortados por plazo no"""
+    print("🗃️ Probando caché de páginas cortadas...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ArticleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    saved = (Config.PAGE_CACHE_ENABLED, Config.PAGE_TARGET_PARAGRAPHS, Config.PAGE_DEADLINE, page_cache._page_cache)
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            Config.PAGE_CACHE_ENABLED, Config.PAGE_TARGET_PARAGRAPHS = True, 5
+            cache = page_cache._page_cache = page_cache.PageCache(root)
+            page = download_page(f"{base}/rapido")
+            assert page.truncated == "enough_text"
+            # Solo se sirve a quien no lee más párrafos de los que contiene el prefijo
+            assert cache.get(f"{base}/rapido") is None and cache.get(f"{base}/rapido", 6) is None
+            cached = cache.get(f"{base}/rapido", 5)
+            assert cached.content == page.content and cached.truncated == "enough_text" and cached.paragraphs == 5
+            assert download_page(f"{base}/rapido", use_cache=True).from_cache
+            Config.PAGE_TARGET_PARAGRAPHS = 0
+            assert download_page(f"{base}/rapido", use_cache=True).from_cache is False
+
+            page = download_page(f"{base}/corta")
+            assert page.truncated is None and cache.get(f"{base}/corta").content == page.content
+            assert download_page(f"{base}/corta", use_cache=True).from_cache
+
+            Config.PAGE_DEADLINE = 1
+            assert download_page(f"{base}/lento").truncated == "deadline"
+            assert cache.get(f"{base}/lento", 1) is None
+            print("   ✅ Prefijo y página completa en la caché, descarga a medias fuera")
+        finally:
+            Config.PAGE_CACHE_ENABLED, Config.PAGE_TARGET_PARAGRAPHS, Config.PAGE_DEADLINE, page_cache._page_cache = saved
+            server.shutdown()
+            server.server_close()
+
+
+def test_reextract_long_page(demo_source):
+    """Una página larga enriquecida (cortada por texto suficiente) se puede re-extraer después desde la caché"""
+    print("♻️ Probando re-extracción de páginas largas desde la caché...")
+    import app as news_app
+    import reextract_from_cache
+    from feed_stream import parse_feed
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ArticleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    feed = f"""<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Larga</title>
+    <item><title>Nota larga</title><link>{base}/rapido</link><description>Corta</description></item>
+    </channel></rss>""".encode()
+    saved = (Config.PAGE_CACHE_ENABLED, page_cache._page_cache)
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            Config.PAGE_CACHE_ENABLED = True
+            page_cache._page_cache = page_cache.PageCache(root)
+            before = ingestion.fetch_stats()
+            with demo_source("larga_demo", f"{base}/rss", lambda url, *args: parse_feed(feed),
+                             ingestion.fetch_page) as ingest:
+                assert ingest()["pages_fetched"] == 1
+                assert ingestion.fetch_stats()["early_stop"] - before["early_stop"] == 1
+                article = news_app.Article.query.filter_by(source="larga_demo").one()
+                content_long = article.content_long
+                assert content_long.startswith("Parrafo numero 0")
+                article.content_long = None
+                news_app.db.session.commit()
+
+                assert reextract_from_cache.reextract_articles("larga_demo") == {"updated": 1, "missing": 0}
+                news_app.db.session.refresh(article)
+                assert article.content_long == content_long
+                assert ingestion.fetch_stats()["pages"] - before["pages"] == 1
+            print("   ✅ Re-extraída sin volver a descargarla")
+        finally:
+            Config.PAGE_CACHE_ENABLED, page_cache._page_cache = saved
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la detección de duplicados en lote (filtro en memoria + una consulta IN)
+"""
+
+import sys
+
+import pytest
+from sqlalchemy import event
+
+from feed_stream import parse_feed
+from ingestion import KnownUrlFilter
+from urlnorm import url_hash
+
+
+def test_known_url_filter():
+    """Conjunto LRU acotado: las consultas renuevan la entrada y se descartan las más antiguas"""
+    print("🧠 Probando filtro de URLs conocidas...")
+    known = KnownUrlFilter(max_size=3)
+    known.add_many(["a", "b", "c"])
+    assert "a" in known  # "a" pasa a ser la más reciente
+    known.add_many(["d"])
+    assert "b" not in known and all(h in known for h in "acd") and len(known) == 3
+    known.discard_many(["c", "x"])
+    assert "c" not in known and len(known) == 2
+    print("   ✅ LRU de 3 entradas")
+
+
+def test_single_query():
+    """Los hashes que no están en el filtro se resuelven con una sola consulta IN (...)"""
+    print("🔎 Probando consulta única de duplicados...")
+    import app as news_app
+
+    urls = [f"https://dedup.example.com/n{i}" for i in range(200)]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "FROM articles" in statement:
+            statements.append(parameters)
+
+    with news_app.app.app_context():
+        inserted = news_app.insert_articles([{"url": u, "title": f"Nota {i}", "source": "bbc_mundo"}
+                                             for i, u in enumerate(urls[:3])])
+        ids = [article_id for article_id, _ in inserted]
+        try:
+            hashes = {url_hash(u) for u in urls}
+            news_app.KNOWN_URLS.discard_many(hashes)
+            event.listen(news_app.db.engine, "before_cursor_execute", count)
+            try:
+                assert news_app._filter_known_urls(hashes) == {h for _, h in inserted}
+                assert len(statements) == 1 and len(statements[0]) == 200
+                # Ya en el filtro: solo se consultan las desconocidas
+                news_app._filter_known_urls(hashes)
+                assert len(statements) == 2 and len(statements[1]) == 197
+            finally:
+                event.remove(news_app.db.engine, "before_cursor_execute", count)
+        finally:
+            news_app.delete_article_rows(ids)
+            news_app.Article.query.filter(news_app.Article.id.in_(ids)).delete(synchronize_session=False)
+            news_app.db.session.commit()
+    print("   ✅ 200 URLs en 1 consulta")
+
+
+def test_false_positive():
+    """Una URL que el filtro da por conocida pero ya no está en la base de datos se trata como nueva"""
+    print("👻 Probando falsos positivos del filtro...")
+    import app as news_app
+
+    feed = parse_feed(b"""<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>x</title>
+    <item><title>Vuelve a publicarse</title><link>https://dedup.example.com/fantasma</link>
+    <description>Borrada desde otro proceso</description></item></channel></rss>""")
+    h = url_hash("https://dedup.example.com/fantasma")
+    news_app.KNOWN_URLS.add_many([h])
+    with news_app.app.app_context():
+        candidatos = news_app._plan_entries("bbc_mundo", feed)
+    assert [c["url_hash"] for c in candidatos] == [h] and "article_id" not in candidatos[0]
+    assert h not in news_app.KNOWN_URLS
+    print("   ✅ Falso positivo descartado del filtro")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
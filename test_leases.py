@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el reparto de fuentes entre varios schedulers (concesiones con caducidad)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from config_advanced import Config
+from leases import fair_share, shard_of
+
+# Worker en otro proceso: late hasta `end` y muestra sus particiones
+WORKER = """
+import json, sys, time
+import app
+end = float(sys.argv[1])
+with app.app.app_context():
+    owned = []
+    while time.time() < end:
+        owned = app.renew_leases(sys.argv[2])
+        time.sleep(0.2)
+print(json.dumps(owned))
+"""
+
+
+def test_fair_share():
+    """Parte justa de particiones según los workers vivos"""
+    print("➗ Probando reparto...")
+    assert fair_share(1) == Config.SCHEDULER_SHARDS
+    assert fair_share(3) * 3 >= Config.SCHEDULER_SHARDS > (fair_share(3) - 1) * 3
+    assert fair_share(0) == Config.SCHEDULER_SHARDS
+    assert shard_of(Config.SCHEDULER_SHARDS + 5) == 5
+    print("   ✅ Reparto correcto")
+
+
+def test_takeover():
+    """Entrada de un segundo worker, relevo tras caducar y liberación al detenerse"""
+    print("🧩 Probando concesiones...")
+    import app as news_app
+
+    ttl = timedelta(seconds=news_app.Config.LEASE_TTL)
+    t0 = datetime.utcnow()
+    with news_app.app.app_context():
+        a = news_app.renew_leases("worker-a", now=t0)
+        assert a == list(range(Config.SCHEDULER_SHARDS))
+        assert news_app.renew_leases("worker-b", now=t0) == []  # todo ocupado hasta que A suelte
+
+        t1 = t0 + timedelta(seconds=5)
+        a = news_app.renew_leases("worker-a", now=t1)  # ya son dos: A suelta la mitad
+        b = news_app.renew_leases("worker-b", now=t1)
+        assert len(a) == len(b) == Config.SCHEDULER_SHARDS // 2
+        assert set(a).isdisjoint(b) and set(a) | set(b) == set(range(Config.SCHEDULER_SHARDS))
+
+        # B deja de latir: sus particiones caducan y A se queda con todas
+        t2 = t1 + ttl + timedelta(seconds=1)
+        assert news_app.renew_leases("worker-a", now=t2) == list(range(Config.SCHEDULER_SHARDS))
+        assert news_app.SchedulerWorker.query.count() == 1
+
+        # Solo se leen las fuentes de las particiones propias
+        keys = {k for (k,) in news_app.db.session.query(news_app.Source.key).filter(news_app.in_shards(b))}
+        ids = dict(news_app.db.session.query(news_app.Source.key, news_app.Source.id))
+        assert keys == {k for k, i in ids.items() if shard_of(i) in b}
+
+        news_app.release_leases("worker-a")
+        assert news_app.ShardLease.query.filter(news_app.ShardLease.owner.isnot(None)).count() == 0
+        data = news_app.app.test_client().get("/api/scheduler/workers").get_json()
+        assert data["workers"] == [] and data["unassigned"] == Config.SCHEDULER_SHARDS
+    print("   ✅ Reparto, relevo y liberación correctos")
+
+
+def test_reshard():
+    """SCHEDULER_SHARDS se lee de la configuración: seed_leases crea o borra las filas de concesión"""
+    print("🔀 Probando cambio del número de particiones...")
+    import app as news_app
+
+    shards = Config.SCHEDULER_SHARDS
+    with news_app.app.app_context():
+        try:
+            Config.SCHEDULER_SHARDS = 8
+            news_app.seed_leases()
+            assert news_app.ShardLease.query.count() == 8 and fair_share(2) == 4
+            assert news_app.renew_leases("worker-r") == list(range(8))
+            news_app.release_leases("worker-r")
+        finally:
+            Config.SCHEDULER_SHARDS = shards
+            assert news_app.seed_leases() == shards - 8
+    print("   ✅ Concesiones ajustadas a 8 particiones y de vuelta")
+
+
+def test_enrichment_claims():
+    """Cada lote de enriquecimiento se reclama en un UPDATE: dos procesos no descargan la misma página"""
+    print("🔒 Probando reclamo de pendientes de enriquecer...")
+    import app as news_app
+
+    ttl = timedelta(seconds=news_app.Config.ENRICH_CLAIM_TTL)
+    t0 = datetime.utcnow()
+    rows = [{"url": f"https://reclamo.example.com/n{i}", "title": f"Nota {i}", "source": "bbc_mundo"} for i in range(4)]
+    with news_app.app.app_context():
+        ids = {article_id for article_id, _ in news_app.insert_articles(rows)}
+        claimed = set()
+        try:
+            first = news_app._load_pending_enrichment(1000, now=t0)
+            claimed = {c["id"] for c in first}
+            assert ids <= claimed
+            assert not ids & {c["id"] for c in news_app._load_pending_enrichment(1000, now=t0)}
+
+            mine = sorted((c for c in first if c["id"] in ids), key=lambda c: c["id"])
+            mine[0].update(content_long="Texto de la página", enriched_at=t0)
+            # Dos guardados con el mismo valor leído no pierden intentos
+            news_app._save_enrichment([mine[0]], [mine[1]])
+            news_app._save_enrichment([], [mine[1]])
+            attempts = dict(news_app.db.session.query(news_app.Article.id, news_app.Article.enrich_attempts).filter(
+                news_app.Article.id.in_(ids)))
+            assert attempts[mine[0]["id"]] == 1 and attempts[mine[1]["id"]] == 2
+
+            # El guardado libera el reclamo; los demás quedan reservados hasta que caduque
+            again = {c["id"] for c in news_app._load_pending_enrichment(1000, now=t0 + timedelta(seconds=1))}
+            assert again & ids == {mine[1]["id"]}
+            claimed |= again
+            later = {c["id"] for c in news_app._load_pending_enrichment(1000, now=t0 + 2 * ttl)}
+            assert later & ids == ids - {mine[0]["id"]}
+            claimed |= later
+        finally:
+            news_app.Article.query.filter(news_app.Article.id.in_(claimed - ids)).update(
+                {"enrich_claimed_until": None}, synchronize_session=False)
+            news_app.delete_article_rows(list(ids))
+            news_app.Article.query.filter(news_app.Article.id.in_(ids)).delete(synchronize_session=False)
+            news_app.db.session.commit()
+    print("   ✅ Lotes sin solaparse y reclamos que caducan")
+
+
+def test_worker_processes():
+    """Varios procesos locales se reparten todas las particiones sin solaparse"""
+    print("🖥️ Probando workers en procesos separados...")
+    end = time.time() + 6
+    env = dict(os.environ, LEASE_TTL="2")
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER, str(end), f"proc-{n}"], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+             for n in range(3)]
+    results = [json.loads(p.communicate(timeout=60)[0].strip().splitlines()[-1]) for p in procs]
+    owned = [shard for shards in results for shard in shards]
+    assert len(owned) == len(set(owned)) == Config.SCHEDULER_SHARDS, [len(r) for r in results]
+    assert all(len(r) <= fair_share(3) for r in results)
+    print(f"   ✅ Particiones por worker: {[len(r) for r in results]}")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
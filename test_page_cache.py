@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la caché de páginas en disco (sin red)
+"""
+
+import tempfile
+
+from page_cache import PageCache
+
+
+def test_roundtrip_and_dedup():
+    """Las páginas se recuperan intactas y el mismo HTML se guarda una sola vez"""
+    print("💾 Probando lectura/escritura de la caché...")
+    with tempfile.TemporaryDirectory() as root:
+        cache = PageCache(root, max_bytes=10 * 1024 * 1024)
+        html = "<html><p>Contenido con acentos: economía</p></html>".encode("utf-8")
+        headers = {"Content-Type": "text/html; charset=utf-8", "Set-Cookie": "x=1"}
+
+        cache.put("https://Example.com/nota#comentarios", html, 200, headers)
+        cache.put("https://example.com/otra", html, 200, headers)
+
+        page = cache.get("https://example.com/nota")
+        assert page is not None and page.content == html
+        assert page.text.endswith("economía</p></html>")
+        assert page.headers == {"Content-Type": "text/html; charset=utf-8"}
+        assert cache.get("https://example.com/no-existe") is None
+
+        stats = cache.stats()
+        print(f"   ✅ {stats}")
+        assert stats["pages"] == 2 and stats["blobs"] == 1
+
+
+def test_lru_eviction():
+    """Al superar el tamaño máximo se expulsan las páginas menos usadas"""
+    print("🧹 Probando expulsión LRU...")
+    with tempfile.TemporaryDirectory() as root:
+        cache = PageCache(root, max_bytes=2500)
+        import os
+        pages = {f"https://example.com/{i}": os.urandom(1000) for i in range(3)}
+
+        cache.put("https://example.com/0", pages["https://example.com/0"])
+        cache.put("https://example.com/1", pages["https://example.com/1"])
+        cache.get("https://example.com/0")  # /0 pasa a ser la más reciente
+        cache.put("https://example.com/2", pages["https://example.com/2"])
+
+        assert cache.get("https://example.com/1") is None
+        assert cache.get("https://example.com/0").content == pages["https://example.com/0"]
+        assert cache.get("https://example.com/2").content == pages["https://example.com/2"]
+        assert cache.stats()["bytes"] <= 2500
+        print(f"   ✅ {cache.stats()}")
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_dedup()
+    test_lru_eviction()
+    print("🎉 Pruebas de la caché de páginas completadas")
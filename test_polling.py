@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el intervalo de sondeo adaptativo
+"""
+
+from config_advanced import Config
+from polling import poll_interval
+
+
+def test_rate_based_interval():
+    """El intervalo sigue al ritmo de publicación, dentro de los límites"""
+    print("📡 Probando intervalos según el ritmo de publicación...")
+    # 12 artículos/hora -> ~2 nuevos por lectura cada 10 minutos
+    assert poll_interval(12.0) == int(3600 * Config.POLL_TARGET_ARTICLES / 12)
+    assert poll_interval(1000.0) == Config.POLL_MIN_INTERVAL  # agencia de noticias
+    assert poll_interval(0.01) == Config.POLL_MAX_INTERVAL  # semanario
+    print(f"   ✅ 12/h -> {poll_interval(12.0)}s, 1000/h -> {poll_interval(1000.0)}s, 0.01/h -> {poll_interval(0.01)}s")
+
+
+def test_quiet_sources_back_off():
+    """Sin publicaciones recientes el intervalo crece poco a poco hasta el máximo"""
+    print("😴 Probando fuentes sin publicaciones...")
+    interval = 300
+    steps = []
+    for _ in range(20):
+        interval = poll_interval(0.0, interval, found_new=False)
+        steps.append(interval)
+    assert steps[0] == 450 and steps[1] == 675
+    assert steps[-1] == Config.POLL_MAX_INTERVAL
+    assert poll_interval(0.0, 5000, found_new=True) == 5000
+    assert poll_interval(0.0) == Config.POLL_MIN_INTERVAL
+    print(f"   ✅ {steps[:5]}...")
+
+
+if __name__ == "__main__":
+    test_rate_based_interval()
+    test_quiet_sources_back_off()
+    print("🎉 Pruebas de sondeo adaptativo completadas")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la salud de las fuentes y el circuit breaker
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import health
+from config_advanced import Config
+
+
+def _new_health():
+    return SimpleNamespace(latency=None, error_rate=None, consecutive_failures=0, checks=0,
+                           last_success=None, last_failure=None, last_error=None, open_until=None)
+
+
+def test_circuit_breaker():
+    """Se abre tras varios fallos seguidos, espera el doble cada vez y un acierto lo cierra"""
+    print("🔌 Probando circuit breaker...")
+    now = datetime(2026, 10, 17, 12, 0)
+    h = _new_health()
+    assert health.source_state(h, now) == health.STATE_UNKNOWN
+    assert health.is_available(None, now)
+
+    health.record_check(h, True, 0.4, now=now)
+    assert health.source_state(h, now) == health.STATE_OK
+    assert h.latency == 0.4 and h.error_rate == 0.0
+
+    pauses = []
+    for _ in range(Config.HEALTH_FAILURE_THRESHOLD + 2):
+        health.record_check(h, False, error="timeout", now=now)
+        pauses.append((h.open_until - now).total_seconds() if h.open_until else 0)
+    print(f"   ✅ Pausas: {pauses}")
+    base = Config.HEALTH_BACKOFF_BASE
+    assert pauses == [0] * (Config.HEALTH_FAILURE_THRESHOLD - 1) + [base, 2 * base, 4 * base]
+    assert not health.is_available(h, now)
+    assert health.source_state(h, now) == health.STATE_OPEN
+    assert health.is_available(h, now + timedelta(seconds=4 * base))
+    assert h.last_error == "timeout" and h.last_success == now
+
+    later = now + timedelta(hours=1)
+    health.record_check(h, True, 0.2, now=later)
+    assert health.is_available(h, later) and h.consecutive_failures == 0
+    assert h.last_success == later
+    assert health.source_state(h, later) == health.STATE_DEGRADED  # tasa de error aún alta
+    assert health.backoff_seconds(100) == Config.HEALTH_BACKOFF_MAX
+
+
+def test_ewma():
+    """Latencia y tasa de error como medias móviles"""
+    print("📉 Probando medias móviles...")
+    h = _new_health()
+    for latency in (1.0, 1.0, 1.0):
+        health.record_check(h, True, latency)
+    health.record_check(h, True, 2.0)
+    alpha = Config.HEALTH_EWMA_ALPHA
+    assert abs(h.latency - (alpha * 2.0 + (1 - alpha) * 1.0)) < 0.001
+    health.record_check(h, False, error="500")
+    assert abs(h.error_rate - alpha) < 0.001
+    assert h.checks == 5
+    print(f"   ✅ Latencia {h.latency}s, tasa de error {h.error_rate}")
+
+
+if __name__ == "__main__":
+    test_circuit_breaker()
+    test_ewma()
+    print("🎉 Pruebas de salud de fuentes completadas")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el registro de fuentes en la base de datos y la importación OPML
+"""
+
+import sys
+import time
+
+import pytest
+
+from sources import SourceRegistry, build_opml, make_key, parse_opml
+
+OPML = """<?xml version="1.0" encoding="UTF-8"?>
+<opml version="2.0"><head><title>Suscripciones</title></head><body>
+  <outline text="Deportes">
+    <outline type="rss" text="Marca" xmlUrl="https://e00-marca.uecdn.es/rss/portada.xml" htmlUrl="https://www.marca.com"/>
+    <outline type="rss" text="As" xmlUrl="https://as.com/rss/tags/ultimas_noticias.xml" priority="3" maxArticles="25"/>
+  </outline>
+  <outline type="rss" title="Página 12" xmlUrl="https://www.pagina12.com.ar/rss/portada" language="es" region="Argentina"/>
+</body></opml>""".encode()
+
+
+def test_registry_reload():
+    """El registro solo recarga las fuentes cuando cambia la versión"""
+    print("🔄 Probando recarga por versión...")
+    state = {"version": 1, "loads": 0, "sources": {"a": {"name": "A", "url": "u", "enabled": True}}}
+
+    def load_sources():
+        state["loads"] += 1
+        return dict(state["sources"])
+
+    registry = SourceRegistry(lambda: state["version"], load_sources, check_every=3600)
+    assert list(registry) == ["a"] and registry["a"]["name"] == "A"
+    state["sources"]["b"] = {"name": "B", "url": "v", "enabled": False}
+    assert "b" not in registry  # aún no toca comprobar la versión
+    registry.refresh()
+    assert "b" not in registry and state["loads"] == 1  # misma versión: no se recarga
+    state["version"] = 2
+    registry.refresh()
+    assert "b" in registry and registry.enabled() == ["a"] and state["loads"] == 2
+    print("   ✅ Recarga solo con cambio de versión")
+
+
+def test_opml_round_trip():
+    """Importación de carpetas y ajustes OPML, y exportación equivalente"""
+    print("📂 Probando OPML...")
+    feeds = parse_opml(OPML)
+    assert [f["name"] for f in feeds] == ["Marca", "As", "Página 12"]
+    assert feeds[0]["category"] == "Deportes" and feeds[0]["website"] == "https://www.marca.com"
+    assert feeds[1]["priority"] == 3 and feeds[1]["max_articles"] == 25
+    assert feeds[2]["region"] == "Argentina" and feeds[2]["category"] is None
+
+    exported = build_opml({make_key(f["name"]): {"enabled": True, **f} for f in feeds})
+    again = parse_opml(exported)
+    assert [(f["name"], f["url"]) for f in again] == [(f["name"], f["url"]) for f in feeds]
+    assert again[1]["max_articles"] == 25 and again[1]["enabled"] is True
+
+    assert make_key("Página 12") == "pagina_12"
+    assert make_key("Página 12", {"pagina_12"}) == "pagina_12_2"
+    try:
+        parse_opml(b"<opml><body>")
+        assert False, "debería fallar"
+    except ValueError:
+        pass
+    print("   ✅ OPML ida y vuelta")
+
+
+def test_registry_in_app():
+    """Alta por API, importación OPML masiva y recarga del registro en la app"""
+    print("🗃️ Probando registro en la base de datos...")
+    import app as news_app
+
+    client = news_app.app.test_client()
+    data = client.get("/api/sources").get_json()
+    keys = [s["key"] for s in data["sources"]]
+    assert "bbc_mundo" in keys and "elpais_america" in keys
+    bbc = next(s for s in data["sources"] if s["key"] == "bbc_mundo")
+    assert bbc["priority"] == 1 and bbc["max_articles"] == 20  # ajustes de RSS_SOURCES_ADVANCED
+
+    r = client.post("/api/sources", json={"name": "Diario de Prueba", "url": "https://prueba.example.com/rss",
+                                          "priority": "2"})
+    assert r.status_code == 200, r.get_json()
+    key = r.get_json()["source"]["key"]
+    assert key == "diario_de_prueba" and news_app.RSS_SOURCES[key]["priority"] == 2
+    assert client.post("/api/sources", json={"name": "Otra", "url": "https://prueba.example.com/rss"}).status_code == 400
+    client.post("/api/sources", json={"key": key, "enabled": False})
+    assert key in news_app.RSS_SOURCES and key not in news_app.RSS_SOURCES.enabled()
+
+    r = client.post("/sources/import-opml", data=OPML)
+    assert r.get_json()["added"] == 3
+    assert client.post("/sources/import-opml", data=OPML).get_json() == {"success": True, "added": 0, "skipped": 3, "keys": []}
+    assert "marca" in news_app.RSS_SOURCES
+
+    # Miles de fuentes: una sola inserción y una recarga
+    many = "".join(f'<outline type="rss" text="Feed {i}" xmlUrl="https://feeds.example.com/{i}.xml"/>' for i in range(5000))
+    started = time.perf_counter()
+    result = client.post("/sources/import-opml", data=f"<opml><body>{many}</body></opml>".encode()).get_json()
+    assert result["added"] == 5000
+    assert len(news_app.RSS_SOURCES) >= 5000
+    elapsed = time.perf_counter() - started
+    print(f"   ✅ 5000 fuentes importadas y recargadas en {elapsed:.2f}s")
+
+    exported = client.get("/sources/export.opml")
+    assert exported.mimetype == "text/x-opml"
+    assert len(parse_opml(exported.data)) == len(news_app.RSS_SOURCES)
+
+    with news_app.app.app_context():
+        for source_key in [key, "marca", "as", "pagina_12"]:
+            news_app.delete_source(source_key)
+        news_app.Source.query.filter(news_app.Source.key.in_(result["keys"])).delete(synchronize_session=False)
+        news_app._bump_registry_version()
+        news_app.db.session.commit()
+        news_app.RSS_SOURCES.invalidate()
+    assert len(news_app.RSS_SOURCES) < 100
+    assert "marca" not in news_app.RSS_SOURCES
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el clasificador de temas (Aho-Corasick)
+"""
+
+import sys
+
+import pytest
+
+from topics import TOPIC_KEYWORDS, classify, fold, matches_topic
+
+
+def test_classify():
+    """Todos los temas en una pasada, con conteo de apariciones y sin tildes"""
+    print("🏷️ Probando clasificación de temas...")
+    temas = classify("El Presidente anunció medidas contra la inflación",
+                     "La ECONOMIA y la economía del país; el fútbol y el futbol")
+    print(f"   ✅ {temas}")
+    assert temas["politica"] == 1
+    assert temas["economia"] == 3  # inflación + economia + economía
+    assert temas["deportes"] == 2
+    assert temas["internacional"] == 1
+    assert "salud" not in temas
+
+    # Frases, subcadenas y palabras compartidas entre temas
+    assert classify("Efectos del cambio climático")["medio_ambiente"] == 2  # cambio climático + clima
+    assert classify("Nuevas aplicaciones móviles") == {"tecnologia": 1}
+    assert set(classify("El Mundial de 2026")) == {"deportes", "internacional"}
+    assert classify("") == {}
+    assert classify(None, "Sin temas conocidos aquí") == {}
+
+
+def test_matches_topic():
+    """Filtro por un tema (equivalente a la búsqueda anterior por subcadena)"""
+    print("🔎 Probando filtro por tema...")
+    texto = "Nuevo hospital en la capital"
+    assert matches_topic("salud", texto)
+    assert not matches_topic("deportes", texto)
+    assert matches_topic("all", texto) and matches_topic(None, texto)
+
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        for keyword in keywords:
+            assert matches_topic(topic, f"xx {keyword.upper()} yy"), (topic, keyword)
+            assert matches_topic(topic, fold(keyword))
+    print("   ✅ Todas las palabras clave coinciden con y sin tildes")
+
+
+def test_topic_routes():
+    """article_topics al insertar y en el backfill, y el filtro topic= de /, /search y /api/articles"""
+    print("🗂️ Probando filtro por tema en las rutas...")
+    import app as news_app
+
+    rows = [
+        {"url": "https://temas.example.com/futbol", "title": "Zyxtema gana el Mundial de fútbol",
+         "summary": "Final del torneo", "source": "bbc_mundo"},
+        {"url": "https://temas.example.com/hospital", "title": "Zyxtema abre un hospital",
+         "summary": "Nuevo centro de salud", "source": "bbc_mundo"},
+        {"url": "https://temas.example.com/nada", "title": "Zyxtema sin nada", "summary": "", "source": "bbc_mundo"},
+    ]
+    with news_app.app.app_context():
+        ids = [article_id for article_id, _ in news_app.insert_articles(rows)]
+        futbol, hospital, nada = ids
+        try:
+            topics_of = lambda: {i: {t.topic: t.hits for t in news_app.ArticleTopic.query.filter_by(article_id=i)}
+                                 for i in ids}
+            stored = topics_of()
+            assert stored[futbol] == classify(rows[0]["title"], rows[0]["summary"]) and "deportes" in stored[futbol]
+            assert "salud" in stored[hospital] and stored[nada] == {}
+            # El backfill reconstruye la misma tabla desde los artículos guardados
+            assert news_app.backfill_topics() >= 3 and topics_of() == stored
+
+            client = news_app.app.test_client()
+            api = lambda **args: {a["id"] for a in client.get("/api/articles", query_string={
+                "per_page": 1000, **args}).get_json()["articles"]} & set(ids)
+            assert api(topic="deportes") == {futbol} and api(topic="salud") == {hospital}
+            assert api(topic="all") == api() == set(ids)
+
+            html = client.get("/?topic=deportes").get_data(as_text=True)
+            assert "Zyxtema gana el Mundial" in html and "Zyxtema abre un hospital" not in html
+            html = client.get("/search?q=Zyxtema&topic=salud").get_data(as_text=True)
+            assert "Zyxtema abre un hospital" in html and "Zyxtema gana el Mundial" not in html
+            assert "Zyxtema sin nada" in client.get("/search?q=Zyxtema").get_data(as_text=True)
+        finally:
+            news_app.delete_article_rows(ids)
+            news_app.Article.query.filter(news_app.Article.id.in_(ids)).delete(synchronize_session=False)
+            news_app.db.session.commit()
+    print("   ✅ 3 artículos filtrados por tema en las 3 rutas")
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
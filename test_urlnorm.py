@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la normalización de URLs usada en la deduplicación
+"""
+
+from urlnorm import canonical_url, url_hash
+
+
+def test_variants_share_hash():
+    """Las variantes de un mismo enlace tienen la misma clave"""
+    print("🔗 Probando variantes de una misma URL...")
+    variants = [
+        "https://www.diariolibre.com/politica/nota-123",
+        "http://diariolibre.com/politica/nota-123/",
+        "https://WWW.DiarioLibre.com:443/politica//nota-123?utm_source=rss&utm_medium=feed",
+        "https://www.diariolibre.com/politica/nota-123#comentarios",
+        "https://www.diariolibre.com/politica/nota-123?fbclid=abc",
+    ]
+    canon = {canonical_url(v) for v in variants}
+    print(f"   ✅ {canon}")
+    assert canon == {"https://diariolibre.com/politica/nota-123"}
+    assert len({url_hash(v) for v in variants}) == 1
+    assert len(url_hash(variants[0])) == 32
+
+
+def test_meaningful_differences_kept():
+    """Los parámetros que sí cambian el contenido se conservan (ordenados)"""
+    print("🧭 Probando parámetros relevantes...")
+    a = canonical_url("https://example.com/buscar?q=economía&page=2&utm_campaign=x")
+    b = canonical_url("https://example.com/buscar?page=2&q=econom%C3%ADa")
+    assert a == b == "https://example.com/buscar?page=2&q=econom%C3%ADa"
+    assert url_hash("https://example.com/nota?id=1") != url_hash("https://example.com/nota?id=2")
+    assert canonical_url("https://example.com:8080/") == "https://example.com:8080/"
+    print("   ✅ Parámetros relevantes conservados")
+
+
+if __name__ == "__main__":
+    test_variants_share_hash()
+    test_meaningful_differences_kept()
+    print("🎉 Pruebas de normalización de URLs completadas")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar la marca de agua por fuente (lectura incremental de feeds)
+"""
+
+from datetime import datetime, timedelta
+
+from config_advanced import Config
+from watermark import high_water_mark, needs_rescan, select_entries, watermark_stats
+
+BASE = datetime(2026, 10, 17, 12, 0)
+
+
+def _entry(n, hours_ago):
+    return {"id": f"guid-{n}", "link": f"https://example.com/{n}", "when": BASE - timedelta(hours=hours_ago)}
+
+
+def _date_of(entry):
+    return entry.get("when")
+
+
+def test_stops_at_watermark():
+    """Solo se recorren las entradas publicadas después de la marca"""
+    print("🌊 Probando lectura incremental...")
+    feed = [_entry(n, n) for n in range(20)]
+    entry_id, entry_at = high_water_mark(feed[5:], _date_of)
+    assert (entry_id, entry_at) == ("guid-5", feed[5]["when"])
+
+    before = watermark_stats()
+    nuevas = select_entries(feed, entry_id, entry_at, date_of=_date_of)
+    assert [e["id"] for e in nuevas] == [f"guid-{n}" for n in range(5)]
+    after = watermark_stats()
+    assert after["entries"] - before["entries"] == 5
+    assert after["skipped"] - before["skipped"] == 15
+
+    # Lectura sin novedades: no queda nada que comprobar en la base de datos
+    entry_id, entry_at = high_water_mark(feed, _date_of)
+    assert select_entries(feed, entry_id, entry_at, date_of=_date_of) == []
+    print(f"   ✅ {len(nuevas)} nuevas de {len(feed)}")
+
+
+def test_pinned_and_missing_entries():
+    """Una entrada antigua fijada arriba no se toma como marca ni corta el recorrido"""
+    print("📌 Probando entradas fijadas y marcas desaparecidas...")
+    pinned = _entry("fijada", 300)
+    feed = [pinned] + [_entry(n, n) for n in range(10)]
+    entry_id, entry_at = high_water_mark(feed[4:] + [pinned], _date_of)
+    assert entry_id == "guid-3"
+
+    nuevas = select_entries(feed, entry_id, entry_at, date_of=_date_of)
+    assert [e["id"] for e in nuevas] == ["guid-0", "guid-1", "guid-2"]
+
+    # La entrada de la marca ya no está en el feed: se descartan por fecha
+    nuevas = select_entries(feed[:3] + feed[5:], entry_id, entry_at, date_of=_date_of)
+    assert [e["id"] for e in nuevas] == ["guid-0", "guid-1"]
+
+    # Sin fechas la marca es la primera entrada del feed
+    assert high_water_mark([{"link": "https://example.com/a"}, {"link": "https://example.com/b"}]) == ("https://example.com/a", None)
+    print("   ✅ Entradas fijadas ignoradas")
+
+
+def test_periodic_rescan():
+    """Sin marca o cada WATERMARK_RESCAN_EVERY lecturas se recorre el feed entero"""
+    print("🔁 Probando recorridos completos...")
+    feed = [_entry(n, n) for n in range(10)]
+    assert needs_rescan(None, 0)
+    assert not needs_rescan("guid-0", Config.WATERMARK_RESCAN_EVERY - 1)
+    assert needs_rescan("guid-0", Config.WATERMARK_RESCAN_EVERY)
+    assert len(select_entries(feed, "guid-0", feed[0]["when"], rescan=True, date_of=_date_of)) == 10
+    print("   ✅ Recorrido completo")
+
+
+if __name__ == "__main__":
+    test_stops_at_watermark()
+    test_pinned_and_missing_entries()
+    test_periodic_rescan()
+    print("🎉 Pruebas de marca de agua completadas")
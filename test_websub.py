@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para probar el suscriptor WebSub contra un hub local de prueba
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+
+import feedparser
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+import app as news_app
+import websub
+
+TOPIC = "http://127.0.0.1:1/feed.xml"
+
+FEED_WITH_HUB = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel><title>Demo</title>
+<atom:link rel="hub" href="http://hub.example.com/"/>
+<atom:link rel="self" href="http://127.0.0.1:1/feed.xml"/>
+<item><title>Primera</title><link>http://127.0.0.1:1/a1.html</link></item>
+</channel></rss>"""
+
+
+def _push_body(n):
+    items = "".join(
+        f"<item><title>Noticia {i} sobre la economía</title><link>http://127.0.0.1:1/push{i}.html</link>"
+        f"<guid>push-{i}</guid><pubDate>Sat, 17 Oct 2026 10:0{i}:00 GMT</pubDate></item>"
+        for i in range(n)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Demo</title>{items}</channel></rss>'.encode()
+
+
+class StandInHub:
+    """Hub mínimo: acepta suscripciones, verifica el callback y distribuye contenido firmado"""
+
+    def __init__(self):
+        self.subscriptions = {}  # callback -> secret (solo las verificadas)
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                self.send_response(202)
+                self.end_headers()
+                threading.Thread(target=hub._verify, args=(form,), daemon=True).start()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _verify(self, form):
+        challenge = "reto-123"
+        params = {
+            "hub.mode": form["hub.mode"],
+            "hub.topic": form["hub.topic"],
+            "hub.challenge": challenge,
+            "hub.lease_seconds": "3600",
+        }
+        r = requests.get(f"{form['hub.callback']}?{urlencode(params)}", timeout=5)
+        if r.status_code == 200 and r.text == challenge:
+            if form["hub.mode"] == "subscribe":
+                self.subscriptions[form["hub.callback"]] = form.get("hub.secret")
+            else:
+                self.subscriptions.pop(form["hub.callback"], None)
+
+    def publish(self, body, secret=None):
+        """Envía `body` a cada suscriptor (con el secreto indicado, o el suyo)"""
+        responses = []
+        for callback, own_secret in self.subscriptions.items():
+            headers = {"Content-Type": "application/rss+xml"}
+            if secret or own_secret:
+                headers["X-Hub-Signature"] = websub.sign(secret or own_secret, body)
+            responses.append(requests.post(callback, data=body, headers=headers, timeout=5))
+        return responses
+
+    def close(self):
+        self.server.shutdown()
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_signature_and_discovery():
+    """Firma HMAC de las notificaciones y descubrimiento del hub en el feed"""
+    print("🔏 Probando firma y descubrimiento del hub...")
+    body = b"<rss/>"
+    header = websub.sign("secreto", body)
+    assert header.startswith("sha256=")
+    assert websub.verify_signature("secreto", body, header)
+    assert websub.verify_signature("secreto", body, websub.sign("secreto", body, "sha1"))
+    assert not websub.verify_signature("otro", body, header)
+    assert not websub.verify_signature("secreto", body + b" ", header)
+    assert not websub.verify_signature("secreto", body, None)
+    assert not websub.verify_signature("secreto", body, "md5=abc")
+
+    feed = feedparser.parse(FEED_WITH_HUB)
+    assert websub.discover_hub(feed) == ("http://hub.example.com/", TOPIC)
+    feed["link_header"] = '<http://otro-hub.example.com/>; rel="hub"'
+    assert websub.discover_hub(feed)[0] == "http://otro-hub.example.com/"
+    assert websub.discover_hub(feedparser.parse(_push_body(1)), TOPIC) == (None, TOPIC)
+    print("   ✅ Firma y descubrimiento correctos")
+
+
+def test_push_ingestion():
+    """Suscripción, verificación y entradas recibidas por push contra el hub de prueba"""
+    print("📬 Probando ingesta por WebSub...")
+    hub = StandInHub()
+    server = make_server("127.0.0.1", 0, news_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    with news_app.app.app_context():
+        news_app.save_source({"key": "websub_demo", "name": "WebSub Demo", "url": TOPIC, "language": "es",
+                              "website": "http://127.0.0.1:1", "region": "X"})
+    try:
+        with news_app.app.app_context():
+            sub = news_app.websub_subscribe("websub_demo", hub=hub.url, topic=TOPIC, callback_base=base)
+            assert sub.state in ("pending", "active")
+        assert _wait(lambda: hub.subscriptions), "el hub no pudo verificar el callback"
+
+        with news_app.app.app_context():
+            sub = news_app.db.session.get(news_app.WebSubSubscription, "websub_demo")
+            assert sub.state == "active" and sub.lease_seconds == 3600
+            assert news_app.active_subscriptions() == {"websub_demo"}
+
+        # Contenido firmado: entra por el mismo camino que el sondeo
+        [r] = hub.publish(_push_body(3))
+        assert r.status_code == 200, r.text
+        # Firma incorrecta: 2xx pero se descarta
+        [r] = hub.publish(_push_body(5), secret="secreto-falso")
+        assert r.status_code == 202
+
+        with news_app.app.app_context():
+            articles = news_app.Article.query.filter_by(source="websub_demo").all()
+            assert sorted(a.title for a in articles) == [f"Noticia {i} sobre la economía" for i in range(3)]
+            assert all(a.enriched_at is None for a in articles)  # páginas para el enriquecimiento
+            topics = news_app.ArticleTopic.query.filter(
+                news_app.ArticleTopic.article_id.in_([a.id for a in articles])).all()
+            assert {t.topic for t in topics} == {"economia"}
+            sub = news_app.db.session.get(news_app.WebSubSubscription, "websub_demo")
+            assert sub.pushes == 1
+
+        # Repetir la notificación no duplica artículos
+        hub.publish(_push_body(3))
+        with news_app.app.app_context():
+            assert news_app.Article.query.filter_by(source="websub_demo").count() == 3
+
+        # Callback sin suscripción o con topic ajeno
+        client = news_app.app.test_client()
+        assert client.get("/websub/callback/websub_demo", query_string={
+            "hub.mode": "subscribe", "hub.topic": "http://otro/", "hub.challenge": "x"}).status_code == 404
+        assert client.post("/websub/callback/no_existe", data=b"<rss/>").status_code == 410
+
+        # Desuscripción
+        with news_app.app.app_context():
+            news_app.websub_subscribe("websub_demo", callback_base=base, mode="unsubscribe")
+        assert _wait(lambda: not hub.subscriptions)
+        with news_app.app.app_context():
+            assert news_app.db.session.get(news_app.WebSubSubscription, "websub_demo").state == "unsubscribed"
+            assert news_app.active_subscriptions() == set()
+        print("   ✅ 3 artículos recibidos por push, firma falsa descartada")
+    finally:
+        with news_app.app.app_context():
+            news_app.delete_source("websub_demo")
+        server.shutdown()
+        hub.close()
+
+
+if __name__ == "__main__":
+    # Con pytest, para usar la base de datos temporal y las fixtures de conftest.py
+    sys.exit(pytest.main(["-s", __file__]))
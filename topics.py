@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Clasificador de temas para News Aggregator Pro
+Las palabras clave de todos los temas se compilan una sola vez (al importar)
+en un autómata Aho-Corasick: cada artículo se recorre una única vez y se
+obtienen todos los temas que coinciden con su número de apariciones.
+
+El texto y las palabras clave se comparan sin tildes y en minúsculas, así
+que "economia" y "economía" son equivalentes. Se mantiene la semántica de
+subcadena de la búsqueda anterior ("económicos" cuenta como "económico").
+"""
+
+import unicodedata
+from collections import deque
+
+# Palabras clave para cada tema
+TOPIC_KEYWORDS = {
+    'economia': ['economía', 'económico', 'finanzas', 'dinero', 'inversión', 'mercado', 'bolsa', 'inflación', 'pib', 'desempleo', 'salario', 'presupuesto'],
+    'politica': ['política', 'político', 'gobierno', 'presidente', 'ministro', 'congreso', 'senado', 'elecciones', 'votación', 'partido', 'democracia'],
+    'salud': ['salud', 'médico', 'hospital', 'enfermedad', 'vacuna', 'covid', 'pandemia', 'tratamiento', 'medicina', 'cirugía', 'doctor'],
+    'tecnologia': ['tecnología', 'tecnológico', 'digital', 'internet', 'software', 'hardware', 'aplicación', 'app', 'smartphone', 'computadora', 'inteligencia artificial'],
+    'deportes': ['deporte', 'deportivo', 'fútbol', 'futbol', 'baloncesto', 'tenis', 'olímpico', 'mundial', 'campeonato', 'liga', 'equipo'],
+    'cultura': ['cultura', 'cultural', 'arte', 'música', 'cine', 'película', 'libro', 'literatura', 'teatro', 'exposición', 'festival'],
+    'internacional': ['internacional', 'mundial', 'global', 'país', 'nación', 'extranjero', 'diplomacia', 'onu', 'naciones unidas'],
+    'nacional': ['nacional', 'local', 'región', 'ciudad', 'municipal', 'provincial', 'estatal'],
+    'ciencia': ['ciencia', 'científico', 'investigación', 'estudio', 'descubrimiento', 'laboratorio', 'universidad', 'académico'],
+    'medio_ambiente': ['medio ambiente', 'ambiental', 'clima', 'cambio climático', 'contaminación', 'sostenible', 'ecológico', 'naturaleza']
+}
+
+
+def fold(text):
+    """Minúsculas y sin tildes, diéresis ni eñes ("Economía" -> "economia")"""
+    text = (text or "").lower()
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+class TopicAutomaton:
+    """Autómata Aho-Corasick sobre las palabras clave de cada tema"""
+
+    def __init__(self, topic_keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]  # temas que terminan en cada estado (incluye los sufijos)
+        for topic, keywords in topic_keywords.items():
+            for keyword in keywords:
+                self._add(fold(keyword), topic)
+        self._build()
+
+    def _add(self, keyword, topic):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if topic not in self._out[state]:  # "fútbol" y "futbol" son la misma palabra clave
+            self._out[state] += (topic,)
+
+    def _build(self):
+        """Calcula los enlaces de fallo y los convierte en transiciones directas (DFA)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+        # En orden BFS el estado de fallo ya está completo: se heredan sus transiciones
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            children = list(self._goto[state].values())
+            queue.extend(children)
+            if state:
+                for char, nxt in self._goto[self._fail[state]].items():
+                    self._goto[state].setdefault(char, nxt)
+
+    def scan(self, text):
+        """Recorre el texto (ya normalizado con fold) una vez: {tema: apariciones}"""
+        goto, out = self._goto, self._out
+        hits = {}
+        state = 0
+        for char in text:
+            state = goto[state].get(char, 0)
+            if out[state]:
+                for topic in out[state]:
+                    hits[topic] = hits.get(topic, 0) + 1
+        return hits
+
+
+TOPICS = TopicAutomaton(TOPIC_KEYWORDS)
+
+
+def classify(*texts):
+    """
+    Temas de un artículo a partir de sus textos (título, resumen...).
+    Retorna: dict {tema: número de apariciones de sus palabras clave}
+    """
+    return TOPICS.scan(fold(" ".join(t for t in texts if t)))
+
+
+def matches_topic(topic, *texts):
+    """True si el texto coincide con el tema (o si el tema es vacío / 'all')"""
+    if not topic or topic == "all":
+        return True
+    return topic in classify(*texts)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Normalización de URLs para News Aggregator Pro
+Convierte las distintas variantes de un mismo enlace (parámetros de
+seguimiento, http/https, www, barra final, fragmento...) en una URL canónica
+y calcula una clave hash de ancho fijo para deduplicar.
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+# Parámetros de seguimiento que no cambian el contenido de la página
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "referrer", "cmpid", "ocid", "smid", "smtyp",
+    "_ga", "_gl", "__twitter_impression", "ns_mchannel", "ns_source", "ns_campaign",
+    "ns_linkname", "ns_fee", "int_source", "int_medium", "int_campaign",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "at_", "hsa_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_MULTI_SLASH = re.compile(r"/{2,}")
+# Caracteres que no hace falta codificar en una ruta
+_SAFE_PATH = "/:@!$&'()*+,;=-._~"
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    """
+    URL canónica para comparar enlaces:
+    - esquema https (http y https se consideran la misma página)
+    - host en minúsculas, sin 'www.' ni puerto por defecto
+    - ruta sin barras repetidas ni barra final, con el percent-encoding normalizado
+    - sin parámetros de seguimiento, con el resto de parámetros ordenados
+    - sin fragmento
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port
+    if port and port not in DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe=_SAFE_PATH)
+    path = _MULTI_SLASH.sub("/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    path = path or "/"
+
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)]
+    query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_hash(url):
+    """Clave de deduplicación: blake2b de 128 bits de la URL canónica (32 caracteres hex)"""
+    return hashlib.blake2b(canonical_url(url).encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Marca de agua (high-water mark) por fuente para News Aggregator Pro
+Se guarda la entrada más reciente ya vista de cada feed (GUID y fecha de
+publicación). La siguiente lectura recorre el feed solo hasta esa entrada:
+en régimen estable apenas quedan entradas que comprobar contra la base de
+datos.
+
+Cada WATERMARK_RESCAN_EVERY lecturas se recorre el feed completo, por si la
+fuente reordena entradas o publica con fechas atrasadas.
+"""
+
+import threading
+
+from config_advanced import Config
+
+MAX_KEY_LEN = 500
+
+_stats = {"polls": 0, "rescans": 0, "entries": 0, "skipped": 0}
+_stats_lock = threading.Lock()
+
+
+def watermark_stats():
+    """Lecturas, recorridos completos y entradas recorridas frente a descartadas por la marca"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def entry_key(entry):
+    """Identificador estable de una entrada: GUID (id), o el enlace si no tiene"""
+    key = entry.get("id") or entry.get("guid") or entry.get("link")
+    return key[:MAX_KEY_LEN] if key else None
+
+
+def needs_rescan(last_entry_id, polls_since_rescan):
+    """True si no hay marca todavía o toca el recorrido completo periódico"""
+    return not last_entry_id or (polls_since_rescan or 0) >= Config.WATERMARK_RESCAN_EVERY
+
+
+def select_entries(entries, last_entry_id, last_entry_at=None, rescan=False, date_of=None):
+    """
+    Entradas por encima de la marca de agua.
+
+    Args:
+        entries: entradas del feed en su orden (normalmente de la más nueva a la más antigua)
+        last_entry_id: entry_key de la entrada más reciente ya vista
+        last_entry_at: su fecha de publicación (datetime naive UTC)
+        rescan: recorrer todas las entradas sin aplicar la marca
+        date_of: f(entry) -> datetime, para descartar entradas más antiguas
+            que la marca (p. ej. una entrada fijada arriba del feed)
+
+    El recorrido se corta al llegar a la entrada de la marca: si `entries`
+    es un iterador (feed leído en streaming) el resto ni se parsea, y solo
+    cuentan como descartadas las entradas recorridas.
+    """
+    total = len(entries) if hasattr(entries, "__len__") else None
+    walked = 0
+    if rescan or not last_entry_id:
+        selected = list(entries)
+        walked = len(selected)
+    else:
+        selected = []
+        for entry in entries:
+            walked += 1
+            if entry_key(entry) == last_entry_id:
+                break
+            if last_entry_at and date_of is not None:
+                dt = date_of(entry)
+                if dt is not None and dt < last_entry_at:
+                    continue
+            selected.append(entry)
+    with _stats_lock:
+        _stats["polls"] += 1
+        _stats["rescans"] += bool(rescan or not last_entry_id)
+        _stats["entries"] += len(selected)
+        _stats["skipped"] += (walked if total is None else total) - len(selected)
+    return selected
+
+
+def high_water_mark(entries, date_of=None):
+    """
+    Nueva marca de agua de un feed: (entry_key, fecha) de su entrada más
+    reciente. Es la de fecha mayor (no necesariamente la primera, por las
+    entradas fijadas); sin fechas, la primera del feed.
+    """
+    best_key, best_at = None, None
+    for entry in entries:
+        key = entry_key(entry)
+        if not key:
+            continue
+        dt = date_of(entry) if date_of is not None else None
+        if best_key is None or (dt is not None and (best_at is None or dt > best_at)):
+            best_key, best_at = key, dt
+    return best_key, best_at
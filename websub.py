@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Suscriptor WebSub (PubSubHubbub) para News Aggregator Pro
+Las fuentes que anuncian un hub (<atom:link rel="hub"> en el feed o la
+cabecera HTTP Link) envían sus entradas nuevas al callback de la app en
+cuanto se publican, sin esperar al siguiente sondeo.
+
+Aquí está la parte del protocolo que no depende de Flask ni de la base de
+datos: descubrimiento del hub, petición de suscripción y firma HMAC de las
+notificaciones. Las rutas del callback están en app.py.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+from requests.utils import parse_header_links
+
+import http_client
+from config_advanced import Config
+
+# Algoritmos aceptados en X-Hub-Signature (sha1 solo por compatibilidad con hubs antiguos)
+SIGNATURE_ALGORITHMS = {
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+}
+
+
+def discover_hub(feed, default_topic=None):
+    """
+    Hub y topic (URL canónica del feed) anunciados por un feed parseado.
+    La cabecera Link de la respuesta tiene prioridad sobre los enlaces del
+    propio documento.
+
+    Retorna: (hub, topic); hub es None si la fuente no usa WebSub
+    """
+    links = [(link.get("rel"), link.get("url")) for link in parse_header_links(feed.get("link_header") or "")]
+    links += [(link.get("rel"), link.get("href")) for link in (feed.get("feed") or {}).get("links", [])]
+    hub = next((href for rel, href in links if rel == "hub" and href), None)
+    topic = next((href for rel, href in links if rel == "self" and href), None)
+    return hub, topic or default_topic
+
+
+def new_secret():
+    return secrets.token_hex(32)
+
+
+def sign(secret, body, algorithm="sha256"):
+    """Valor de X-Hub-Signature para `body` ("sha256=<hex>")"""
+    digest = hmac.new(secret.encode(), body, SIGNATURE_ALGORITHMS[algorithm]).hexdigest()
+    return f"{algorithm}={digest}"
+
+
+def verify_signature(secret, body, header):
+    """True si la cabecera X-Hub-Signature corresponde al cuerpo con el secreto de la suscripción"""
+    if not header or "=" not in header:
+        return False
+    algorithm, _, digest = header.partition("=")
+    algorithm = algorithm.strip().lower()
+    if algorithm not in SIGNATURE_ALGORITHMS:
+        return False
+    expected = hmac.new(secret.encode(), body, SIGNATURE_ALGORITHMS[algorithm]).hexdigest()
+    return hmac.compare_digest(expected, digest.strip().lower())
+
+
+def request_subscription(hub, topic, callback, secret=None, lease_seconds=None, mode="subscribe", timeout=15):
+    """
+    Envía al hub la petición de (des)suscripción. El hub la confirma después
+    con un GET al callback (hub.challenge).
+
+    Retorna: (ok, mensaje); ok es True si el hub aceptó la petición (2xx)
+    """
+    data = {
+        "hub.mode": mode,
+        "hub.topic": topic,
+        "hub.callback": callback,
+    }
+    if mode == "subscribe":
+        data["hub.lease_seconds"] = str(lease_seconds or Config.WEBSUB_LEASE_SECONDS)
+        if secret:
+            data["hub.secret"] = secret
+    try:
+        r = http_client.post(hub, data=data, timeout=timeout)
+    except Exception as e:
+        return False, str(e)
+    if 200 <= r.status_code < 300:
+        return True, f"HTTP {r.status_code}"
+    return False, f"HTTP {r.status_code}: {r.text[:200]}"